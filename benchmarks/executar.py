@@ -0,0 +1,307 @@
+# benchmarks/executar.py
+"""
+Suíte de benchmarks do SisPagto.
+
+Gera (ou reutiliza) dados sintéticos com benchmarks/gerar_dados.py, carrega-os
+em um banco dedicado e mede quatro partes do sistema:
+- importação: o caminho da página de Upload (cadastros em lote, PAGTO em blocos
+  com validação e deduplicação, e a reimportação do mesmo arquivo, só duplicatas);
+- relatório: a carga do relatório de pagamentos por SQL e pela cópia colunar,
+  os filtros e agregações em pandas e pelo índice de facetas, e as consultas
+  do modo paginado no servidor;
+- edição: as gravações do data_editor por src/edicao.py, a leitura de um
+  editor de Cadastros (tabela inteira ou uma página keyset) e cadastros
+  simultâneos de várias sessões, com e sem uma importação em andamento;
+- inicialização: o tempo até a primeira renderização de cada página em um
+  processo novo (benchmarks/inicializacao.py).
+
+Os resultados são gravados em JSON em benchmarks/resultados/ e podem ser
+comparados com uma execução anterior para acusar regressões.
+
+Uso:
+    python -m benchmarks.executar --pagamentos 100000
+    python -m benchmarks.executar --pagamentos 100000 --comparar benchmarks/resultados/anterior.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+# Sessões simultâneas e cadastros por sessão na medição da fila de escrita
+SESSOES_CONCORRENTES = 8
+CADASTROS_POR_SESSAO = 25
+TABELAS_CADASTRO = [
+    'CREDOR', 'PRODUTOS_SERVICOS', 'LISTA_ITENS', 'CONTRATO', 'ADITIVOS', 'NF', 'RECIBO', 'FATURA', 'BOLETO',
+]
+
+def medir(nome, funcao, repeticoes, linhas=None, preparar=None):
+    """Executa `funcao` `repeticoes` vezes (após `preparar`, se houver) e resume os tempos."""
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    resultado = {
+        "nome": nome, "segundos": tempos,
+        "mediana": statistics.median(tempos), "minimo": min(tempos), "maximo": max(tempos),
+    }
+    if linhas:
+        resultado["linhas"] = linhas
+        resultado["linhas_por_segundo"] = linhas / resultado["mediana"]
+    print(f"  {nome:<45} {resultado['mediana']:9.3f} s")
+    return resultado
+
+def _versao_codigo():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=PASTA, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def executar(arquivos, pagamentos, repeticoes):
+    # Importado aqui, depois de SISPAGTO_DATABASE_URL definido
+    import pandas as pd
+    from sqlalchemy import select, func
+
+    from src.database import get_engine, Base, inicializar_banco, Pagamento, Contrato
+    from src.importacao import importar_lote, importar_csv, TAMANHO_BLOCO_PADRAO
+    from src.consultas import (
+        FiltrosPagamento, DIMENSOES_FILTRO, consulta_relatorio_pagamentos, carregar_pagina_pagamentos,
+        totais_pagamentos, opcoes_filtro, resumo_pagamentos,
+    )
+    from src.edicao import atualizar_em_lote
+    from src import repositorios
+    from src.repositorios import produtos
+    from src import relatorio_colunar
+    from src.facetas import IndiceFacetas
+    from benchmarks.inicializacao import medir_inicializacao
+
+    engine = get_engine()
+    resultados = []
+
+    def recriar_banco():
+        Base.metadata.drop_all(engine)
+        inicializar_banco()
+
+    def importar_cadastros():
+        importar_lote({tabela: arquivos[tabela] for tabela in TABELAS_CADASTRO})
+
+    def importar_pagamentos():
+        resultado = importar_csv(arquivos['PAGTO'], 'PAGTO', chunksize=TAMANHO_BLOCO_PADRAO)
+        if resultado.linhas_rejeitadas:
+            print(f"  aviso: {resultado.linhas_rejeitadas} pagamentos rejeitados na importação")
+
+    print("Importação")
+    resultados.append(medir("importacao.cadastros", importar_cadastros, repeticoes, preparar=recriar_banco))
+    # Cada repetição da importação de PAGTO parte de um banco só com os cadastros
+    resultados.append(medir(
+        "importacao.pagamentos", importar_pagamentos, repeticoes, linhas=pagamentos,
+        preparar=lambda: (recriar_banco(), importar_cadastros()),
+    ))
+    resultados.append(medir("importacao.pagamentos_duplicados", importar_pagamentos, repeticoes, linhas=pagamentos))
+
+    print("Relatório")
+    credores = pd.read_sql(select(Base.metadata.tables['CREDOR']), engine)
+    credores_filtro = credores['CREDOR_NOME'].head(max(1, len(credores) // 10)).tolist()
+    with engine.connect() as conn:
+        data_min, data_max = conn.execute(select(func.min(Pagamento.PAGTO_DATA), func.max(Pagamento.PAGTO_DATA))).one()
+    data_ini = data_min + (data_max - data_min) / 4
+    filtros = FiltrosPagamento(data_ini=data_ini, selecoes={"Credor": credores_filtro})
+
+    def carregar_relatorio():
+        # Mesmo conjunto de leituras de load_all_data (pages/relatorios.py)
+        df = pd.read_sql(consulta_relatorio_pagamentos(), engine, index_col="PAGTO_ID", parse_dates=['Data'])
+        for tabela in ('CREDOR', 'CONTRATO', 'PRODUTOS_SERVICOS'):
+            pd.read_sql(select(Base.metadata.tables[tabela]), engine)
+        for resumo in ('RESUMO_CREDOR', 'RESUMO_CONTRATO', 'RESUMO_PERIODO'):
+            resumo_pagamentos(resumo)
+        return df
+
+    resultados.append(medir("relatorio.carregar", carregar_relatorio, repeticoes, linhas=pagamentos))
+    # Cópia colunar (src/relatorio_colunar.py): montagem completa e leitura já em dia com o banco
+    resultados.append(medir("relatorio.colunar_reconstruir", relatorio_colunar.reconstruir, repeticoes, linhas=pagamentos))
+    resultados.append(medir(
+        "relatorio.colunar_carregar", relatorio_colunar.carregar_relatorio_pagamentos, repeticoes, linhas=pagamentos
+    ))
+    df = carregar_relatorio()
+
+    def filtrar_e_agregar():
+        filtrado = df[(df['Data'].dt.date >= data_ini) & df['Credor'].isin(credores_filtro)]
+        filtrado.groupby('Credor')['Valor'].sum()
+        filtrado.groupby('Período')['Valor'].agg(['count', 'sum'])
+        filtrado['Valor'].sum()
+
+    def consultar_servidor():
+        for dimensao in DIMENSOES_FILTRO:
+            opcoes_filtro(dimensao, filtros)
+        totais_pagamentos(filtros)
+        carregar_pagina_pagamentos(filtros, 100, 0)
+
+    # Filtros em cascata da barra lateral pelo índice de facetas (src/facetas.py)
+    compacto = relatorio_colunar.carregar_relatorio_pagamentos()
+    facetas = IndiceFacetas(compacto)
+
+    def filtrar_facetas():
+        mascara = facetas.mascara_datas(data_ini, None)
+        for dimensao in DIMENSOES_FILTRO:
+            facetas.contagens(dimensao, mascara)
+            mascara = facetas.restringir(mascara, dimensao, filtros.selecoes.get(dimensao))
+        facetas.filtrar(compacto, mascara)['Valor'].sum()
+
+    resultados.append(medir("relatorio.filtrar_agregar_pandas", filtrar_e_agregar, repeticoes, linhas=pagamentos))
+    resultados.append(medir("relatorio.facetas_montar", lambda: IndiceFacetas(compacto), repeticoes, linhas=pagamentos))
+    resultados.append(medir("relatorio.facetas_filtrar", filtrar_facetas, repeticoes, linhas=pagamentos))
+    resultados.append(medir("relatorio.pagina_servidor", consultar_servidor, repeticoes))
+
+    print("Edição")
+    with engine.connect() as conn:
+        ids = conn.execute(select(Pagamento.PAGTO_ID).order_by(Pagamento.PAGTO_ID).limit(1_000)).scalars().all()
+        contratos = conn.execute(select(Contrato.CONTRATO_N).limit(500)).scalars().all()
+    rodada = iter(range(10**9))
+
+    def editar_tipos():
+        # Reclassificação de PAGTO_TIPO, alternando o valor a cada repetição
+        tipo = "Fatura" if next(rodada) % 2 else "Recibo"
+        with engine.begin() as conn:
+            atualizar_em_lote(conn, 'PAGTO', {i: {'PAGTO_TIPO': tipo} for i in ids})
+
+    def editar_valores():
+        # Altera valores, o que também ajusta as tabelas de resumo
+        with engine.begin() as conn:
+            atualizar_em_lote(conn, 'PAGTO', {i: {'PAGTO_VALOR': 10 + next(rodada) % 7} for i in ids})
+
+    def editar_contratos():
+        with engine.begin() as conn:
+            atualizar_em_lote(conn, 'CONTRATO', {c: {'CONTRATO_DATA_FIM': '31/12/2030'} for c in contratos})
+
+    resultados.append(medir("edicao.pagamentos_tipo", editar_tipos, repeticoes, linhas=len(ids)))
+    resultados.append(medir("edicao.pagamentos_valor", editar_valores, repeticoes, linhas=len(ids)))
+    resultados.append(medir("edicao.contratos_datas", editar_contratos, repeticoes, linhas=len(contratos)))
+
+    # Leitura de um editor de Cadastros: tabela inteira ou uma página keyset no meio da tabela
+    with engine.connect() as conn:
+        total_contratos = conn.execute(select(func.count()).select_from(Contrato)).scalar()
+    _, cursor_meio = repositorios.carregar_pagina('CONTRATO', tamanho=max(1, total_contratos // 2))
+
+    def carregar_contratos_completo():
+        df = repositorios.carregar_tabela('CONTRATO')
+        pd.to_datetime(df['CONTRATO_DATA_INI'], errors='coerce').dt.strftime('%d/%m/%Y')
+
+    def carregar_contratos_pagina():
+        df, _ = repositorios.carregar_pagina('CONTRATO', apos=cursor_meio, tamanho=100)
+        pd.to_datetime(df['CONTRATO_DATA_INI'], errors='coerce').dt.strftime('%d/%m/%Y')
+        repositorios.contar_registros('CONTRATO')
+
+    resultados.append(medir("edicao.contratos_tabela_completa", carregar_contratos_completo, repeticoes, linhas=total_contratos))
+    resultados.append(medir("edicao.contratos_pagina_keyset", carregar_contratos_pagina, repeticoes))
+
+    def cadastrar_concorrentes():
+        # Várias sessões salvando formulários ao mesmo tempo, pela fila de escrita (src/fila_escrita.py)
+        def sessao(numero):
+            for i in range(CADASTROS_POR_SESSAO):
+                produtos.cadastrar(PROD_SERV_DESCRICAO=f"Benchmark {numero}-{i}", PROD_SERV_VALOR=1.0)
+        sessoes = [threading.Thread(target=sessao, args=(n,)) for n in range(SESSOES_CONCORRENTES)]
+        for s in sessoes:
+            s.start()
+        for s in sessoes:
+            s.join()
+
+    importacoes = []
+
+    def iniciar_importacao():
+        # Reimportação de PAGTO (só duplicatas) gravando blocos enquanto os cadastros são medidos
+        for anterior in importacoes:
+            anterior.join()
+        importacoes[:] = [threading.Thread(target=importar_pagamentos)]
+        importacoes[0].start()
+
+    cadastros = SESSOES_CONCORRENTES * CADASTROS_POR_SESSAO
+    resultados.append(medir("edicao.cadastros_concorrentes", cadastrar_concorrentes, repeticoes, linhas=cadastros))
+    resultados.append(medir(
+        "edicao.cadastros_durante_importacao", cadastrar_concorrentes, repeticoes, linhas=cadastros,
+        preparar=iniciar_importacao,
+    ))
+    for importacao in importacoes:
+        importacao.join()
+
+    print("Inicialização")
+    resultados.extend(medir_inicializacao(repeticoes=repeticoes))
+    return resultados
+
+def comparar(atual, anterior, tolerancia):
+    """Imprime a variação de cada benchmark e retorna os nomes que pioraram além da tolerância."""
+    base = {r["nome"]: r for r in anterior["resultados"]}
+    regressoes = []
+    print(f"\nComparação com {anterior['meta'].get('codigo') or 'execução anterior'} ({anterior['meta']['data']}):")
+    for resultado in atual["resultados"]:
+        referencia = base.get(resultado["nome"])
+        if referencia is None:
+            continue
+        razao = resultado["mediana"] / referencia["mediana"] if referencia["mediana"] else float("inf")
+        marca = ""
+        if razao > 1 + tolerancia:
+            regressoes.append(resultado["nome"])
+            marca = "  <-- regressão"
+        print(f"  {resultado['nome']:<45} {referencia['mediana']:9.3f} s -> {resultado['mediana']:9.3f} s ({razao:5.2f}x){marca}")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de importação, relatório, edição e inicialização do SisPagto.")
+    parser.add_argument("--pagamentos", type=int, default=10_000, help="Linhas de PAGTO (de 10 mil a 10 milhões).")
+    parser.add_argument("--dados", help="Pasta com CSVs já gerados (padrão: benchmarks/dados/<pagamentos>).")
+    parser.add_argument("--banco", default=f"sqlite:///{os.path.join(PASTA, 'benchmark.db')}",
+                        help="URL do banco usado nos testes; é apagado e recriado.")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", default=os.path.join(PASTA, "resultados"))
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparação.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Piora relativa aceita antes de acusar regressão.")
+    args = parser.parse_args()
+
+    # Nunca usa o banco da aplicação nem a sua cópia colunar
+    os.environ["SISPAGTO_DATABASE_URL"] = args.banco
+    os.environ["SISPAGTO_PASTA_COLUNAR"] = os.path.join(PASTA, "colunar")
+    from benchmarks.gerar_dados import gerar
+
+    pasta_dados = args.dados or os.path.join(PASTA, "dados", str(args.pagamentos))
+    arquivos = {tabela: os.path.join(pasta_dados, f"{tabela}.csv") for tabela in TABELAS_CADASTRO + ['PAGTO']}
+    if not all(os.path.exists(caminho) for caminho in arquivos.values()):
+        print(f"Gerando {args.pagamentos} pagamentos em {pasta_dados}...")
+        arquivos = gerar(args.pagamentos, pasta_dados)
+
+    import pandas as pd
+    import sqlalchemy
+    atual = {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"), "codigo": _versao_codigo(),
+            "pagamentos": args.pagamentos, "repeticoes": args.repeticoes, "banco": sqlalchemy.engine.make_url(args.banco).get_backend_name(),
+            "python": platform.python_version(), "pandas": pd.__version__, "sqlalchemy": sqlalchemy.__version__,
+            "plataforma": platform.platform(),
+        },
+        "resultados": executar(arquivos, args.pagamentos, args.repeticoes),
+    }
+
+    os.makedirs(args.saida, exist_ok=True)
+    destino = os.path.join(args.saida, f"{datetime.now():%Y%m%d_%H%M%S}_{args.pagamentos}.json")
+    with open(destino, "w", encoding="utf-8") as arquivo:
+        json.dump(atual, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {destino}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(atual, json.load(arquivo), args.tolerancia)
+        if regressoes:
+            print(f"\n{len(regressoes)} benchmark(s) com regressão acima de {args.tolerancia:.0%}.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# benchmarks/gerar_dados.py
+"""
+Gerador de dados sintéticos para todas as tabelas do SisPagto.
+
+Produz um CSV por tabela no formato aceito pela página de Upload (`;` como
+separador, `,` como decimal e datas AAAA-MM-DD), com chaves estrangeiras
+coerentes: cada contrato pertence a um credor e tem sua lista de itens, parte
+dos contratos tem aditivos de prazo e valor, e cada pagamento está dentro da
+vigência do seu contrato, sem ultrapassar o saldo, com o documento (NF, recibo,
+fatura ou boleto) correspondente. As demais tabelas são dimensionadas a partir
+da quantidade de pagamentos.
+
+Uso:
+    python -m benchmarks.gerar_dados --pagamentos 100000 --destino benchmarks/dados
+"""
+import argparse
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+MESES = np.array(['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez'])
+TIPOS_DOCUMENTO = np.array(['NF', 'RECIBO', 'FATURA', 'BOLETO'])
+# Pagamentos gerados e gravados por vez, para manter a memória constante até 10M linhas
+LINHAS_POR_BLOCO = 500_000
+VALOR_MAXIMO_PAGAMENTO = 5_000.0
+
+@dataclass
+class Dimensoes:
+    pagamentos: int
+    credores: int
+    contratos: int
+    produtos: int
+
+    @classmethod
+    def para(cls, pagamentos):
+        return cls(
+            pagamentos=pagamentos,
+            credores=max(50, pagamentos // 1_000),
+            contratos=max(100, pagamentos // 200),
+            produtos=max(50, min(5_000, pagamentos // 2_000)),
+        )
+
+def _salvar(df, destino, table_name, primeiro_bloco=True):
+    caminho = os.path.join(destino, f"{table_name}.csv")
+    df.to_csv(
+        caminho, sep=';', decimal=',', index=False, float_format='%.2f',
+        mode='w' if primeiro_bloco else 'a', header=primeiro_bloco,
+    )
+    return caminho
+
+def _datas(dias):
+    return (np.datetime64('2018-01-01') + dias.astype('timedelta64[D]')).astype('datetime64[D]')
+
+def gerar(pagamentos, destino, semente=42):
+    """Gera os CSVs em `destino` e retorna {tabela: caminho}."""
+    rng = np.random.default_rng(semente)
+    dim = Dimensoes.para(pagamentos)
+    os.makedirs(destino, exist_ok=True)
+    arquivos = {}
+
+    # --- Cadastros ---
+    # Documentos de 14 dígitos sem zeros à esquerda, que o leitor de CSV descartaria
+    docs = (10**13 + np.arange(1, dim.credores + 1)).astype(str)
+    arquivos['CREDOR'] = _salvar(pd.DataFrame({
+        'CREDOR_DOC': docs, 'CREDOR_NOME': [f"Credor {i:06d}" for i in range(1, dim.credores + 1)],
+    }), destino, 'CREDOR')
+
+    precos = rng.uniform(5, 2_000, dim.produtos).round(2)
+    arquivos['PRODUTOS_SERVICOS'] = _salvar(pd.DataFrame({
+        'PROD_SERV_N': np.arange(1, dim.produtos + 1),
+        'PROD_SERV_DESCRICAO': [f"Produto/Serviço {i:05d}" for i in range(1, dim.produtos + 1)],
+        'PROD_SERV_VALOR': precos,
+    }), destino, 'PRODUTOS_SERVICOS')
+
+    # Lista de itens: uma por contrato, com 1 a 5 produtos distintos
+    itens_por_lista = rng.integers(1, 6, dim.contratos)
+    lista_n = np.repeat(np.arange(1, dim.contratos + 1), itens_por_lista)
+    produto = (rng.integers(0, dim.produtos, dim.contratos).repeat(itens_por_lista)
+               + np.concatenate([np.arange(k) for k in itens_por_lista])) % dim.produtos + 1
+    arquivos['LISTA_ITENS'] = _salvar(pd.DataFrame({
+        'LISTA_ITENS_N': lista_n, 'PROD_SERV_N': produto, 'LISTA_ITENS_QTD': rng.integers(1, 100, len(lista_n)),
+    }), destino, 'LISTA_ITENS')
+
+    # Contratos de 1 a 3 anos a partir de 2018-2022; metade recebe um aditivo que
+    # prorroga a vigência por mais um ano imediatamente após o término
+    inicio = rng.integers(0, 5 * 365, dim.contratos)
+    duracao = rng.integers(365, 3 * 365, dim.contratos)
+    com_aditivo = rng.random(dim.contratos) < 0.5
+    prorrogacao = np.where(com_aditivo, 365, 0)
+    pagamentos_por_contrato = np.bincount(np.arange(pagamentos) % dim.contratos, minlength=dim.contratos)
+    # Valor suficiente para todos os pagamentos; parte dele vem do aditivo
+    valor_necessario = pagamentos_por_contrato * VALOR_MAXIMO_PAGAMENTO * rng.uniform(1.1, 1.5, dim.contratos) + 1_000
+    valor_aditivo = np.where(com_aditivo, (valor_necessario * 0.25).round(2), 0.0)
+    contratos_n = np.array([f"CT-{i:07d}" for i in range(1, dim.contratos + 1)])
+    credor_do_contrato = docs[rng.integers(0, dim.credores, dim.contratos)]
+    arquivos['CONTRATO'] = _salvar(pd.DataFrame({
+        'CONTRATO_N': contratos_n, 'CREDOR_DOC': credor_do_contrato,
+        'CONTRATO_DATA_INI': _datas(inicio), 'CONTRATO_DATA_FIM': _datas(inicio + duracao - 1),
+        'CONTRATO_VALOR': (valor_necessario - valor_aditivo).round(2),
+        'LISTA_ITENS_N': np.arange(1, dim.contratos + 1),
+    }), destino, 'CONTRATO')
+
+    idx_aditivo = np.flatnonzero(com_aditivo)
+    arquivos['ADITIVOS'] = _salvar(pd.DataFrame({
+        'ADITIVO_N': 1, 'CONTRATO_N': contratos_n[idx_aditivo], 'ADITIVO_TIPO': 'Prazo e valor',
+        'ADITIVO_DATA_INI': _datas(inicio[idx_aditivo] + duracao[idx_aditivo]),
+        'ADITIVO_DATA_FIM': _datas(inicio[idx_aditivo] + duracao[idx_aditivo] + 364),
+        'ADITIVO_VALOR': valor_aditivo[idx_aditivo],
+    }), destino, 'ADITIVOS')
+
+    # --- Pagamentos e documentos, em blocos ---
+    vigencia_total = duracao + prorrogacao
+    for primeiro in range(0, pagamentos, LINHAS_POR_BLOCO):
+        ids = np.arange(primeiro + 1, min(primeiro + LINHAS_POR_BLOCO, pagamentos) + 1)
+        contrato = (ids - 1) % dim.contratos
+        dias = inicio[contrato] + (rng.random(len(ids)) * vigencia_total[contrato]).astype(int)
+        datas = _datas(dias)
+        valores = rng.uniform(10, VALOR_MAXIMO_PAGAMENTO, len(ids)).round(2)
+        tipo = TIPOS_DOCUMENTO[rng.integers(0, 4, len(ids))]
+        meses = datas.astype('datetime64[M]').astype(int)
+        periodo = np.char.add(np.char.add(MESES[meses % 12], '/'), (1970 + meses // 12).astype(str))
+        numero = ids.astype(str)
+
+        pagto = pd.DataFrame({
+            'PAGTO_ID': ids, 'PAGTO_DATA': datas, 'PAGTO_PERIODO': periodo, 'PAGTO_VALOR': valores,
+            'PAGTO_GRUPO': '', 'CREDOR_DOC': credor_do_contrato[contrato], 'CONTRATO_N': contratos_n[contrato],
+            'PROD_SERV_N': rng.integers(1, dim.produtos + 1, len(ids)), 'PROD_SERV_QTD': rng.integers(1, 20, len(ids)),
+        })
+        for tipo_doc in TIPOS_DOCUMENTO:
+            pagto[f'{tipo_doc}_N'] = np.where(tipo == tipo_doc, numero, '')
+        arquivos['PAGTO'] = _salvar(pagto, destino, 'PAGTO', primeiro == 0)
+
+        documentos = {
+            'NF': {'NF_N': numero, 'NF_DATA': datas, 'NF_VALOR': valores},
+            'RECIBO': {'RECIBO_N': ids, 'RECIBO_DATA': datas, 'RECIBO_VALOR': valores},
+            'FATURA': {'FATURA_N': ids, 'FATURA_DATA': datas, 'FATURA_VALOR': valores},
+            'BOLETO': {'BOLETO_N': ids, 'BOLETO_DATA_VENC': datas, 'BOLETO_VALOR': valores},
+        }
+        for tipo_doc, colunas in documentos.items():
+            mascara = tipo == tipo_doc
+            df = pd.DataFrame({col: valores_col[mascara] for col, valores_col in colunas.items()})
+            arquivos[tipo_doc] = _salvar(df, destino, tipo_doc, primeiro == 0)
+    return arquivos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera CSVs sintéticos para todas as tabelas do SisPagto.")
+    parser.add_argument("--pagamentos", type=int, default=10_000, help="Linhas de PAGTO (de 10 mil a 10 milhões).")
+    parser.add_argument("--destino", default=os.path.join("benchmarks", "dados"))
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    for tabela, caminho in gerar(args.pagamentos, args.destino, args.semente).items():
+        print(f"{tabela}: {caminho}")
@@ -0,0 +1,84 @@
+# benchmarks/inicializacao.py
+"""
+Tempo até a primeira renderização de cada página após reiniciar a aplicação.
+
+Cada medição roda em um processo Python novo, como um servidor recém-iniciado:
+o Streamlit já está carregado (isso acontece antes de o servidor aceitar
+conexões), mas nenhum módulo de src/ foi importado, o engine não existe e o
+banco ainda não foi inicializado. A página é executada pelo AppTest duas vezes:
+- primeira_execucao: importações das páginas e de src/, criação do engine,
+  inicialização do banco e caches vazios;
+- reexecucao: a mesma página de novo, como a cada interação do usuário.
+
+Usado pela suíte (benchmarks/executar.py) com o banco de benchmark; pode ser
+executado isoladamente contra o banco configurado em SISPAGTO_DATABASE_URL:
+    python -m benchmarks.inicializacao
+    python -m benchmarks.inicializacao --pagina pages/relatorios.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGINAS = ["home.py", "pages/relatorios.py", "pages/cadastros.py", "pages/upload.py"]
+ETAPAS = ("primeira_execucao", "reexecucao")
+TEMPO_LIMITE = 300
+
+def _executar_pagina(pagina):
+    """Executa a página duas vezes no processo atual e imprime os tempos em JSON."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(RAIZ, pagina), default_timeout=TEMPO_LIMITE)
+    tempos = {}
+    for etapa in ETAPAS:
+        inicio = time.perf_counter()
+        app.run()
+        tempos[etapa] = time.perf_counter() - inicio
+    tempos["erros"] = [str(e.value) for e in app.exception]
+    print(json.dumps(tempos))
+
+def medir_inicializacao(paginas=PAGINAS, repeticoes=3):
+    """
+    Mede cada página em `repeticoes` processos novos e retorna os resultados no
+    formato de `medir` (benchmarks/executar.py), um por página e etapa.
+    """
+    resultados = []
+    for pagina in paginas:
+        tempos = {etapa: [] for etapa in ETAPAS}
+        for _ in range(repeticoes):
+            saida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.inicializacao", "--processo", pagina],
+                capture_output=True, text=True, cwd=RAIZ, check=True,
+            ).stdout
+            medicao = json.loads(saida.strip().splitlines()[-1])
+            if medicao["erros"]:
+                print(f"  aviso: {pagina} terminou com erro: {medicao['erros'][0]}")
+            for etapa in ETAPAS:
+                tempos[etapa].append(medicao[etapa])
+        nome_pagina = os.path.splitext(os.path.basename(pagina))[0]
+        for etapa in ETAPAS:
+            resultado = {
+                "nome": f"inicializacao.{nome_pagina}_{etapa}", "segundos": tempos[etapa],
+                "mediana": statistics.median(tempos[etapa]), "minimo": min(tempos[etapa]), "maximo": max(tempos[etapa]),
+            }
+            print(f"  {resultado['nome']:<45} {resultado['mediana']:9.3f} s")
+            resultados.append(resultado)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo até a primeira renderização das páginas do SisPagto.")
+    parser.add_argument("--pagina", action="append", help="Página a medir (padrão: todas). Pode ser repetido.")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--processo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.processo:
+        _executar_pagina(args.processo)
+        return
+    medir_inicializacao(args.pagina or PAGINAS, args.repeticoes)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,9 @@
 import streamlit as st
-import os
-from src.database import inicializar_banco
+from src.inicializacao import inicializar_processo
 
-# Garante que o diretório de dados exista
-if not os.path.exists('data'):
-    os.makedirs('data')
-
-# Inicializa o banco de dados na primeira execução
-inicializar_banco()
+# Ativa o copy-on-write do pandas, cria o banco (e o diretório de dados) e aplica
+# as migrações uma vez por processo; nas execuções seguintes da página não há acesso ao banco
+inicializar_processo()
 
 st.set_page_config(
     page_title="SisPagto - Início",
@@ -15,8 +11,8 @@ st.set_page_config(
     layout="wide"
 )
 col1, col2 = st.columns(2)
-col1.image("imagens\prefeitura-rec.jpeg")
-col2.image("imagens\emprel.jpeg")
+col1.image("imagens/prefeitura-rec.jpeg")
+col2.image("imagens/emprel.jpeg")
 
 st.title("SISTEMA DE CONTROLE DE PAGAMENTOS")
 st.markdown("---")
@@ -31,6 +27,7 @@ st.write(
     - **⬆️ Upload de Tabelas:** Se for o primeiro uso, comece por aqui para carregar os dados iniciais dos arquivos CSV. Os dados serão salvos e não será necessário carregar os arquivos novamente.
     - **✔️ Cadastros:** Insira novos pagamentos, contratos, credores e produtos diretamente no banco de dados.
     - **📊 Relatórios:** Visualize, filtre e edite a planilha de pagamentos com os dados sempre atualizados do banco de dados.
+    - **🩺 Diagnóstico:** Acompanhe o tempo das consultas SQL, a latência de cada página e o aproveitamento dos caches.
     """
 )
 
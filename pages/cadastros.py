@@ -1,11 +1,15 @@
 import streamlit as st
 import pandas as pd
-from datetime import date
-from src.database import get_session, engine, Credor, Contrato, ProdutoServico, Pagamento
-from sqlalchemy import update
+from src.inicializacao import inicializar_processo
+from src.versoes import versoes
+from src import busca, diagnostico, repositorios
+from src.repositorios import ErroValidacao
 
 # Configuração da página
 st.set_page_config(layout="wide", page_title="Cadastros")
+diagnostico.iniciar_pagina("Cadastros")
+# Copy-on-write do pandas e esquema do banco, na primeira execução do processo, mesmo sem passar pela Home
+inicializar_processo()
 
 # Título e informações
 st.header("Módulo de Cadastros e Edições")
@@ -14,28 +18,163 @@ st.info(
     "Lembre-se de salvar as alterações."
 )
 
-@st.cache_data(ttl=30)
+# Linhas exibidas no editor de produtos/serviços ao buscar pela descrição
+LIMITE_BUSCA_EDITOR = 500
+# Opções de linhas por página dos editores no modo paginado
+TAMANHOS_PAGINA = [50, 100, 500]
+
+# Cada tabela é mantida em cache pela sua versão de dados (ver src/versoes.py):
+# uma gravação invalida apenas a tabela alterada. O resultado é compartilhado entre as sessões.
+@diagnostico.cache_monitorado("cadastros.carregar_tabela", compartilhado=True, max_entries=16)
+def carregar_tabela(table_name, versao, ordem=None):
+    """Carrega uma tabela de cadastro completa, indexada pela chave primária."""
+    return repositorios.carregar_tabela(table_name, ordem)
+
+# Modo paginado: apenas a janela exibida é lida, por paginação keyset (src/repositorios.py).
+# O cursor faz parte da chave: a mesma página é compartilhada entre as sessões até a próxima gravação.
+@diagnostico.cache_monitorado("cadastros.carregar_pagina", compartilhado=True, max_entries=64)
+def carregar_pagina(table_name, versao, ordem, apos, tamanho, termo):
+    """Janela da tabela a partir do cursor `apos`; retorna (DataFrame, cursor da próxima página)."""
+    return repositorios.carregar_pagina(table_name, ordem, apos, tamanho, termo)
+
+@diagnostico.cache_monitorado("cadastros.contar_registros", compartilhado=True, max_entries=64)
+def contar_registros(table_name, versao, termo):
+    """Quantidade de registros da tabela (ou encontrados pela busca)."""
+    return repositorios.contar_registros(table_name, termo)
+
 def carregar_dados_bd():
     """Carrega todos os dados necessários das tabelas do banco de dados."""
+    v = versoes('CREDOR', 'CONTRATO', 'PRODUTOS_SERVICOS')
     data = {}
-    with get_session() as session:
-        data['credores'] = pd.read_sql("SELECT * FROM CREDOR ORDER BY CREDOR_NOME", engine, index_col='CREDOR_DOC')
-        data['contratos'] = pd.read_sql("SELECT * FROM CONTRATO", engine, index_col='CONTRATO_N')
-        data['produtos_servicos'] = pd.read_sql("SELECT * FROM PRODUTOS_SERVICOS ORDER BY PROD_SERV_DESCRICAO", engine, index_col='PROD_SERV_N')
+    data['credores'] = carregar_tabela('CREDOR', v['CREDOR'], ordem='CREDOR_NOME')
+    data['contratos'] = carregar_tabela('CONTRATO', v['CONTRATO'])
+    data['produtos_servicos'] = carregar_tabela('PRODUTOS_SERVICOS', v['PRODUTOS_SERVICOS'], ordem='PROD_SERV_DESCRICAO')
     return data
 
+def seletor_credor(chave, rotulo="Credor (obrigatório)"):
+    """
+    Seletor de credor com busca: apenas as melhores correspondências ao texto digitado
+    (src/busca.py) são enviadas ao navegador. Retorna (CREDOR_DOC, CREDOR_NOME) ou (None, None).
+    """
+    termo = st.text_input("Buscar credor", key=f"{chave}_busca", placeholder="Início do nome ou CPF/CNPJ")
+    sugestoes = busca.buscar_credores(termo)
+    doc = st.selectbox(
+        rotulo, options=list(sugestoes), format_func=lambda d: f"{sugestoes[d]} ({d})",
+        index=None, key=chave, placeholder="Selecione o credor",
+    )
+    return doc, sugestoes.get(doc)
+
+def limpar_edicoes(chave_editor):
+    """Descarta as edições pendentes de um data_editor cujas linhas exibidas vão mudar."""
+    st.session_state.pop(chave_editor, None)
+
+def edicoes_pendentes(chave_editor):
+    return bool(st.session_state.get(chave_editor, {}).get('edited_rows'))
+
+def linhas_do_editor(chave_editor, df):
+    """
+    Linhas a exibir no data_editor. O data_editor guarda as edições pela posição
+    da linha: enquanto houver edições pendentes, as linhas exibidas ficam fixas
+    (uma gravação de outra sessão mudaria a página e as posições), e
+    `salvar_edicoes` converte cada posição na chave primária da linha editada.
+    """
+    fixadas = st.session_state.get(f"{chave_editor}_linhas")
+    if fixadas is not None and edicoes_pendentes(chave_editor):
+        return fixadas
+    st.session_state[f"{chave_editor}_linhas"] = df
+    return df
+
+def salvar_edicoes(chave_editor, repositorio, rotulo):
+    """Botão que grava as edições pendentes do data_editor, pela chave primária de cada linha."""
+    if not edicoes_pendentes(chave_editor):
+        return
+    if st.button(f"Salvar Alterações nos {rotulo.capitalize()}", type="primary", key=f"{chave_editor}_salvar"):
+        try:
+            chaves = st.session_state[f"{chave_editor}_linhas"].index
+            alteracoes = {chaves[posicao]: mudancas for posicao, mudancas in st.session_state[chave_editor]['edited_rows'].items()}
+            repositorio.atualizar(alteracoes)
+            st.success(f"Alterações nos {rotulo} salvas com sucesso!")
+            del st.session_state[chave_editor]
+            st.rerun()
+        except Exception as e:
+            st.error(f"Erro ao salvar alterações nos {rotulo}: {e}")
+
+def reiniciar_paginacao(chave_editor):
+    """Volta à primeira página (nova busca ou novo tamanho de página)."""
+    st.session_state[f"{chave_editor}_cursores"] = [None]
+    limpar_edicoes(chave_editor)
+
+def avancar_pagina(chave_editor, cursor):
+    st.session_state[f"{chave_editor}_cursores"].append(cursor)
+
+def voltar_pagina(chave_editor):
+    st.session_state[f"{chave_editor}_cursores"].pop()
+
+def janela_paginada(table_name, chave_editor, ordem=None, placeholder=None):
+    """
+    Busca e navegação do editor no modo paginado. Os cursores das páginas já
+    visitadas ficam em session_state (a página N começa após a última linha da
+    N-1); retorna apenas a janela da página atual, lida do banco.
+    """
+    cursores = st.session_state.setdefault(f"{chave_editor}_cursores", [None])
+    col_busca, col_tamanho = st.columns([3, 1])
+    termo = col_busca.text_input(
+        "Buscar", key=f"{chave_editor}_busca", placeholder=placeholder,
+        on_change=reiniciar_paginacao, args=(chave_editor,),
+    )
+    tamanho = col_tamanho.selectbox(
+        "Linhas por página", TAMANHOS_PAGINA, index=1, key=f"{chave_editor}_tamanho",
+        on_change=reiniciar_paginacao, args=(chave_editor,),
+    )
+    versao = versoes(table_name)[table_name]
+    df, proximo = carregar_pagina(table_name, versao, ordem, cursores[-1], tamanho, termo)
+    total = contar_registros(table_name, versao, termo)
+
+    # Trocar de página descartaria as edições: é preciso salvá-las antes
+    pendentes = edicoes_pendentes(chave_editor)
+    col_anterior, col_info, col_proxima = st.columns([1, 4, 1], vertical_alignment="center")
+    col_anterior.button(
+        "◀ Anterior", key=f"{chave_editor}_anterior", disabled=len(cursores) == 1 or pendentes,
+        on_click=voltar_pagina, args=(chave_editor,),
+    )
+    col_proxima.button(
+        "Próxima ▶", key=f"{chave_editor}_proxima", disabled=proximo is None or pendentes,
+        on_click=avancar_pagina, args=(chave_editor, proximo),
+    )
+    col_info.caption(f"Página {len(cursores)} de {max(1, -(-total // tamanho))} · {total} registros")
+    return df
+
+def formatar_datas_contratos(df):
+    """Contratos a exibir, com as datas como DD/MM/AAAA (novo DataFrame: o carregado é compartilhado)."""
+    return df.drop('LISTA_ITENS_N', axis=1).assign(
+        CONTRATO_DATA_INI=pd.to_datetime(df['CONTRATO_DATA_INI'], errors='coerce').dt.strftime('%d/%m/%Y'),
+        CONTRATO_DATA_FIM=pd.to_datetime(df['CONTRATO_DATA_FIM'], errors='coerce').dt.strftime('%d/%m/%Y'),
+    )
+
+modo_paginado = st.sidebar.toggle(
+    "Edição paginada no servidor",
+    help="Carrega do banco de dados apenas a página exibida em cada tabela de edição, com busca no servidor. Recomendado para bases grandes."
+)
+
 # Carregamento inicial dos dados
-try:
-    db_data = carregar_dados_bd()
-    credores_df = db_data['credores']
-    contratos_df = db_data['contratos']
-    produtos_servicos_df = db_data['produtos_servicos']
-except Exception as e:
-    st.error(f"Falha ao carregar dados do banco de dados: {e}")
-    st.warning("Verifique se o banco de dados foi inicializado e se a página de Upload foi utilizada.")
-    credores_df, contratos_df, produtos_servicos_df = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+diagnostico.marcar("carregar")
+if modo_paginado:
+    # Nenhuma tabela é carregada inteira: cada editor lê a sua página
+    existem_credores = bool(busca.buscar_credores('', limite=1))
+else:
+    try:
+        db_data = carregar_dados_bd()
+        credores_df = db_data['credores']
+        contratos_df = db_data['contratos']
+        produtos_servicos_df = db_data['produtos_servicos']
+    except Exception as e:
+        st.error(f"Falha ao carregar dados do banco de dados: {e}")
+        st.warning("Verifique se o banco de dados foi inicializado e se a página de Upload foi utilizada.")
+        credores_df, contratos_df, produtos_servicos_df = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    existem_credores = not credores_df.empty
 
 # Definição das abas de navegação
+diagnostico.marcar("renderizar")
 tab_pagto, tab_contrato, tab_credor, tab_produto = st.tabs([
     "➕ Pagamentos", "📄 Contratos", "👥 Credores", "📦 Produtos/Serviços"
 ])
@@ -44,51 +183,54 @@ tab_pagto, tab_contrato, tab_credor, tab_produto = st.tabs([
 # --- Aba de Pagamentos ---
 with tab_pagto:
     st.subheader("Cadastro de Novos Pagamentos")
+    # A busca fica fora do formulário: cada texto digitado atualiza as sugestões
+    if existem_credores:
+        credor_doc_selecionado, credor_nome_selecionado = seletor_credor("credor_pagamento")
+    else:
+        credor_doc_selecionado, credor_nome_selecionado = None, None
+        st.warning("Nenhum credor cadastrado. Cadastre um credor na aba 'Credores' primeiro.")
+
     with st.form("form_pagamento", clear_on_submit=True):
         data_pag = st.date_input("Data do pagamento (obrigatório)", format="DD/MM/YYYY", value=None)
         periodo = st.text_input("Período do pagamento (ex: jul/2025)", placeholder="jul/2025")
         valor = st.number_input("Valor do pagamento (obrigatório)", min_value=0.01, format="%.2f")
-        
-        if not credores_df.empty:
-            map_credor_nome_doc = pd.Series(credores_df.index, index=credores_df['CREDOR_NOME']).to_dict()
-            credor_nome_selecionado = st.selectbox("Credor (obrigatório)", options=list(map_credor_nome_doc.keys()), index=None, placeholder="Selecione o credor")
-        else:
-            credor_nome_selecionado = None
-            st.warning("Nenhum credor cadastrado. Cadastre um credor na aba 'Credores' primeiro.")
 
         tipo_pagamento = st.selectbox("Tipo de pagamento", ["Nota Fiscal", "Recibo", "Fatura", "Boleto", "Outro"], index=None, placeholder="Selecione o tipo")
+        if modo_paginado:
+            # Apenas os contratos do credor escolhido, lidos do banco
+            opcoes_contrato = repositorios.contratos_do_credor(credor_doc_selecionado) if credor_doc_selecionado else []
+        else:
+            opcoes_contrato = list(contratos_df.index)
+        contrato_pagamento = st.selectbox("Contrato", options=opcoes_contrato, index=None, placeholder="Sem contrato vinculado")
         
         submitted = st.form_submit_button("Cadastrar Pagamento")
         if submitted:
-            if not all([data_pag, valor, credor_nome_selecionado]):
+            if not all([data_pag, valor, credor_doc_selecionado]):
                 st.error("Preencha todos os campos obrigatórios!")
             else:
                 try:
-                    novo_pagamento = Pagamento(
+                    repositorios.pagamentos.cadastrar(
                         PAGTO_DATA=data_pag, PAGTO_PERIODO=periodo, PAGTO_VALOR=valor,
-                        CREDOR_DOC=map_credor_nome_doc[credor_nome_selecionado], PAGTO_TIPO=tipo_pagamento
+                        CREDOR_DOC=credor_doc_selecionado, PAGTO_TIPO=tipo_pagamento,
+                        CONTRATO_N=contrato_pagamento
                     )
-                    with get_session() as session:
-                        session.add(novo_pagamento)
-                        session.commit()
                     st.success(f"Pagamento para {credor_nome_selecionado} registrado com sucesso!")
-                    st.cache_data.clear()
                     st.rerun()
+                except ErroValidacao as e:
+                    st.error(str(e))
                 except Exception as e:
                     st.error(f"Erro ao cadastrar pagamento: {e}")
 
-# --- Aba de Contratos ---
 # --- Aba de Contratos ---
 with tab_contrato:
     st.subheader("Adicionar Novo Contrato")
+    if existem_credores:
+        credor_doc_selecionado_contrato, _ = seletor_credor("credor_contrato")
+    else:
+        credor_doc_selecionado_contrato = None
+
     with st.form("form_contrato", clear_on_submit=True):
         numero_contrato = st.text_input("Número do Contrato (obrigatório)")
-        
-        if not credores_df.empty:
-            map_credor_nome_doc = pd.Series(credores_df.index, index=credores_df['CREDOR_NOME']).to_dict()
-            credor_nome_selecionado_contrato = st.selectbox("Credor (obrigatório)", options=list(map_credor_nome_doc.keys()), index=None, key="credor_contrato", placeholder="Escolha o Credor")
-        else:
-            credor_nome_selecionado_contrato = None
 
         col1, col2 = st.columns(2)
         data_inicio = col1.date_input("Data de Início", format="DD/MM/YYYY", value=None)
@@ -96,53 +238,34 @@ with tab_contrato:
         valor_global = st.number_input("Valor Global do Contrato", min_value=0.0, format="%.2f")
 
         if st.form_submit_button("Cadastrar Contrato"):
-            if not all([numero_contrato, credor_nome_selecionado_contrato, data_inicio, data_fim, valor_global > 0]):
+            if not all([numero_contrato, credor_doc_selecionado_contrato, data_inicio, data_fim, valor_global > 0]):
                 st.error("Por favor, preencha todos os campos obrigatórios.")
             else:
                 try:
-                    novo_contrato = Contrato(
-                        CONTRATO_N=numero_contrato, CREDOR_DOC=map_credor_nome_doc[credor_nome_selecionado_contrato],
+                    repositorios.contratos.cadastrar(
+                        CONTRATO_N=numero_contrato, CREDOR_DOC=credor_doc_selecionado_contrato,
                         CONTRATO_DATA_INI=data_inicio, CONTRATO_DATA_FIM=data_fim, CONTRATO_VALOR=valor_global
                     )
-                    with get_session() as session:
-                        session.add(novo_contrato)
-                        session.commit()
                     st.success(f"Contrato {numero_contrato} cadastrado com sucesso!")
-                    st.cache_data.clear(); st.rerun()
+                    st.rerun()
+                except ErroValidacao as e:
+                    st.error(str(e))
                 except Exception as e:
                     st.error(f"Erro ao cadastrar contrato: {e}")
     
     st.divider()
     st.subheader("Editar Contratos Existentes")
 
-    # --- CÓDIGO CORRIGIDO ---
-    contratos_para_exibir = contratos_df.copy()
-    
-    # Formatação das datas
-    contratos_para_exibir['CONTRATO_DATA_INI'] = pd.to_datetime(contratos_para_exibir['CONTRATO_DATA_INI'], errors='coerce').dt.strftime('%d/%m/%Y')
-    contratos_para_exibir['CONTRATO_DATA_FIM'] = pd.to_datetime(contratos_para_exibir['CONTRATO_DATA_FIM'], errors='coerce').dt.strftime('%d/%m/%Y')
-
-    # CORREÇÃO: Formata a coluna LISTA_ITENS_N para exibir nulos como células vazias
-    # Converte para float (para ter NaN), preenche NaN com '', e converte para string tirando o '.0'
-    contratos_para_exibir = contratos_para_exibir.drop('LISTA_ITENS_N', axis=1)
-    st.data_editor(contratos_para_exibir, use_container_width=True, key="editor_contratos")
-    
-    if st.session_state.get('editor_contratos', {}).get('edited_rows'):
-        if st.button("Salvar Alterações nos Contratos", type="primary"):
-            try:
-                with get_session() as session:
-                    for doc_index, changes in st.session_state.editor_contratos['edited_rows'].items():
-                        contrato_n_real = contratos_df.index[doc_index]
-
-                        stmt = update(Contrato).where(Contrato.CONTRATO_N == contrato_n_real).values(**changes)
-                        session.execute(stmt)
-                    session.commit()
-                st.success("Alterações nos contratos salvas com sucesso!")
-                del st.session_state.editor_contratos
-                st.cache_data.clear()
-                st.rerun()
-            except Exception as e:
-                st.error(f"Erro ao salvar alterações nos contratos: {e}")
+    if modo_paginado:
+        contratos_exibidos = janela_paginada('CONTRATO', "editor_contratos", placeholder="Número do contrato ou CPF/CNPJ do credor")
+    else:
+        contratos_exibidos = contratos_df
+    # Datas formatadas apenas nas linhas exibidas
+    st.data_editor(
+        linhas_do_editor("editor_contratos", formatar_datas_contratos(contratos_exibidos)),
+        use_container_width=True, key="editor_contratos",
+    )
+    salvar_edicoes("editor_contratos", repositorios.contratos, "contratos")
 
 
 # --- Aba de Credores ---
@@ -157,34 +280,21 @@ with tab_credor:
                 st.error("Ambos os campos são obrigatórios.")
             else:
                 try:
-                    novo_credor = Credor(CREDOR_DOC=credor_doc.strip(), CREDOR_NOME=credor_nome.strip())
-                    with get_session() as session:
-                        session.add(novo_credor)
-                        session.commit()
+                    repositorios.credores.cadastrar(CREDOR_DOC=credor_doc.strip(), CREDOR_NOME=credor_nome.strip())
                     st.success(f"Credor '{credor_nome}' cadastrado com sucesso!")
-                    st.cache_data.clear(); st.rerun()
+                    st.rerun()
                 except Exception as e:
                     st.error(f"Erro ao cadastrar credor: {e}")
     
     st.divider()
     st.subheader("Editar Credores Existentes")
+    if modo_paginado:
+        credores_exibidos = janela_paginada('CREDOR', "editor_credores", ordem='CREDOR_NOME', placeholder="Início do nome ou CPF/CNPJ")
+    else:
+        credores_exibidos = credores_df
     # Esta linha está OK, pois as colunas de credor são strings.
-    st.data_editor(credores_df.fillna('-'), use_container_width=True, key="editor_credores")
-    if st.session_state.get('editor_credores', {}).get('edited_rows'):
-        if st.button("Salvar Alterações nos Credores", type="primary"):
-            try:
-                with get_session() as session:
-                    for doc_index, changes in st.session_state.editor_credores['edited_rows'].items():
-                        credor_doc_real = credores_df.index[doc_index]
-                        stmt = update(Credor).where(Credor.CREDOR_DOC == credor_doc_real).values(**changes)
-                        session.execute(stmt)
-                    session.commit()
-                st.success("Alterações nos credores salvas com sucesso!")
-                del st.session_state.editor_credores
-                st.cache_data.clear()
-                st.rerun()
-            except Exception as e:
-                st.error(f"Erro ao salvar alterações nos credores: {e}")
+    st.data_editor(linhas_do_editor("editor_credores", credores_exibidos.fillna('-')), use_container_width=True, key="editor_credores")
+    salvar_edicoes("editor_credores", repositorios.credores, "credores")
 
 # --- Aba de Produtos/Serviços ---
 with tab_produto:
@@ -198,32 +308,32 @@ with tab_produto:
                 st.error("Ambos os campos são obrigatórios.")
             else:
                 try:
-                    novo_produto = ProdutoServico(PROD_SERV_DESCRICAO=prod_desc.strip(), PROD_SERV_VALOR=prod_valor)
-                    with get_session() as session:
-                        session.add(novo_produto)
-                        session.commit()
+                    repositorios.produtos.cadastrar(PROD_SERV_DESCRICAO=prod_desc.strip(), PROD_SERV_VALOR=prod_valor)
                     st.success(f"Produto '{prod_desc}' cadastrado com sucesso!")
-                    st.cache_data.clear(); st.rerun()
+                    st.rerun()
                 except Exception as e:
                     st.error(f"Erro ao cadastrar produto: {e}")
 
     st.divider()
     st.subheader("Editar Produtos e Serviços Existentes")
+    if modo_paginado:
+        produtos_exibidos = janela_paginada(
+            'PRODUTOS_SERVICOS', "editor_produtos", ordem='PROD_SERV_DESCRICAO', placeholder="Início das palavras da descrição",
+        )
+    else:
+        termo_produto = st.text_input(
+            "Buscar produto/serviço", key="busca_produtos", placeholder="Início das palavras da descrição",
+            on_change=limpar_edicoes, args=("editor_produtos",),
+        )
+        if termo_produto:
+            encontrados = busca.buscar_produtos(termo_produto, limite=LIMITE_BUSCA_EDITOR)
+            produtos_exibidos = produtos_servicos_df.loc[produtos_servicos_df.index.intersection(list(encontrados), sort=False)]
+            st.caption(f"{len(produtos_exibidos)} produtos/serviços encontrados (no máximo {LIMITE_BUSCA_EDITOR}).")
+        else:
+            produtos_exibidos = produtos_servicos_df
     # --- CÓDIGO CORRIGIDO PARA ERRO ArrowInvalid ---
     # Remove o .fillna('-') que causa o erro em colunas numéricas
-    st.data_editor(produtos_servicos_df, use_container_width=True, key="editor_produtos")
-    if st.session_state.get('editor_produtos', {}).get('edited_rows'):
-        if st.button("Salvar Alterações nos Produtos", type="primary"):
-            try:
-                with get_session() as session:
-                    for prod_index, changes in st.session_state.editor_produtos['edited_rows'].items():
-                        prod_serv_n_real = produtos_servicos_df.index[prod_index]
-                        stmt = update(ProdutoServico).where(ProdutoServico.PROD_SERV_N == prod_serv_n_real).values(**changes)
-                        session.execute(stmt)
-                    session.commit()
-                st.success("Alterações nos produtos salvas com sucesso!")
-                del st.session_state.editor_produtos
-                st.cache_data.clear()
-                st.rerun()
-            except Exception as e:
-                st.error(f"Erro ao salvar alterações nos produtos: {e}")
\ No newline at end of file
+    st.data_editor(linhas_do_editor("editor_produtos", produtos_exibidos), use_container_width=True, key="editor_produtos")
+    salvar_edicoes("editor_produtos", repositorios.produtos, "produtos")
+
+diagnostico.finalizar_pagina()
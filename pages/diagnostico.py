@@ -0,0 +1,89 @@
+import streamlit as st
+import pandas as pd
+from src import diagnostico, fila_escrita
+
+st.set_page_config(layout="wide", page_title="Diagnóstico")
+
+st.header("Diagnóstico de Desempenho")
+st.info(
+    "Medições recentes deste servidor, de todas as sessões: tempo de cada consulta SQL, duração das "
+    "execuções de cada página por etapa, aproveitamento dos caches e gravações da fila de escrita. Os dados são mantidos em memória "
+    "e reiniciados junto com a aplicação."
+)
+
+consultas, execucoes, etapas, caches = diagnostico.instantaneo()
+
+col_atualizar, col_limpar = st.columns(2)
+if col_atualizar.button("🔄 Atualizar", use_container_width=True):
+    st.rerun()
+if col_limpar.button("🗑️ Limpar medições", use_container_width=True):
+    diagnostico.limpar()
+    st.rerun()
+
+# --- Execuções das páginas ---
+st.subheader("Latência das páginas")
+if execucoes:
+    df_execucoes = pd.DataFrame(execucoes, columns=["Momento", "Página", "Segundos"])
+    latencia = df_execucoes.groupby("Página")["Segundos"].describe(percentiles=[0.5, 0.9, 0.99])
+    latencia = latencia[["count", "50%", "90%", "99%", "max"]].rename(columns={
+        "count": "Execuções", "50%": "p50 (s)", "90%": "p90 (s)", "99%": "p99 (s)", "max": "Máximo (s)",
+    })
+    st.dataframe(latencia.style.format({"Execuções": "{:.0f}"}, precision=3), use_container_width=True)
+else:
+    st.caption("Nenhuma execução de página registrada ainda. Navegue pelas páginas e volte aqui.")
+
+if etapas:
+    st.markdown("**Tempo por etapa**")
+    df_etapas = pd.DataFrame(etapas, columns=["Momento", "Página", "Etapa", "Segundos"])
+    por_etapa = (
+        df_etapas.groupby(["Página", "Etapa"])["Segundos"]
+        .agg(Execuções="count", Mediana="median", p90=lambda s: s.quantile(0.9), Máximo="max")
+    )
+    st.dataframe(por_etapa.style.format({"Execuções": "{:.0f}"}, precision=3), use_container_width=True)
+
+# --- Consultas SQL ---
+st.subheader("Consultas SQL mais lentas")
+if consultas:
+    df_consultas = pd.DataFrame(consultas, columns=["Momento", "Página", "Segundos", "Linhas", "SQL"])
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Consultas registradas", len(df_consultas))
+    col2.metric("Tempo total em SQL", f"{df_consultas['Segundos'].sum():.2f} s")
+    col3.metric("Mediana por consulta", f"{df_consultas['Segundos'].median() * 1000:.1f} ms")
+    st.dataframe(
+        df_consultas.nlargest(20, "Segundos").style.format({"Segundos": "{:.4f}", "Linhas": "{:.0f}"}, na_rep="-"),
+        use_container_width=True, hide_index=True,
+    )
+    st.caption("Linhas afetadas pelo comando, quando informadas pelo driver (no SQLite, apenas INSERT, UPDATE e DELETE).")
+else:
+    st.caption("Nenhuma consulta registrada.")
+
+# --- Caches ---
+st.subheader("Aproveitamento dos caches")
+if caches:
+    df_caches = pd.DataFrame(
+        [(nome, chamadas, faltas) for nome, (chamadas, faltas) in caches.items()],
+        columns=["Cache", "Chamadas", "Faltas"],
+    )
+    df_caches["Taxa de acerto"] = 1 - df_caches["Faltas"] / df_caches["Chamadas"].where(df_caches["Chamadas"] > 0)
+    st.dataframe(
+        df_caches.style.format({"Taxa de acerto": "{:.1%}"}, na_rep="-"),
+        use_container_width=True, hide_index=True,
+    )
+else:
+    st.caption("Nenhum acesso aos caches registrado.")
+
+# --- Fila de escrita ---
+st.subheader("Fila de escrita")
+fila = fila_escrita.fila.estatisticas()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Gravações", fila['gravacoes'])
+col2.metric(
+    "Gravações por transação",
+    f"{fila['gravacoes'] / fila['transacoes']:.1f}" if fila['transacoes'] else "-",
+)
+col3.metric("Repetições (banco bloqueado)", fila['repeticoes'])
+col4.metric("Gravações com erro", fila['erros'])
+st.caption(
+    "Todas as gravações deste servidor passam por uma única fila; as que chegam juntas são confirmadas "
+    f"na mesma transação. Aguardando agora: {fila['pendentes']}."
+)
@@ -1,49 +1,107 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
 from datetime import datetime
-from src.database import engine, get_session, Pagamento
-from sqlalchemy import update
+from src.consultas import (
+    DIMENSOES_FILTRO, FiltrosPagamento, carregar_pagina_pagamentos,
+    totais_pagamentos, intervalo_datas, opcoes_filtro, resumo_pagamentos,
+)
+from src.inicializacao import inicializar_processo
+from src.versoes import versoes
+from src.exportacao import FORMATOS, exportar_pagamentos
+from src.facetas import IndiceFacetas
+from src import diagnostico, relatorio_colunar, repositorios
+from src.tipagem import DINHEIRO_RELATORIO, para_exibicao
 
 # Configuração da página
 st.set_page_config(layout="wide", page_title="Relatórios")
+diagnostico.iniciar_pagina("Relatórios")
+# Copy-on-write do pandas e esquema do banco, na primeira execução do processo, mesmo sem passar pela Home
+inicializar_processo()
 
 # Título
 st.header("Relatórios Gerais do Sistema")
 
+# Colunas do relatório de pagamentos que podem ser editadas -> coluna de PAGTO
+COLUNAS_EDITAVEIS = {
+    'Data': 'PAGTO_DATA', 'Período': 'PAGTO_PERIODO', 'Tipo de pagamento': 'PAGTO_TIPO',
+    'Valor': 'PAGTO_VALOR', 'Contrato': 'CONTRATO_N',
+}
+
 # --- Funções de Carregamento de Dados ---
-@st.cache_data(ttl=30)
-def load_all_data():
-    """Carrega todos os dados necessários para os relatórios."""
+# Cada carregador recebe a versão das tabelas que lê (ver src/versoes.py): o cache
+# só é refeito quando uma dessas tabelas é alterada, e não a cada gravação no sistema.
+# Os resultados são compartilhados entre as sessões, sem uma cópia por acesso.
+@diagnostico.cache_monitorado("relatorios.carregar_pagamentos", compartilhado=True, max_entries=4)
+def carregar_pagamentos(versao_pagto, versao_credor):
+    """Relatório principal de Pagamentos (PAGTO + nome do credor), lido da cópia colunar."""
+    return relatorio_colunar.carregar_relatorio_pagamentos()
+
+@diagnostico.cache_monitorado("relatorios.carregar_facetas", compartilhado=True, max_entries=4)
+def carregar_facetas(versao_pagto, versao_credor):
+    """Índice de facetas dos filtros (src/facetas.py), montado sobre o relatório em cache."""
+    return IndiceFacetas(carregar_pagamentos(versao_pagto, versao_credor))
+
+@diagnostico.cache_monitorado("relatorios.carregar_tabela", compartilhado=True, max_entries=16)
+def carregar_tabela(table_name, versao):
+    """Tabela de cadastro completa, indexada pela chave primária."""
+    return repositorios.carregar_tabela(table_name)
+
+@diagnostico.cache_monitorado("relatorios.carregar_resumo", compartilhado=True, max_entries=16)
+def carregar_resumo(table_name, versao):
+    """Tabela de resumo de pagamentos (RESUMO_CREDOR, RESUMO_CONTRATO ou RESUMO_PERIODO)."""
+    return resumo_pagamentos(table_name)
+
+def load_all_data(incluir_pagamentos=True):
+    """
+    Carrega todos os dados necessários para os relatórios. Com `incluir_pagamentos=False`
+    (consulta paginada no servidor), o relatório de pagamentos não é carregado na memória.
+    """
     data = {}
     try:
-        # Relatório principal de Pagamentos
-        query_pagamentos = """
-        SELECT
-            p.PAGTO_ID, p.PAGTO_DATA AS "Data", p.PAGTO_PERIODO AS "Período",
-            c.CREDOR_NOME AS "Credor", p.CONTRATO_N AS "Contrato",
-            p.PAGTO_TIPO AS "Tipo de pagamento", p.PAGTO_VALOR AS "Valor"
-        FROM PAGTO p
-        LEFT JOIN CREDOR c ON p.CREDOR_DOC = c.CREDOR_DOC
-        ORDER BY p.PAGTO_DATA DESC
-        """
-        data['pagamentos'] = pd.read_sql(query_pagamentos, engine, index_col="PAGTO_ID", parse_dates=['Data'])
+        v = versoes('PAGTO', 'CREDOR', 'CONTRATO', 'PRODUTOS_SERVICOS')
+        if incluir_pagamentos:
+            data['pagamentos'] = carregar_pagamentos(v['PAGTO'], v['CREDOR'])
+            data['facetas'] = carregar_facetas(v['PAGTO'], v['CREDOR'])
+        else:
+            data['pagamentos'], data['facetas'] = pd.DataFrame(), None
 
         # Dados adicionais para relatórios secundários
-        data['contratos'] = pd.read_sql("SELECT * FROM CONTRATO", engine, index_col='CONTRATO_N')
-        data['credores'] = pd.read_sql("SELECT * FROM CREDOR", engine, index_col='CREDOR_DOC')
-        data['produtos'] = pd.read_sql("SELECT * FROM PRODUTOS_SERVICOS", engine, index_col='PROD_SERV_N')
+        data['contratos'] = carregar_tabela('CONTRATO', v['CONTRATO'])
+        data['credores'] = carregar_tabela('CREDOR', v['CREDOR'])
+        data['produtos'] = carregar_tabela('PRODUTOS_SERVICOS', v['PRODUTOS_SERVICOS'])
 
     except Exception as e:
         st.error(f"Erro ao carregar dados do banco: {e}.")
         # Retorna dataframes vazios em caso de erro
         data['pagamentos'], data['contratos'], data['credores'], data['produtos'] = pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        data['facetas'] = None
 
     return data
 
+def filtro_com_contagens(dimensao, contagens):
+    """
+    Multiseleção de uma dimensão com a quantidade de pagamentos ao lado de cada opção.
+    Como os rótulos fazem parte da identidade do widget, a seleção é guardada pela chave
+    e reaplicada quando as quantidades mudam (mantendo apenas os valores ainda disponíveis).
+    """
+    chave = f"filtro_{dimensao}"
+    st.session_state[chave] = [valor for valor in st.session_state.get(chave, []) if valor in contagens]
+    return st.sidebar.multiselect(
+        dimensao, options=list(contagens), format_func=lambda valor: f"{valor} ({contagens[valor]})",
+        placeholder="Escolha uma opção", key=chave,
+    )
+
+st.sidebar.header("Filtros de Pagamentos")
+modo_servidor = st.sidebar.toggle(
+    "Consulta paginada no servidor",
+    help="Aplica os filtros diretamente no banco de dados e carrega apenas a página exibida. Recomendado para bases grandes."
+)
+
 # Carrega os dados
-all_data = load_all_data()
+diagnostico.marcar("carregar")
+all_data = load_all_data(incluir_pagamentos=not modo_servidor)
 df_pagamentos = all_data['pagamentos']
+facetas = all_data['facetas']
 df_contratos = all_data['contratos']
 df_credores = all_data['credores']
 df_produtos = all_data['produtos']
@@ -52,130 +110,132 @@ df_produtos = all_data['produtos']
 st.subheader("Relatório de Pagamentos")
 st.info("Utilize os filtros na barra lateral para refinar os resultados da tabela de pagamentos. A tabela é editável e as alterações podem ser salvas.")
 st.info("Clique duas vezes sobre o registro(célula) para editar/modificar")
-if df_pagamentos.empty:
-    st.warning("Nenhum dado de pagamento encontrado. Use a página 'Upload de Tabelas' para carregar os dados iniciais.")
+
+diagnostico.marcar("filtrar")
+if modo_servidor:
+    min_date, max_date = intervalo_datas()
+    sem_pagamentos = min_date is None
 else:
-    st.sidebar.header("Filtros de Pagamentos")
-    df_filtrado = df_pagamentos.copy()
+    sem_pagamentos = df_pagamentos.empty
 
+if sem_pagamentos:
+    st.warning("Nenhum dado de pagamento encontrado. Use a página 'Upload de Tabelas' para carregar os dados iniciais.")
+elif modo_servidor:
+    # --- Filtros (em cascata) convertidos em SQL ---
+    filtros = FiltrosPagamento()
+    filtro_data = st.sidebar.date_input("Intervalo de Datas", value=(min_date, max_date), min_value=min_date, max_value=max_date, format="DD/MM/YYYY")
+    if len(filtro_data) == 2:
+        filtros.data_ini, filtros.data_fim = filtro_data
+
+    for dimensao in DIMENSOES_FILTRO:
+        filtros.selecoes[dimensao] = filtro_com_contagens(dimensao, opcoes_filtro(dimensao, filtros))
+
+    # --- Paginação ---
+    quantidade, valor_total = totais_pagamentos(filtros)
+    col_tamanho, col_pagina = st.columns(2)
+    tamanho_pagina = col_tamanho.selectbox("Linhas por página", [100, 500, 1000, 5000], index=1)
+    total_paginas = max(1, -(-quantidade // tamanho_pagina))
+    pagina = col_pagina.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1)
+    df_filtrado = carregar_pagina_pagamentos(filtros, tamanho_pagina, offset=(pagina - 1) * tamanho_pagina)
+    st.caption(f"{quantidade} pagamentos encontrados.")
+else:
     # --- Lógica de Filtros (em cascata) ---
-    min_date = df_filtrado['Data'].min().date()
-    max_date = df_filtrado['Data'].max().date()
+    # Opções e quantidades vêm do índice de facetas; o DataFrame é recortado uma única vez no fim.
+    # Os mesmos filtros em SQL (FiltrosPagamento) são usados pela exportação.
+    filtros = FiltrosPagamento()
+    min_date = df_pagamentos['Data'].min().date()
+    max_date = df_pagamentos['Data'].max().date()
     filtro_data = st.sidebar.date_input("Intervalo de Datas", value=(min_date, max_date), min_value=min_date, max_value=max_date, format="DD/MM/YYYY")
+    mascara = None
     if len(filtro_data) == 2:
-        start_date, end_date = pd.to_datetime(filtro_data[0]), pd.to_datetime(filtro_data[1])
-        df_filtrado = df_filtrado[df_filtrado['Data'].between(start_date, end_date)]
-
-    credores_disponiveis = sorted(df_filtrado['Credor'].dropna().unique())
-    filtro_credor = st.sidebar.multiselect("Credor", options=credores_disponiveis, placeholder="Escolha uma opção")
-    if filtro_credor:
-        df_filtrado = df_filtrado[df_filtrado['Credor'].isin(filtro_credor)]
+        filtros.data_ini, filtros.data_fim = filtro_data
+        mascara = facetas.mascara_datas(*filtro_data)
 
-    periodos_disponiveis = sorted(df_filtrado['Período'].dropna().unique())
-    filtro_periodo = st.sidebar.multiselect("Período", options=periodos_disponiveis, placeholder="Escolha uma opção")
-    if filtro_periodo:
-        df_filtrado = df_filtrado[df_filtrado['Período'].isin(filtro_periodo)]
+    for dimensao in DIMENSOES_FILTRO:
+        filtros.selecoes[dimensao] = filtro_com_contagens(dimensao, facetas.contagens(dimensao, mascara))
+        mascara = facetas.restringir(mascara, dimensao, filtros.selecoes[dimensao])
 
-    tipos_disponiveis = sorted(df_filtrado['Tipo de pagamento'].dropna().unique())
-    filtro_tipo = st.sidebar.multiselect("Tipo de pagamento", options=tipos_disponiveis, placeholder="Escolha uma opção")
-    if filtro_tipo:
-        df_filtrado = df_filtrado[df_filtrado['Tipo de pagamento'].isin(filtro_tipo)]
-
-    contratos_disponiveis = sorted(df_filtrado['Contrato'].dropna().unique())
-    filtro_contrato = st.sidebar.multiselect("Contrato", options=contratos_disponiveis, placeholder="Escolha uma opção")
-    if filtro_contrato:
-        df_filtrado = df_filtrado[df_filtrado['Contrato'].isin(filtro_contrato)]
+    df_filtrado = facetas.filtrar(df_pagamentos, mascara)
 
+    # Valor em centavos (src/tipagem.py): soma exata
+    valor_total = df_filtrado['Valor'].sum() / 100
 
+diagnostico.marcar("renderizar")
+if not sem_pagamentos:
     # --- Exibição da Tabela de Pagamentos ---
     # A linha que usava .fillna('-') foi removida daqui para exibir os dados como estão no banco.
     # Valores nulos aparecerão como células vazias, que é o comportamento desejado.
-    df_para_exibir = df_filtrado
+    if modo_servidor:
+        df_para_exibir = df_filtrado
+    else:
+        # Valor em reais e as colunas editáveis como texto livre
+        df_para_exibir = para_exibicao(df_filtrado, DINHEIRO_RELATORIO, texto=COLUNAS_EDITAVEIS)
 
     st.data_editor(df_para_exibir, use_container_width=True, key="editor_pagamentos")
 
     # --- Lógica para Salvar Alterações na Tabela de Pagamentos ---
-if st.session_state.get('editor_pagamentos', {}).get('edited_rows'):
-    if st.button("Salvar Alterações nos Pagamentos", type="primary"):
-        try:
-            with get_session() as session:
-                for row_index, changes in st.session_state.editor_pagamentos['edited_rows'].items():
-                    # Pega o ID do pagamento a partir do índice do dataframe filtrado
-                    pagto_id = df_filtrado.index[row_index]
-                    
-                    # Constrói o dicionário de alterações para o banco de dados
-                    db_changes = {}
-                    for col, val in changes.items():
-                        if col == 'Data':
-                            db_changes['PAGTO_DATA'] = val
-                        elif col == 'Período':
-                            db_changes['PAGTO_PERIODO'] = val
-                        elif col == 'Tipo de pagamento':
-                            db_changes['PAGTO_TIPO'] = val
-                        elif col == 'Valor':
-                            db_changes['PAGTO_VALOR'] = val
-                        elif col == 'Contrato':
-                            db_changes['CONTRATO_N'] = val
-                        # Adicione outros mapeamentos de coluna aqui se necessário
-
-                    # Apenas executa a atualização se houverem alterações válidas
-                    if db_changes:
-                        stmt = update(Pagamento).where(Pagamento.PAGTO_ID == int(pagto_id)).values(**db_changes)
-                        session.execute(stmt)
-                
-                session.commit()
-            st.success("Alterações salvas com sucesso!")
-            # Limpa o cache para recarregar os dados e atualiza a página
-            st.cache_data.clear()
-            st.rerun()
-        except Exception as e:
-            st.error(f"Erro ao salvar as alterações: {e}")
+    if st.session_state.get('editor_pagamentos', {}).get('edited_rows'):
+        if st.button("Salvar Alterações nos Pagamentos", type="primary"):
+            try:
+                edited_rows = st.session_state.editor_pagamentos['edited_rows']
+                # Pega o ID de cada pagamento a partir do índice do dataframe filtrado
+                alteracoes = {int(df_filtrado.index[row_index]): changes for row_index, changes in edited_rows.items()}
+                # Uma única transação; os resumos, a versão de PAGTO e o saldo dos contratos são atualizados junto
+                repositorios.pagamentos.atualizar(alteracoes, colunas=COLUNAS_EDITAVEIS)
+                st.success("Alterações salvas com sucesso!")
+                # A nova versão de PAGTO invalida apenas os dados de pagamentos em cache
+                st.rerun()
+            except Exception as e:
+                st.error(f"Erro ao salvar as alterações: {e}")
 
     # Métrica e Download
-    valor_total = pd.to_numeric(df_filtrado['Valor'], errors='coerce').sum()
     st.metric(label="**Valor Total dos Pagamentos Filtrados**", value=f"R$ {valor_total:,.2f}")
-    
-    output = BytesIO()
-    df_filtrado.to_excel(output, index=False)
-    st.download_button(
-        label="📥 Exportar para Excel",
-        data=output.getvalue(),
-        file_name="relatorio_pagamentos.xlsx"
-    )
-
-
-# 1. Garanta que a coluna 'Valor' em df_pagamentos é numérica
-df_pagamentos['Valor'] = pd.to_numeric(df_pagamentos['Valor'], errors='coerce')
-
-# 2. Agrupe por 'Credor' e some os 'Valores'
-valor_total_por_credor = df_pagamentos.groupby('Credor')['Valor'].sum().reset_index()
-
-# 3. Renomeie a coluna da soma para maior clareza
-valor_total_por_credor = valor_total_por_credor.rename(columns={'Valor': 'Valor Total'})
 
-# 4. Junte (merge) o dataframe de credores com os totais calculados
-#    Usamos 'left' merge para manter todos os credores originais, mesmo que não tenham pagamentos.
-df_credores_com_total = pd.merge(
-    df_credores,
-    valor_total_por_credor,
-    left_on='CREDOR_NOME',  # Coluna em df_credores
-    right_on='Credor',     # Coluna em valor_total_por_credor
-    how='left'
-)
-
-# 5. Remova a coluna 'Credor' duplicada que veio do merge
-df_credores_com_total = df_credores_com_total.drop(columns=['Credor'])
-
-# 6. Preencha com 0 os valores nulos (credores sem pagamentos) na nova coluna
+    # --- Exportação ---
+    # O arquivo só é gerado quando solicitado, lendo as linhas filtradas direto do banco
+    col_formato, col_exportar = st.columns([2, 1], vertical_alignment="bottom")
+    formato = col_formato.selectbox("Formato de exportação", list(FORMATOS), format_func=lambda f: FORMATOS[f][0])
+    chave_exportacao = (repr(filtros), formato)
+    if col_exportar.button("Gerar arquivo para exportação", use_container_width=True):
+        with st.spinner("Gerando arquivo..."):
+            diagnostico.marcar("exportar")
+            nome_arquivo, mime, arquivo = exportar_pagamentos(filtros, formato)
+            with arquivo:
+                st.session_state.exportacao = (chave_exportacao, nome_arquivo, mime, arquivo.read())
+            diagnostico.marcar("renderizar")
+
+    exportacao = st.session_state.get('exportacao')
+    if exportacao and exportacao[0] == chave_exportacao:
+        _, nome_arquivo, mime, dados = exportacao
+        st.download_button(label=f"📥 Baixar {nome_arquivo}", data=dados, file_name=nome_arquivo, mime=mime)
+    elif exportacao:
+        # Filtros ou formato mudaram desde a geração: descarta o arquivo antigo
+        del st.session_state.exportacao
+
+
+# --- Totais pré-agregados ---
+diagnostico.marcar("carregar resumos")
+# Lidos das tabelas de resumo, mantidas incrementalmente a cada cadastro, importação ou edição
+v_resumos = versoes('RESUMO_CREDOR', 'RESUMO_CONTRATO', 'RESUMO_PERIODO')
+total_por_credor = carregar_resumo('RESUMO_CREDOR', v_resumos['RESUMO_CREDOR'])
+total_por_contrato = carregar_resumo('RESUMO_CONTRATO', v_resumos['RESUMO_CONTRATO'])
+total_por_periodo = carregar_resumo('RESUMO_PERIODO', v_resumos['RESUMO_PERIODO'])
+
+# Credores sem pagamentos aparecem com total zero
+df_credores_com_total = df_credores.join(total_por_credor[['Valor Total']], how='left')
 df_credores_com_total['Valor Total'] = df_credores_com_total['Valor Total'].fillna(0)
 
+df_contratos_com_total = df_contratos.join(total_por_contrato[['Valor Total']].rename(columns={'Valor Total': 'Valor Pago'}), how='left')
+df_contratos_com_total['Valor Pago'] = df_contratos_com_total['Valor Pago'].fillna(0)
+
 # --- Relatórios Adicionais ---
+diagnostico.marcar("renderizar")
 st.divider()
 st.subheader("Outros Relatórios")
 
 with st.expander("Visualizar Relatório de Contratos"):
-    valor_total_contratos = pd.to_numeric(df_contratos['CONTRATO_VALOR'], errors='coerce').sum()
-    st.dataframe(df_contratos.fillna('-'), use_container_width=True)
+    valor_total_contratos = df_contratos['CONTRATO_VALOR'].sum()
+    st.dataframe(df_contratos_com_total.fillna('-'), use_container_width=True)
     st.metric(label="**Valor Total dos Contratos Filtrados**", value=f"R$ {valor_total_contratos:,.2f}")
 
 with st.expander("Visualizar Relatório de Credores"):
@@ -183,7 +243,13 @@ with st.expander("Visualizar Relatório de Credores"):
     st.dataframe(df_credores_com_total.fillna('-'), use_container_width=True)
     st.metric(label="**Valor Total dos Credores**", value=f"R$ {valor_total_credores:,.2f}")
 
+with st.expander("Visualizar Relatório de Pagamentos por Período"):
+    st.dataframe(total_por_periodo, use_container_width=True)
+    st.metric(label="**Valor Total dos Períodos**", value=f"R$ {total_por_periodo['Valor Total'].sum():,.2f}")
+
 with st.expander("Visualizar Relatório de Produtos e Serviços"):
-    valor_total_prodserv = pd.to_numeric(df_produtos['PROD_SERV_VALOR'], errors='coerce').sum()
+    valor_total_prodserv = df_produtos['PROD_SERV_VALOR'].sum()
     st.dataframe(df_produtos.fillna('-'), use_container_width=True)
-    st.metric(label="**Valor Total dos Produtos e Serviços Filtrados**", value=f"R$ {valor_total_prodserv:,.2f}")
\ No newline at end of file
+    st.metric(label="**Valor Total dos Produtos e Serviços Filtrados**", value=f"R$ {valor_total_prodserv:,.2f}")
+
+diagnostico.finalizar_pagina()
@@ -1,11 +1,18 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from src.database import get_session, table_exists, engine
-from sqlalchemy import inspect
-from io import StringIO
+import os
+from src.database import get_session, table_exists
+from src.inicializacao import inicializar_processo
+from src.estatisticas import estatisticas_tabelas, recalcular_estatisticas
+from src.importacao import importar_csv, importar_lote, ErroImportacao, TAMANHO_BLOCO_PADRAO
+from src.migracoes import planos_de_consulta
+from src.trabalhos import ATIVOS, caminho_rejeicoes, criar_trabalho, retomar_uma_vez, situacao_trabalhos
+from src import diagnostico, fila_escrita
 
 st.set_page_config(layout="wide", page_title="Upload de Tabelas")
+diagnostico.iniciar_pagina("Upload")
+# Copy-on-write do pandas e esquema do banco, na primeira execução do processo, mesmo sem passar pela Home
+inicializar_processo()
 
 st.header("Carga de Dados do Sistema via CSV")
 
@@ -33,93 +40,179 @@ for i, table_name in enumerate(TABLE_MAP.keys()):
             f"Tabela {table_name}", type="csv", key=f"upload_{table_name}"
         )
 
+modo_blocos = st.toggle(
+    "Importação em blocos (arquivos grandes)",
+    help="Lê e grava cada arquivo em blocos de tamanho fixo, mantendo o uso de memória constante independentemente do tamanho do arquivo. "
+         "Sem esta opção, todos os arquivos são gravados em uma única transação: se um deles falhar, nada é gravado."
+)
+tamanho_bloco = None
+em_segundo_plano = False
+if modo_blocos:
+    tamanho_bloco = st.number_input("Linhas por bloco", min_value=1_000, value=TAMANHO_BLOCO_PADRAO, step=10_000)
+    em_segundo_plano = st.toggle(
+        "Executar em segundo plano",
+        help="Os arquivos são copiados para o servidor e importados por um processo separado: a página pode ser fechada "
+             "e o progresso acompanhado abaixo. Se o processo for interrompido, a importação continua do último bloco gravado."
+    )
+
+def mostrar_rejeicoes(resultado):
+    """Exibe o relatório das linhas recusadas pelas regras de negócio, com opção de download."""
+    if not resultado.linhas_rejeitadas:
+        return
+    st.warning(f"{resultado.tabela}: {resultado.linhas_rejeitadas} linha(s) recusada(s) pelas regras de negócio e não gravada(s).")
+    st.dataframe(resultado.rejeicoes, use_container_width=True, hide_index=True)
+    st.download_button(
+        f"📥 Baixar rejeições de {resultado.tabela}",
+        data=resultado.rejeicoes.to_csv(sep=';', decimal=',', index=False).encode('utf-8-sig'),
+        file_name=f"rejeicoes_{resultado.tabela}.csv", mime="text/csv", key=f"rejeicoes_{resultado.tabela}",
+    )
+
+diagnostico.marcar("renderizar")
 if st.button("✔️ Processar e Salvar no Banco de Dados", use_container_width=True, type="primary"):
+    diagnostico.marcar("importar")
     with st.spinner("Analisando e salvando dados... Por favor, aguarde."):
         files_processed, files_with_errors = 0, 0
-        inspector = inspect(engine)
+        arquivos = {}
+        with get_session() as session:
+            for table_name, uploader in st.session_state.uploaders.items():
+                if uploader is not None:
+                    if table_exists(session, table_name):
+                        arquivos[table_name] = uploader
+                    else:
+                        st.warning(f"Tabela '{table_name}' não encontrada. Pulando...")
 
-        for table_name, uploader in st.session_state.uploaders.items():
-            if uploader is not None:
+        if em_segundo_plano and arquivos:
+            trabalho_id = criar_trabalho(arquivos, tamanho_bloco)
+            st.success(f"Importação #{trabalho_id} iniciada em segundo plano. Acompanhe o progresso abaixo.")
+        elif modo_blocos:
+            # Cada arquivo é gravado bloco a bloco, em transações independentes
+            for table_name, uploader in arquivos.items():
+                barra = st.progress(0.0, text=f"{table_name}: iniciando...")
+                def progresso(fracao, resultado, barra=barra, table_name=table_name):
+                    texto = f"{table_name}: {resultado.linhas_lidas} linhas lidas, {resultado.linhas_inseridas} novas"
+                    barra.progress(fracao if fracao is not None else 0.0, text=texto)
                 try:
-                    df = pd.read_csv(uploader, sep=';', decimal=',')
-                    
-                    # --- Lógica para determinar o PAGTO_TIPO automaticamente ---
-                    if table_name == 'PAGTO':
-                        doc_cols = ['NF_N', 'RECIBO_N', 'FATURA_N', 'BOLETO_N']
-                        # Garante que as colunas de documento sejam tratadas como texto
-                        for col in doc_cols:
-                            if col in df.columns:
-                                df[col] = df[col].astype(str).str.strip().str.lower().replace('nan', '')
-
-                        # Define as condições e os tipos de pagamento correspondentes
-                        conditions = [
-                            (df['NF_N'].notna() & (df['NF_N'] != '')),
-                            (df['RECIBO_N'].notna() & (df['RECIBO_N'] != '')),
-                            (df['FATURA_N'].notna() & (df['FATURA_N'] != '')),
-                            (df['BOLETO_N'].notna() & (df['BOLETO_N'] != ''))
-                        ]
-                        choices = ['Nota Fiscal', 'Recibo', 'Fatura', 'Boleto']
-                        
-                        # Cria a coluna PAGTO_TIPO com base nas condições
-                        df['PAGTO_TIPO'] = np.select(conditions, choices, default='Outro')
-
-
-                    # --- Limpeza e Preparação ---
-                    if 'CONTRATO_LALOR' in df.columns:
-                        df.rename(columns={'CONTRATO_LALOR': 'CONTRATO_VALOR'}, inplace=True)
-                    for col in df.select_dtypes(include=['object']):
-                        df[col] = df[col].astype(str).str.strip("'")
-
-                    with get_session() as session:
-                        if table_exists(session, table_name):
-                            pk_constraint = inspector.get_pk_constraint(table_name)
-                            pk_columns = pk_constraint['constrained_columns'] if pk_constraint else []
-                            pk_cols_in_df = [col for col in pk_columns if col in df.columns]
-
-                            # --- Lógica Anti-Duplicidade ---
-                            df_to_insert = df
-                            if pk_cols_in_df:
-                                df.drop_duplicates(subset=pk_cols_in_df, inplace=True)
-                                try:
-                                    existing_pks_df = pd.read_sql_table(table_name, engine, columns=pk_cols_in_df)
-                                    if not existing_pks_df.empty:
-                                        merge_indicator = '_merge'
-                                        df_merged = df.merge(existing_pks_df, on=pk_cols_in_df, how='left', indicator=merge_indicator)
-                                        df_to_insert = df_merged[df_merged[merge_indicator] == 'left_only'].drop(columns=[merge_indicator])
-                                except Exception: # Tabela vazia
-                                    pass
-                            
-                            # --- Inserção Final ---
-                            if not df_to_insert.empty:
-                                db_columns = [c['name'] for c in inspector.get_columns(table_name)]
-                                df_final = df_to_insert[[col for col in df_to_insert.columns if col in db_columns]]
-                                df_final.to_sql(table_name, engine, if_exists='append', index=False)
-                            
-                            files_processed += 1
-                        else:
-                            st.warning(f"Tabela '{table_name}' não encontrada. Pulando...")
+                    resultado = importar_csv(uploader, table_name, chunksize=tamanho_bloco, progresso=progresso)
+                    files_processed += 1
+                    mostrar_rejeicoes(resultado)
                 except Exception as e:
                     st.error(f"Erro ao processar '{table_name}': {e}")
                     files_with_errors += 1
+        elif arquivos:
+            # Todos os arquivos são lidos em paralelo e gravados em uma única transação
+            try:
+                resultados = importar_lote(arquivos)
+                files_processed = len(resultados)
+                st.dataframe(pd.DataFrame([
+                    {"Tabela": r.tabela, "Linhas no arquivo": r.linhas_lidas, "Linhas novas": r.linhas_inseridas,
+                     "Linhas rejeitadas": r.linhas_rejeitadas}
+                    for r in resultados.values()
+                ]), use_container_width=True)
+                for resultado in resultados.values():
+                    mostrar_rejeicoes(resultado)
+            except ErroImportacao as e:
+                for table_name, erro in e.erros.items():
+                    st.error(f"Erro ao processar '{table_name}': {erro}")
+                st.error("Nenhum dado foi gravado. Corrija os arquivos e tente novamente.")
+                files_with_errors = len(e.erros)
     
-    if files_processed > 0 and files_with_errors == 0:
+    if em_segundo_plano and arquivos:
+        pass  # O resultado é exibido no painel de importações em segundo plano
+    elif files_processed > 0 and files_with_errors == 0:
         st.success(f"Operação concluída! {files_processed} arquivo(s) foram checados e os dados novos foram salvos no banco de dados.")
     elif files_processed > 0:
         st.warning(f"{files_processed} arquivo(s) processados, mas ocorreram erros em {files_with_errors}. Verifique as mensagens.")
     elif files_with_errors == 0:
         st.info("Nenhum arquivo foi selecionado ou os arquivos não continham dados novos para inserir.")
 
+diagnostico.marcar("segundo plano")
+# --- Importações em segundo plano ---
+SITUACOES = {"pendente": "⏳ Aguardando", "executando": "🔄 Em execução", "concluido": "✅ Concluída", "erro": "❌ Com erros"}
+INTERVALO_ATUALIZACAO = 2
+
+try:
+    # Uma vez por processo: as interações com a página não repetem a consulta nem iniciam trabalhadores
+    retomar_uma_vez()
+    trabalhos_ativos = situacao_trabalhos()[0]['SITUACAO'].isin(ATIVOS).any()
+except Exception as e:
+    st.error(f"Erro ao consultar as importações em segundo plano: {e}")
+    trabalhos_ativos = None
+
+# Enquanto houver importação em andamento, apenas este painel é atualizado periodicamente
+@st.fragment(run_every=INTERVALO_ATUALIZACAO if trabalhos_ativos else None)
+def painel_trabalhos():
+    trabalhos, arquivos = situacao_trabalhos()
+    if trabalhos.empty:
+        return
+    st.markdown("---")
+    st.subheader("Importações em Segundo Plano")
+    for _, trabalho in trabalhos.iterrows():
+        trabalho_id = trabalho['TRABALHO_ID']
+        titulo = f"Importação #{trabalho_id} — {SITUACOES.get(trabalho['SITUACAO'], trabalho['SITUACAO'])} — {trabalho['CRIADO_EM']:%d/%m/%Y %H:%M}"
+        with st.expander(titulo, expanded=trabalho['SITUACAO'] in ATIVOS):
+            if trabalho['MENSAGEM']:
+                st.error(trabalho['MENSAGEM'])
+            for _, arquivo in arquivos[arquivos['TRABALHO_ID'] == trabalho_id].iterrows():
+                fracao = arquivo['BYTES_LIDOS'] / arquivo['TAMANHO_BYTES'] if arquivo['TAMANHO_BYTES'] else 1.0
+                st.progress(min(float(fracao), 1.0), text=(
+                    f"{arquivo['TABELA']} ({SITUACOES.get(arquivo['SITUACAO'], arquivo['SITUACAO'])}): "
+                    f"{arquivo['BLOCOS_CONCLUIDOS']} bloco(s), {arquivo['LINHAS_LIDAS']} linhas lidas, "
+                    f"{arquivo['LINHAS_INSERIDAS']} novas, {arquivo['LINHAS_REJEITADAS']} rejeitadas"
+                ))
+                if arquivo['MENSAGEM']:
+                    st.error(f"{arquivo['TABELA']}: {arquivo['MENSAGEM']}")
+                rejeicoes = caminho_rejeicoes(trabalho_id, arquivo['TABELA'])
+                if arquivo['SITUACAO'] == 'concluido' and os.path.exists(rejeicoes):
+                    with open(rejeicoes, 'rb') as relatorio:
+                        st.download_button(
+                            f"📥 Baixar rejeições de {arquivo['TABELA']}", data=relatorio.read(),
+                            file_name=os.path.basename(rejeicoes), mime="text/csv",
+                            key=f"rejeicoes_trabalho_{trabalho_id}_{arquivo['TABELA']}",
+                        )
+    if trabalhos_ativos and not trabalhos['SITUACAO'].isin(ATIVOS).any():
+        # Todas concluídas: atualiza a página inteira (status das tabelas) e encerra a consulta periódica
+        st.rerun()
+
+if trabalhos_ativos is not None:
+    painel_trabalhos()
+
+diagnostico.marcar("status")
 st.markdown("---")
 st.subheader("Status do Banco de Dados")
+def formatar_tamanho(n_bytes):
+    for unidade in ("B", "KB", "MB", "GB"):
+        if n_bytes < 1024 or unidade == "GB":
+            return f"{n_bytes:,.0f} {unidade}" if unidade == "B" else f"{n_bytes:,.1f} {unidade}"
+        n_bytes /= 1024
+
+# Estatísticas mantidas pelas gravações (src/estatisticas.py), lidas em uma única consulta
 status_data = []
-with get_session() as session:
-    for table_name in TABLE_MAP.keys():
-        status, info = ("⚠️ Pendente", "Tabela não encontrada")
-        if table_exists(session, table_name):
-            try:
-                count = pd.read_sql(f"SELECT COUNT(*) FROM {table_name}", engine).iloc[0,0]
-                status, info = ("✅ Carregado", f"{count} linhas")
-            except Exception as e:
-                status, info = ("❌ Erro", str(e))
-        status_data.append({"Tabela": table_name, "Status": status, "Info": info})
-st.dataframe(pd.DataFrame(status_data), use_container_width=True)
\ No newline at end of file
+try:
+    estatisticas = estatisticas_tabelas(TABLE_MAP.keys())
+    for table_name, linha in estatisticas.iterrows():
+        if pd.isna(linha['LINHAS']):
+            status, info = ("⚠️ Pendente", "Nenhum dado carregado")
+        else:
+            status, info = ("✅ Carregado", f"{int(linha['LINHAS'])} linhas")
+        status_data.append({
+            "Tabela": table_name, "Status": status, "Info": info,
+            "Última importação": linha['ULTIMA_IMPORTACAO'].strftime('%d/%m/%Y %H:%M') if pd.notna(linha['ULTIMA_IMPORTACAO']) else "-",
+            "Tamanho": formatar_tamanho(linha['TAMANHO_BYTES']) if pd.notna(linha['TAMANHO_BYTES']) else "-",
+        })
+    st.dataframe(pd.DataFrame(status_data), use_container_width=True, hide_index=True)
+except Exception as e:
+    st.error(f"Erro ao ler as estatísticas das tabelas: {e}")
+if st.button("Recalcular estatísticas", help="Conta novamente as linhas e mede o tamanho de todas as tabelas."):
+    fila_escrita.executar(recalcular_estatisticas)
+    st.rerun()
+with st.expander("Uso de índices nas consultas de relatório"):
+    st.caption("Plano de execução das principais consultas do relatório de pagamentos, para conferir se os índices estão sendo utilizados.")
+    if st.button("Analisar consultas"):
+        try:
+            for descricao, plano in planos_de_consulta().items():
+                st.markdown(f"**{descricao}**")
+                st.code("\n".join(plano), language=None)
+        except Exception as e:
+            st.error(f"Erro ao analisar as consultas: {e}")
+
+diagnostico.finalizar_pagina()
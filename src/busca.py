@@ -0,0 +1,180 @@
+# src/busca.py
+"""
+Busca de credores e produtos/serviços por texto, para os seletores das páginas.
+
+No SQLite, cada tabela pesquisável tem um índice de texto completo FTS5
+(BUSCA_CREDOR, BUSCA_PRODUTO) mantido em dia por gatilhos na própria tabela:
+inclusões, exclusões e alterações das colunas indexadas, inclusive as feitas
+pela importação em lote e pelo data_editor, atualizam o índice na mesma
+transação. O tokenizador `unicode61 remove_diacritics 2` ignora maiúsculas e
+acentos ("jose" encontra "José"), e cada palavra digitada é buscada como prefixo.
+O documento do credor também é indexado só com os dígitos, para que o CPF/CNPJ
+possa ser digitado com ou sem pontuação.
+
+Cada linha do índice guarda a chave primária da linha de origem (coluna CHAVE,
+não indexada), e as consultas ligam o índice à tabela por ela, não pelo rowid:
+o rowid de uma tabela sem chave inteira (CREDOR) pode ser renumerado por um
+VACUUM. Nas tabelas com chave inteira, que é o próprio rowid, o rowid do índice
+é a chave, e os gatilhos localizam a linha a remover por ele; nas demais, pela
+coluna CHAVE, percorrendo o índice (só em exclusões e alterações de texto).
+
+Nos demais bancos, a busca usa ILIKE em cada palavra (sem índice nem tratamento
+de acentos), assim como nas tabelas sem índice de busca (`condicoes_busca`).
+"""
+import re
+
+from sqlalchemy import Integer, String, or_, select, text
+
+from src.database import get_engine, Base
+
+# Quantidade de sugestões enviadas ao navegador por seletor
+LIMITE_SUGESTOES = 20
+
+# Índice -> tabela de origem, colunas indexadas (nome -> expressão SQL sobre a
+# linha; "{r}" é substituído por NEW., OLD. ou nada), chave e coluna exibida
+INDICES_BUSCA = {
+    'BUSCA_CREDOR': {
+        'tabela': 'CREDOR',
+        'colunas': {
+            'CREDOR_NOME': '{r}CREDOR_NOME',
+            'CREDOR_DOC': '{r}CREDOR_DOC',
+            'DOC_DIGITOS': "replace(replace(replace(replace({r}CREDOR_DOC, '.', ''), '/', ''), '-', ''), ' ', '')",
+        },
+        'chave': 'CREDOR_DOC',
+        'rotulo': 'CREDOR_NOME',
+    },
+    'BUSCA_PRODUTO': {
+        'tabela': 'PRODUTOS_SERVICOS',
+        'colunas': {'PROD_SERV_DESCRICAO': '{r}PROD_SERV_DESCRICAO'},
+        'chave': 'PROD_SERV_N',
+        'rotulo': 'PROD_SERV_DESCRICAO',
+    },
+}
+
+# --- Criação e manutenção (SQLite) ---
+
+def _valores(indice, prefixo):
+    return ", ".join(expr.format(r=prefixo) for expr in INDICES_BUSCA[indice]['colunas'].values())
+
+def _chave_e_rowid(indice):
+    # A chave inteira de uma tabela SQLite é o próprio rowid, estável
+    spec = INDICES_BUSCA[indice]
+    chave = Base.metadata.tables[spec['tabela']].c[spec['chave']]
+    return isinstance(chave.type, Integer)
+
+def _inserir(indice, prefixo):
+    spec = INDICES_BUSCA[indice]
+    colunas, chave = ", ".join(spec['colunas']), f'{prefixo}"{spec["chave"]}"'
+    if _chave_e_rowid(indice):
+        return f'INSERT INTO "{indice}"(rowid, CHAVE, {colunas}) SELECT {chave}, {chave}, {_valores(indice, prefixo)}'
+    return f'INSERT INTO "{indice}"(CHAVE, {colunas}) SELECT {chave}, {_valores(indice, prefixo)}'
+
+def criar_indices_busca(conn):
+    """Cria os índices FTS5 e os gatilhos que os mantêm (idempotente) e os preenche."""
+    if conn.dialect.name != 'sqlite':
+        return
+    for indice, spec in INDICES_BUSCA.items():
+        tabela, colunas = spec['tabela'], ", ".join(spec['colunas'])
+        conn.execute(text(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{indice}" USING fts5(CHAVE UNINDEXED, {colunas}, '
+            f"prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        ))
+        inserir = _inserir(indice, "NEW.") + ';'
+        filtro = 'rowid' if _chave_e_rowid(indice) else 'CHAVE'
+        remover = f'DELETE FROM "{indice}" WHERE {filtro} = OLD."{spec["chave"]}";'
+        conn.execute(text(f'CREATE TRIGGER IF NOT EXISTS "{indice}_AI" AFTER INSERT ON "{tabela}" BEGIN {inserir} END'))
+        conn.execute(text(f'CREATE TRIGGER IF NOT EXISTS "{indice}_AD" AFTER DELETE ON "{tabela}" BEGIN {remover} END'))
+        # Só as colunas de origem das indexadas e a chave: editar um valor não reindexa o texto
+        origem = ", ".join(sorted({
+            c.name for c in Base.metadata.tables[tabela].columns if c.name in colunas or c.name == spec['chave']
+        }))
+        conn.execute(text(
+            f'CREATE TRIGGER IF NOT EXISTS "{indice}_AU" AFTER UPDATE OF {origem} ON "{tabela}" '
+            f'BEGIN {remover} {inserir} END'
+        ))
+    reconstruir_indices_busca(conn)
+
+def reconstruir_indices_busca(conn):
+    """Refaz o conteúdo dos índices de busca a partir das tabelas de origem."""
+    if conn.dialect.name != 'sqlite':
+        return
+    for indice, spec in INDICES_BUSCA.items():
+        conn.execute(text(f'DELETE FROM "{indice}"'))
+        conn.execute(text(f'{_inserir(indice, "")} FROM "{spec["tabela"]}"'))
+
+def remover_indices_busca(conn):
+    """Remove os índices de busca e os seus gatilhos (para recriá-los em outro formato)."""
+    if conn.dialect.name != 'sqlite':
+        return
+    for indice in INDICES_BUSCA:
+        for gatilho in ('AI', 'AD', 'AU'):
+            conn.execute(text(f'DROP TRIGGER IF EXISTS "{indice}_{gatilho}"'))
+        conn.execute(text(f'DROP TABLE IF EXISTS "{indice}"'))
+
+# --- Consulta ---
+
+def _palavras(termo):
+    return re.findall(r'\w+', termo or '')
+
+def _expressao(palavras):
+    # Todas as palavras, cada uma como prefixo
+    return " AND ".join(f'"{palavra}"*' for palavra in palavras)
+
+def _indice_da_tabela(table_name):
+    return next((indice for indice, spec in INDICES_BUSCA.items() if spec['tabela'] == table_name), None)
+
+def condicoes_busca(table_name, termo, dialeto='sqlite'):
+    """
+    Condições WHERE que restringem a tabela às linhas encontradas pela busca do
+    termo, para combinar com outras consultas (por exemplo, a paginação do
+    editor de Cadastros). Tabelas com índice FTS5 usam o índice no SQLite; as
+    demais, ILIKE em cada palavra sobre as colunas de texto.
+    """
+    palavras = _palavras(termo)
+    if not palavras:
+        return []
+    tabela = Base.metadata.tables[table_name]
+    indice = _indice_da_tabela(table_name)
+    if indice is not None and dialeto == 'sqlite':
+        chave = INDICES_BUSCA[indice]['chave']
+        return [text(
+            f'"{table_name}"."{chave}" IN (SELECT CHAVE FROM "{indice}" WHERE "{indice}" MATCH :expressao_busca)'
+        ).bindparams(expressao_busca=_expressao(palavras))]
+    if indice is not None:
+        colunas = [tabela.c[c] for c in INDICES_BUSCA[indice]['colunas'] if c in tabela.c]
+    else:
+        colunas = [c for c in tabela.columns if isinstance(c.type, String)]
+    return [or_(*(coluna.ilike(f"%{palavra}%") for coluna in colunas)) for palavra in palavras]
+
+def buscar(indice, termo, limite=LIMITE_SUGESTOES, bind=None):
+    """
+    Retorna {chave: rótulo} das linhas que contêm todas as palavras do termo (cada
+    uma como prefixo), das mais relevantes para as menos. Sem termo, retorna as
+    primeiras linhas em ordem alfabética do rótulo.
+    """
+    spec = INDICES_BUSCA[indice]
+    tabela = Base.metadata.tables[spec['tabela']]
+    chave, rotulo = tabela.c[spec['chave']], tabela.c[spec['rotulo']]
+    palavras = _palavras(termo)
+    with (bind or get_engine()).connect() as conn:
+        if not palavras:
+            consulta = select(chave, rotulo).order_by(rotulo).limit(limite)
+        elif conn.dialect.name == 'sqlite':
+            expressao = _expressao(palavras)
+            consulta = text(
+                f'SELECT t."{chave.name}", t."{rotulo.name}" FROM "{indice}" AS b '
+                f'JOIN "{tabela.name}" AS t ON t."{chave.name}" = b.CHAVE '
+                f'WHERE "{indice}" MATCH :expressao ORDER BY b.rank, t."{rotulo.name}" LIMIT :limite'
+            ).bindparams(expressao=expressao, limite=limite)
+        else:
+            condicoes = condicoes_busca(tabela.name, termo, conn.dialect.name)
+            consulta = select(chave, rotulo).where(*condicoes).order_by(rotulo).limit(limite)
+        return dict(conn.execute(consulta).all())
+
+def buscar_credores(termo, limite=LIMITE_SUGESTOES, bind=None):
+    """{CREDOR_DOC: CREDOR_NOME} dos credores cujo nome ou documento corresponde ao termo."""
+    return buscar('BUSCA_CREDOR', termo, limite, bind)
+
+def buscar_produtos(termo, limite=LIMITE_SUGESTOES, bind=None):
+    """{PROD_SERV_N: PROD_SERV_DESCRICAO} dos produtos/serviços cuja descrição corresponde ao termo."""
+    return buscar('BUSCA_PRODUTO', termo, limite, bind)
@@ -1,34 +1,339 @@
 # src/business_rules.py
+import threading
+import time
+from dataclasses import dataclass
 from datetime import date
-from src.database import get_session
 
-def validar_data_pagamento(pagamento_data: date, contrato_n: str):
+import pandas as pd
+from sqlalchemy import select, func, union_all
+
+from src.database import get_engine, Contrato, Aditivo, Pagamento, ResumoContrato
+from src.leitura_csv import converter_datas
+from src.versoes import versoes
+
+# --- Vigências dos contratos ---
+
+# Datas usadas no lugar dos extremos em branco, que deixam a vigência aberta
+VIGENCIA_INI_ABERTA = pd.Timestamp('1900-01-01')
+VIGENCIA_FIM_ABERTA = pd.Timestamp('2199-12-31')
+
+def consultar_vigencias(conn, contratos=None):
+    """
+    Retorna um DataFrame (CONTRATO_N, INI, FIM) com os intervalos de vigência de
+    cada contrato: o do próprio contrato e os dos aditivos, já unidos quando se
+    sobrepõem ou são contíguos. Datas ausentes no contrato deixam o intervalo
+    aberto naquele extremo; aditivos sem datas (só de valor) são ignorados.
+    """
+    do_contrato = select(
+        Contrato.CONTRATO_N, Contrato.CONTRATO_DATA_INI.label('INI'), Contrato.CONTRATO_DATA_FIM.label('FIM')
+    )
+    dos_aditivos = select(Aditivo.CONTRATO_N, Aditivo.ADITIVO_DATA_INI, Aditivo.ADITIVO_DATA_FIM).where(
+        Aditivo.ADITIVO_DATA_INI.is_not(None) | Aditivo.ADITIVO_DATA_FIM.is_not(None)
+    )
+    if contratos is not None:
+        contratos = list(contratos)
+        do_contrato = do_contrato.where(Contrato.CONTRATO_N.in_(contratos))
+        dos_aditivos = dos_aditivos.where(Aditivo.CONTRATO_N.in_(contratos))
+
+    intervalos = pd.DataFrame(conn.execute(union_all(do_contrato, dos_aditivos)).all(), columns=['CONTRATO_N', 'INI', 'FIM'])
+    intervalos['INI'] = pd.to_datetime(intervalos['INI']).fillna(VIGENCIA_INI_ABERTA)
+    intervalos['FIM'] = pd.to_datetime(intervalos['FIM']).fillna(VIGENCIA_FIM_ABERTA)
+    intervalos = intervalos.sort_values(['CONTRATO_N', 'INI'])
+
+    # Une os intervalos de cada contrato: um novo grupo começa quando o início
+    # passa do maior fim visto até então (mais um dia, para unir os contíguos)
+    fim_acumulado = intervalos.groupby('CONTRATO_N')['FIM'].cummax()
+    anterior = fim_acumulado.groupby(intervalos['CONTRATO_N']).shift()
+    novo_grupo = anterior.isna() | (intervalos['INI'] > anterior + pd.Timedelta(days=1))
+    grupo = novo_grupo.cumsum()
+    return (
+        intervalos.groupby(grupo)
+        .agg(CONTRATO_N=('CONTRATO_N', 'first'), INI=('INI', 'min'), FIM=('FIM', 'max'))
+        .reset_index(drop=True)
+    )
+
+def consultar_saldos(conn, contratos=None):
+    """
+    Retorna um DataFrame indexado por CONTRATO_N com o valor total (CONTRATO_VALOR
+    mais ADITIVO_VALOR) e o valor já pago (RESUMO_CONTRATO) de cada contrato.
+    """
+    aditivos = (
+        select(Aditivo.CONTRATO_N, func.coalesce(func.sum(Aditivo.ADITIVO_VALOR), 0).label('VALOR'))
+        .group_by(Aditivo.CONTRATO_N)
+        .subquery()
+    )
+    consulta = (
+        select(
+            Contrato.CONTRATO_N,
+            (func.coalesce(Contrato.CONTRATO_VALOR, 0) + func.coalesce(aditivos.c.VALOR, 0)).label('VALOR_TOTAL'),
+            func.coalesce(ResumoContrato.VALOR_TOTAL, 0).label('VALOR_PAGO'),
+        )
+        .outerjoin(aditivos, aditivos.c.CONTRATO_N == Contrato.CONTRATO_N)
+        .outerjoin(ResumoContrato, ResumoContrato.CONTRATO_N == Contrato.CONTRATO_N)
+    )
+    if contratos is not None:
+        consulta = consulta.where(Contrato.CONTRATO_N.in_(list(contratos)))
+    saldos = pd.DataFrame(conn.execute(consulta).all(), columns=['CONTRATO_N', 'VALOR_TOTAL', 'VALOR_PAGO'])
+    saldos[['VALOR_TOTAL', 'VALOR_PAGO']] = saldos[['VALOR_TOTAL', 'VALOR_PAGO']].astype(float)
+    return saldos.set_index('CONTRATO_N')
+
+# --- Índice de vigência e saldo dos contratos ---
+
+@dataclass
+class SituacaoContrato:
+    # Intervalos (início, fim) de vigência, ordenados e sem sobreposição
+    vigencias: tuple
+    valor_total: float
+    valor_pago: float
+
+    @property
+    def inicio(self):
+        return self.vigencias[0][0] if self.vigencias else None
+
+    @property
+    def fim(self):
+        return self.vigencias[-1][1] if self.vigencias else None
+
+    @property
+    def saldo(self):
+        return self.valor_total - self.valor_pago
+
+    def vigente_em(self, data):
+        return any(ini <= data <= fim for ini, fim in self.vigencias)
+
+def consultar_situacoes(conn, contratos=None):
+    """{CONTRATO_N: SituacaoContrato} dos contratos informados (ou de todos), lidos em `conn`."""
+    vigencias = {}
+    for contrato_n, ini, fim in consultar_vigencias(conn, contratos).itertuples(index=False):
+        # Os extremos abertos viram date.min/date.max para a comparação com datas
+        ini = date.min if ini <= VIGENCIA_INI_ABERTA else ini.date()
+        fim = date.max if fim >= VIGENCIA_FIM_ABERTA else fim.date()
+        vigencias.setdefault(contrato_n, []).append((ini, fim))
+    return {
+        contrato_n: SituacaoContrato(tuple(vigencias.get(contrato_n, ())), valor_total, valor_pago)
+        for contrato_n, valor_total, valor_pago in consultar_saldos(conn, contratos).itertuples()
+    }
+
+class IndiceContratos:
+    """
+    Mantém em memória, para cada contrato, a vigência efetiva (CONTRATO_DATA_INI/FIM
+    estendida pelas datas dos ADITIVOS), o valor total (CONTRATO_VALOR + ADITIVO_VALOR)
+    e o valor já pago (RESUMO_CONTRATO), de modo que cada validação é uma consulta
+    a um dicionário em vez de uma consulta a ADITIVOS e PAGTO.
+
+    As gravações feitas pela aplicação atualizam apenas os contratos afetados
+    (`atualizar_contratos`). Alterações feitas por outros processos são detectadas
+    pelas versões de dados das tabelas (src/versoes.py), verificadas no máximo a
+    cada INTERVALO_VERIFICACAO segundos, e provocam uma recarga completa.
+    """
+    TABELAS = ('CONTRATO', 'ADITIVOS', 'RESUMO_CONTRATO')
+    INTERVALO_VERIFICACAO = 2.0
+
+    def __init__(self, bind=None):
+        # Sem bind, usa o engine da aplicação, resolvido só no primeiro acesso ao banco
+        self._bind = bind
+        self._lock = threading.RLock()
+        self._contratos = {}
+        self._versoes = None
+        self._verificado_em = 0.0
+
+    @property
+    def bind(self):
+        return self._bind or get_engine()
+
+    def recarregar(self):
+        """Recarrega o índice inteiro a partir do banco."""
+        with self._lock:
+            atuais = versoes(*self.TABELAS, bind=self.bind)
+            with self.bind.connect() as conn:
+                self._contratos = consultar_situacoes(conn)
+            self._versoes = atuais
+            self._verificado_em = time.monotonic()
+
+    def garantir_atualizado(self):
+        """Recarrega o índice se outra gravação (de qualquer processo) alterou as tabelas de origem."""
+        with self._lock:
+            if self._versoes is not None and time.monotonic() - self._verificado_em < self.INTERVALO_VERIFICACAO:
+                return
+            if versoes(*self.TABELAS, bind=self.bind) != self._versoes:
+                self.recarregar()
+            self._verificado_em = time.monotonic()
+
+    def atualizar_contratos(self, contratos):
+        """Atualiza apenas os contratos informados, após uma gravação feita pela aplicação."""
+        contratos = {c for c in contratos if c}
+        with self._lock:
+            if self._versoes is None:
+                return  # Ainda não carregado: a primeira consulta já trará os dados novos
+            with self.bind.connect() as conn:
+                situacoes = consultar_situacoes(conn, contratos)
+            for contrato_n in contratos:
+                if contrato_n in situacoes:
+                    self._contratos[contrato_n] = situacoes[contrato_n]
+                else:
+                    self._contratos.pop(contrato_n, None)
+            self._versoes = versoes(*self.TABELAS, bind=self.bind)
+            self._verificado_em = time.monotonic()
+
+    def obter(self, contrato_n):
+        """Retorna a SituacaoContrato do contrato, ou None se ele não existir."""
+        self.garantir_atualizado()
+        return self._contratos.get(contrato_n)
+
+indice_contratos = IndiceContratos()
+
+# --- Regras de Validação ---
+
+def _situacao(contrato_n, conn=None):
+    # Com `conn`, lida na transação de quem grava; sem ela, do índice em memória
+    if conn is None:
+        return indice_contratos.obter(contrato_n)
+    return consultar_situacoes(conn, [contrato_n]).get(contrato_n)
+
+def validar_data_pagamento(pagamento_data: date, contrato_n: str, conn=None):
     """
     Verifica se a data do pagamento está dentro da vigência do contrato.
     Implementa a regra "Data fora da vigência". [cite: 163]
+    Com `conn`, a vigência é lida nessa conexão em vez do índice em memória.
     Retorna True se válido, False caso contrário, junto com uma mensagem.
     """
-    # Lógica para buscar as datas do contrato e aditivos e comparar
-    # com a PAGTO.PAGTO_DATA.
+    if not contrato_n:
+        return True, "Pagamento sem contrato vinculado."
+    situacao = _situacao(contrato_n, conn)
+    if situacao is None:
+        return False, f"Contrato {contrato_n} não encontrado."
+    if not situacao.vigente_em(pagamento_data):
+        periodos = ", ".join(
+            f"{'-' if ini == date.min else ini.strftime('%d/%m/%Y')} a {'-' if fim == date.max else fim.strftime('%d/%m/%Y')}"
+            for ini, fim in situacao.vigencias
+        )
+        return False, f"Data fora da vigência do contrato {contrato_n} ({periodos or 'sem vigência'}, incluindo aditivos)."
     return True, "Validação OK"
 
-def validar_valor_pagamento(valor_pagamento: float, contrato_n: str):
+def validar_valor_pagamento(valor_pagamento: float, contrato_n: str, conn=None):
     """
     Verifica se o valor do pagamento não excede o saldo do contrato.
     Implementa a regra "Valor superior ao disponível". [cite: 163]
+    Com `conn`, o saldo é lido nessa conexão (na transação que grava o
+    pagamento), em vez do índice em memória.
     Retorna True se válido, False caso contrário, junto com uma mensagem.
     """
-    # Lógica para calcular o valor já pago e o valor total do contrato
-    # (incluindo aditivos) e fazer a verificação.
+    if not contrato_n:
+        return True, "Pagamento sem contrato vinculado."
+    situacao = _situacao(contrato_n, conn)
+    if situacao is None:
+        return False, f"Contrato {contrato_n} não encontrado."
+    # Tolerância de meio centavo para arredondamentos
+    if valor_pagamento > situacao.saldo + 0.005:
+        return False, f"Valor superior ao disponível no contrato {contrato_n} (saldo de R$ {situacao.saldo:,.2f})."
     return True, "Validação OK"
 
+MSG_DATAS_CONTRATO = "A data de término da vigência não pode ser anterior à data de início."
+
 def validar_datas_contrato(data_ini: date, data_fim: date):
     """
     Verifica se a data de término do contrato é posterior à de início.
     Implementa a regra da tabela 3.2. [cite: 165]
     """
     if data_fim < data_ini:
-        return False, "A data de término da vigência não pode ser anterior à data de início."
+        return False, MSG_DATAS_CONTRATO
     return True, "Validação OK"
 
-# ... (demais funções de validação para contratos [cite: 165], aditivos [cite: 167] e pagamentos [cite: 163])
\ No newline at end of file
+# --- Validação em lote (importação de arquivos) ---
+# As funções abaixo aplicam as mesmas regras a um DataFrame inteiro, com operações
+# vetorizadas, e retornam uma Series com o motivo da rejeição de cada linha
+# (vazia para as linhas aceitas) em vez de parar no primeiro erro. As datas passam
+# pelo mesmo conversor da leitura dos CSVs (src/leitura_csv.py), que devolve como
+# estão as colunas já convertidas pela importação.
+
+def _texto(serie):
+    """Normaliza uma coluna de texto do CSV, tratando células vazias como ausentes."""
+    return serie.astype('string').str.strip().replace({'': pd.NA, 'nan': pd.NA, 'None': pd.NA})
+
+class _Motivos:
+    def __init__(self, index):
+        self.motivos = pd.Series('', index=index, dtype=object)
+
+    def rejeitar(self, mascara, motivo):
+        """Acrescenta o motivo às linhas da máscara; `motivo` pode ser um texto ou uma Series."""
+        mascara = mascara.fillna(False).astype(bool)
+        if isinstance(motivo, pd.Series):
+            motivo = motivo[mascara]
+        self.motivos[mascara] = self.motivos[mascara] + '; ' + motivo
+
+    def resultado(self):
+        return self.motivos.str.removeprefix('; ')
+
+def validar_contratos_lote(df, conn=None):
+    """Versão vetorizada de `validar_datas_contrato` para um arquivo de contratos."""
+    motivos = _Motivos(df.index)
+    if {'CONTRATO_DATA_INI', 'CONTRATO_DATA_FIM'} <= set(df.columns):
+        ini, fim = converter_datas(df['CONTRATO_DATA_INI']), converter_datas(df['CONTRATO_DATA_FIM'])
+        motivos.rejeitar(fim < ini, MSG_DATAS_CONTRATO)
+    return motivos.resultado()
+
+def validar_pagamentos_lote(df, conn):
+    """
+    Valida de uma só vez as linhas de um arquivo de pagamentos:
+    - a data de cada pagamento contra as vigências do contrato e dos aditivos,
+      por meio de uma junção "as-of" (o intervalo mais recente iniciado até a data);
+    - o valor acumulado por CONTRATO_N, na ordem do arquivo, contra o saldo do
+      contrato (valor total menos o já pago).
+    As consultas usam `conn`, de modo que contratos gravados antes na mesma
+    transação (importação em lote) já são considerados. Linhas cujo PAGTO_ID já
+    existe no banco não são validadas, pois serão ignoradas na importação.
+    """
+    motivos = _Motivos(df.index)
+    novas = pd.Series(True, index=df.index)
+    if 'PAGTO_ID' in df.columns:
+        ids = pd.to_numeric(df['PAGTO_ID'], errors='coerce')
+        if ids.notna().any():
+            existentes = conn.execute(
+                select(Pagamento.PAGTO_ID).where(Pagamento.PAGTO_ID.between(int(ids.min()), int(ids.max())))
+            ).scalars().all()
+            novas = ~ids.isin(existentes)
+
+    datas = converter_datas(df['PAGTO_DATA'])
+    valores = pd.to_numeric(df['PAGTO_VALOR'], errors='coerce')
+    motivos.rejeitar(novas & datas.isna(), "Data do pagamento inválida")
+    motivos.rejeitar(novas & valores.isna(), "Valor do pagamento inválido")
+    if 'CONTRATO_N' not in df.columns:
+        return motivos.resultado()
+
+    contratos = _texto(df['CONTRATO_N'])
+    verificar = novas & contratos.notna()
+    lista_contratos = contratos[verificar].unique().tolist()
+    if not lista_contratos:
+        return motivos.resultado()
+    saldos = consultar_saldos(conn, lista_contratos)
+    encontrado = contratos.isin(saldos.index)
+    motivos.rejeitar(verificar & ~encontrado, "Contrato " + contratos.fillna('') + " não encontrado")
+    verificar &= encontrado & datas.notna()
+
+    # Junção as-of: para cada pagamento, o intervalo de vigência (já unido) do seu
+    # contrato com o maior início até a data; a data é válida se não passar do fim
+    pagamentos = pd.DataFrame({'CONTRATO_N': contratos[verificar].astype(object), 'DATA': datas[verificar]})
+    vigencias = consultar_vigencias(conn, lista_contratos)
+    juncao = pd.merge_asof(
+        pagamentos.reset_index().sort_values('DATA'), vigencias.sort_values('INI'),
+        left_on='DATA', right_on='INI', by='CONTRATO_N', direction='backward',
+    ).set_index('index')
+    fora = pd.Series(False, index=df.index)
+    fora[juncao.index] = juncao['FIM'].isna() | (juncao['DATA'] > juncao['FIM'])
+    motivos.rejeitar(fora, "Data fora da vigência do contrato " + contratos.fillna('') + " (incluindo aditivos)")
+
+    # Saldo: soma acumulada dos valores das linhas ainda válidas, por contrato
+    verificar &= ~fora & valores.notna()
+    acumulado = valores[verificar].groupby(contratos[verificar]).cumsum()
+    disponivel = contratos[verificar].map(saldos['VALOR_TOTAL'] - saldos['VALOR_PAGO']).astype(float)
+    excede = pd.Series(False, index=df.index)
+    excede[acumulado.index] = acumulado > disponivel + 0.005
+    motivos.rejeitar(excede, "Valor acumulado superior ao disponível no contrato " + contratos.fillna(''))
+    return motivos.resultado()
+
+VALIDADORES_LOTE = {
+    'CONTRATO': validar_contratos_lote,
+    'PAGTO': validar_pagamentos_lote,
+}
+
+# ... (demais funções de validação para contratos [cite: 165], aditivos [cite: 167] e pagamentos [cite: 163])
@@ -0,0 +1,111 @@
+# src/cli.py
+"""
+Linha de comando do SisPagto, para cargas e consultas sem abrir a aplicação web.
+
+Uso:
+    python -m src.cli importar <pasta> [--blocos LINHAS] [--rejeicoes PASTA]
+    python -m src.cli status
+
+`importar` carrega os CSVs da pasta cujo nome é o de uma tabela (CREDOR.csv,
+PAGTO.csv...; maiúsculas e minúsculas indiferentes), com as mesmas regras da
+página de Upload: sem `--blocos`, todos os arquivos são gravados em uma única
+transação; com `--blocos`, cada arquivo é gravado bloco a bloco. As linhas
+recusadas pelas regras de negócio são salvas em rejeicoes_<TABELA>.csv.
+O banco é o de SISPAGTO_DATABASE_URL (ver src/database.py). Este módulo não
+importa o Streamlit.
+"""
+import argparse
+import os
+import sys
+
+from src.database import inicializar_banco
+from src.estatisticas import estatisticas_tabelas
+from src.importacao import TABELAS_IMPORTACAO, ErroImportacao, importar_csv, importar_lote
+from src.tipagem import ativar_copy_on_write
+
+def localizar_arquivos(pasta):
+    """Mapeia tabela -> caminho dos CSVs da pasta, na ordem das chaves estrangeiras."""
+    encontrados = {}
+    for nome in os.listdir(pasta):
+        tabela, extensao = os.path.splitext(nome)
+        if extensao.lower() == '.csv' and tabela.upper() in TABELAS_IMPORTACAO:
+            encontrados[tabela.upper()] = os.path.join(pasta, nome)
+    return {tabela: encontrados[tabela] for tabela in TABELAS_IMPORTACAO if tabela in encontrados}
+
+def salvar_rejeicoes(resultado, pasta):
+    if not resultado.linhas_rejeitadas:
+        return None
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"rejeicoes_{resultado.tabela}.csv")
+    resultado.rejeicoes.to_csv(caminho, sep=';', decimal=',', index=False, encoding='utf-8-sig')
+    return caminho
+
+def imprimir_resultado(resultado, pasta_rejeicoes):
+    print(f"{resultado.tabela}: {resultado.linhas_lidas} linhas lidas, {resultado.linhas_inseridas} novas, "
+          f"{resultado.linhas_rejeitadas} rejeitadas")
+    caminho = salvar_rejeicoes(resultado, pasta_rejeicoes)
+    if caminho:
+        print(f"  rejeições em {caminho}")
+
+def importar(args):
+    arquivos = localizar_arquivos(args.pasta)
+    if not arquivos:
+        print(f"Nenhum CSV de tabela encontrado em {args.pasta}.", file=sys.stderr)
+        return 1
+    pasta_rejeicoes = args.rejeicoes or args.pasta
+    inicializar_banco()
+
+    if args.blocos:
+        erros = 0
+        for tabela, caminho in arquivos.items():
+            try:
+                with open(caminho, 'rb') as arquivo:
+                    resultado = importar_csv(arquivo, tabela, chunksize=args.blocos)
+                imprimir_resultado(resultado, pasta_rejeicoes)
+            except Exception as e:
+                print(f"Erro ao processar '{tabela}': {e}", file=sys.stderr)
+                erros += 1
+        return 1 if erros else 0
+
+    abertos = {tabela: open(caminho, 'rb') for tabela, caminho in arquivos.items()}
+    try:
+        resultados = importar_lote(abertos)
+    except ErroImportacao as e:
+        for tabela, erro in e.erros.items():
+            print(f"Erro ao processar '{tabela}': {erro}", file=sys.stderr)
+        print("Nenhum dado foi gravado.", file=sys.stderr)
+        return 1
+    finally:
+        for arquivo in abertos.values():
+            arquivo.close()
+    for tabela in arquivos:
+        imprimir_resultado(resultados[tabela], pasta_rejeicoes)
+    return 0
+
+def status(args):
+    inicializar_banco()
+    print(estatisticas_tabelas(TABELAS_IMPORTACAO).to_string())
+    return 0
+
+def main(argv=None):
+    # Opção global do pandas, ligada antes de qualquer DataFrame (ver src/tipagem.py)
+    ativar_copy_on_write()
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Linha de comando do SisPagto.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_importar = comandos.add_parser("importar", help="Importa os CSVs de uma pasta para o banco de dados.")
+    p_importar.add_argument("pasta")
+    p_importar.add_argument("--blocos", type=int, metavar="LINHAS",
+                            help="Grava cada arquivo em blocos deste tamanho, em transações independentes.")
+    p_importar.add_argument("--rejeicoes", metavar="PASTA",
+                            help="Pasta dos relatórios de linhas rejeitadas (padrão: a própria pasta importada).")
+    p_importar.set_defaults(executar=importar)
+
+    p_status = comandos.add_parser("status", help="Mostra linhas, última importação e tamanho de cada tabela.")
+    p_status.set_defaults(executar=status)
+
+    args = parser.parse_args(argv)
+    return args.executar(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
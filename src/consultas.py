@@ -0,0 +1,133 @@
+# src/consultas.py
+"""
+Consultas do relatório de pagamentos executadas no próprio banco de dados.
+
+Os filtros da barra lateral são convertidos em cláusulas WHERE parametrizadas,
+de modo que apenas a página exibida é trazida para o pandas e os totais são
+calculados por agregação SQL.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import select, func
+
+from src.database import get_engine, Base, Pagamento, Credor
+
+# Colunas do relatório que podem ser filtradas por lista de valores, na ordem da cascata
+DIMENSOES_FILTRO = {
+    "Credor": Credor.CREDOR_NOME,
+    "Período": Pagamento.PAGTO_PERIODO,
+    "Tipo de pagamento": Pagamento.PAGTO_TIPO,
+    "Contrato": Pagamento.CONTRATO_N,
+}
+
+@dataclass
+class FiltrosPagamento:
+    data_ini: Optional[date] = None
+    data_fim: Optional[date] = None
+    # Valores selecionados por dimensão (chaves de DIMENSOES_FILTRO)
+    selecoes: dict = field(default_factory=dict)
+
+    def condicoes(self, ate_dimensao=None):
+        """
+        Retorna as condições SQL correspondentes aos filtros. Com `ate_dimensao`,
+        considera apenas o intervalo de datas e as dimensões anteriores a ela na
+        cascata, que é o que determina as opções disponíveis para essa dimensão.
+        """
+        condicoes = []
+        if self.data_ini is not None:
+            condicoes.append(Pagamento.PAGTO_DATA >= self.data_ini)
+        if self.data_fim is not None:
+            condicoes.append(Pagamento.PAGTO_DATA <= self.data_fim)
+        for dimensao, coluna in DIMENSOES_FILTRO.items():
+            if dimensao == ate_dimensao:
+                break
+            valores = self.selecoes.get(dimensao)
+            if not valores:
+                continue
+            if dimensao == "Credor":
+                # Filtra pelo documento para aproveitar o índice de PAGTO.CREDOR_DOC
+                docs = select(Credor.CREDOR_DOC).where(Credor.CREDOR_NOME.in_(list(valores)))
+                condicoes.append(Pagamento.CREDOR_DOC.in_(docs))
+            else:
+                condicoes.append(coluna.in_(list(valores)))
+        return condicoes
+
+def consulta_relatorio_pagamentos(filtros=None, incluir_id=True):
+    """
+    Monta a consulta do relatório de pagamentos (PAGTO + nome do credor) com os
+    filtros aplicados. Com `incluir_id=False`, omite a coluna PAGTO_ID (exportação).
+    """
+    colunas_id = [Pagamento.PAGTO_ID] if incluir_id else []
+    consulta = (
+        select(
+            *colunas_id, Pagamento.PAGTO_DATA.label("Data"), Pagamento.PAGTO_PERIODO.label("Período"),
+            Credor.CREDOR_NOME.label("Credor"), Pagamento.CONTRATO_N.label("Contrato"),
+            Pagamento.PAGTO_TIPO.label("Tipo de pagamento"), Pagamento.PAGTO_VALOR.label("Valor"),
+        )
+        .outerjoin(Credor, Pagamento.CREDOR_DOC == Credor.CREDOR_DOC)
+        .order_by(Pagamento.PAGTO_DATA.desc(), Pagamento.PAGTO_ID.desc())
+    )
+    if filtros is not None:
+        consulta = consulta.where(*filtros.condicoes())
+    return consulta
+
+def carregar_relatorio_pagamentos(filtros=None):
+    """Carrega o relatório completo (ou filtrado), indexado por PAGTO_ID."""
+    return pd.read_sql(consulta_relatorio_pagamentos(filtros), get_engine(), index_col="PAGTO_ID", parse_dates=['Data'])
+
+def carregar_pagina_pagamentos(filtros, limite, offset=0):
+    """Carrega apenas uma página do relatório filtrado, indexada por PAGTO_ID."""
+    consulta = consulta_relatorio_pagamentos(filtros).limit(limite).offset(offset)
+    return pd.read_sql(consulta, get_engine(), index_col="PAGTO_ID", parse_dates=['Data'])
+
+def totais_pagamentos(filtros=None):
+    """Retorna (quantidade, valor total) dos pagamentos que atendem aos filtros."""
+    consulta = (
+        select(func.count(Pagamento.PAGTO_ID), func.coalesce(func.sum(Pagamento.PAGTO_VALOR), 0))
+        .select_from(Pagamento)
+        .outerjoin(Credor, Pagamento.CREDOR_DOC == Credor.CREDOR_DOC)
+    )
+    if filtros is not None:
+        consulta = consulta.where(*filtros.condicoes())
+    with get_engine().connect() as conn:
+        quantidade, total = conn.execute(consulta).one()
+    return quantidade, float(total)
+
+def intervalo_datas():
+    """Retorna (menor, maior) PAGTO_DATA cadastrada, ou (None, None) se não houver pagamentos."""
+    with get_engine().connect() as conn:
+        return tuple(conn.execute(select(func.min(Pagamento.PAGTO_DATA), func.max(Pagamento.PAGTO_DATA))).one())
+
+def opcoes_filtro(dimensao, filtros):
+    """
+    {valor: quantidade de pagamentos} de uma dimensão, em ordem, respeitando os
+    filtros anteriores na cascata (um único GROUP BY no banco).
+    """
+    coluna = DIMENSOES_FILTRO[dimensao]
+    consulta = (
+        select(coluna, func.count())
+        .select_from(Pagamento)
+        .outerjoin(Credor, Pagamento.CREDOR_DOC == Credor.CREDOR_DOC)
+        .where(coluna.is_not(None), *filtros.condicoes(ate_dimensao=dimensao))
+        .group_by(coluna)
+        .order_by(coluna)
+    )
+    with get_engine().connect() as conn:
+        return dict(conn.execute(consulta).all())
+
+def resumo_pagamentos(table_name):
+    """
+    Lê uma tabela de resumo (RESUMO_CREDOR, RESUMO_CONTRATO ou RESUMO_PERIODO),
+    indexada pela sua chave, com as colunas 'Qtd. Pagamentos' e 'Valor Total'.
+    """
+    tabela = Base.metadata.tables[table_name]
+    chave = tabela.primary_key.columns.values()[0]
+    consulta = select(
+        chave, tabela.c.QTD_PAGAMENTOS.label("Qtd. Pagamentos"), tabela.c.VALOR_TOTAL.label("Valor Total")
+    )
+    df = pd.read_sql(consulta, get_engine(), index_col=chave.name)
+    df['Valor Total'] = pd.to_numeric(df['Valor Total'], errors='coerce')
+    return df
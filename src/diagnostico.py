@@ -0,0 +1,149 @@
+# src/diagnostico.py
+"""
+Medições de desempenho mantidas em memória, exibidas na página Diagnóstico.
+
+Três fontes alimentam os registros, que guardam apenas as medições mais recentes:
+- eventos do engine do SQLAlchemy: duração e linhas de cada comando SQL;
+- etapas das páginas (carregar, filtrar, renderizar, exportar...), marcadas com
+  `iniciar_pagina`, `marcar` e `finalizar_pagina`, que também medem a duração
+  total de cada execução (rerun) da página;
+- carregadores em cache declarados com `cache_monitorado`, que contam as
+  chamadas e as faltas (execuções reais) de cada cache.
+
+Os registros são por processo: reúnem todas as sessões abertas no servidor e
+são perdidos ao reiniciá-lo. A instrumentação do engine pode ser desligada com
+SISPAGTO_DIAGNOSTICO=0.
+"""
+import functools
+import os
+import threading
+import time
+from collections import deque, defaultdict
+from datetime import datetime
+
+ATIVO = os.environ.get("SISPAGTO_DIAGNOSTICO", "1") != "0"
+MAX_CONSULTAS = 5_000
+MAX_EXECUCOES = 2_000
+MAX_ETAPAS = 10_000
+TAMANHO_MAXIMO_SQL = 500
+
+_lock = threading.Lock()
+# (momento, página, segundos, linhas, sql)
+consultas = deque(maxlen=MAX_CONSULTAS)
+# (momento, página, segundos)
+execucoes = deque(maxlen=MAX_EXECUCOES)
+# (momento, página, etapa, segundos)
+etapas = deque(maxlen=MAX_ETAPAS)
+# nome do cache -> [chamadas, faltas]
+caches = defaultdict(lambda: [0, 0])
+
+# Página em execução na thread atual (o Streamlit roda cada sessão em sua thread)
+_local = threading.local()
+
+def pagina_atual():
+    return getattr(_local, "pagina", None)
+
+# --- Comandos SQL ---
+
+def _antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_diagnostico_inicio", []).append(time.perf_counter())
+
+def _depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info["_diagnostico_inicio"].pop()
+    segundos = time.perf_counter() - inicio
+    # O sqlite3 só informa rowcount para INSERT/UPDATE/DELETE; o psycopg2 também para SELECT
+    linhas = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    with _lock:
+        consultas.append((datetime.now(), pagina_atual(), segundos, linhas, statement[:TAMANHO_MAXIMO_SQL]))
+
+def _erro_ao_executar(contexto):
+    # Comandos com erro não passam por after_cursor_execute
+    conn = contexto.connection
+    if conn is not None and conn.info.get("_diagnostico_inicio"):
+        conn.info["_diagnostico_inicio"].pop()
+
+def instrumentar_engine(engine):
+    """Registra no engine os eventos que medem cada comando SQL."""
+    if not ATIVO:
+        return
+    from sqlalchemy import event
+    event.listen(engine, "before_cursor_execute", _antes_de_executar)
+    event.listen(engine, "after_cursor_execute", _depois_de_executar)
+    event.listen(engine, "handle_error", _erro_ao_executar)
+
+# --- Etapas das páginas ---
+
+def iniciar_pagina(pagina):
+    """Marca o início de uma execução da página; deve ser a primeira chamada do script."""
+    _local.pagina = pagina
+    _local.inicio = _local.inicio_etapa = time.perf_counter()
+    _local.etapa = None
+
+def _fechar_etapa(agora):
+    if getattr(_local, "etapa", None) is not None:
+        with _lock:
+            etapas.append((datetime.now(), _local.pagina, _local.etapa, agora - _local.inicio_etapa))
+    _local.inicio_etapa = agora
+
+def marcar(etapa):
+    """Encerra a etapa em andamento na página e inicia `etapa`."""
+    if pagina_atual() is None:
+        return
+    _fechar_etapa(time.perf_counter())
+    _local.etapa = etapa
+
+def finalizar_pagina():
+    """Encerra a última etapa e registra a duração total da execução da página."""
+    if pagina_atual() is None:
+        return
+    agora = time.perf_counter()
+    _fechar_etapa(agora)
+    with _lock:
+        execucoes.append((datetime.now(), _local.pagina, agora - _local.inicio))
+    _local.pagina = _local.etapa = None
+
+# --- Caches ---
+
+def cache_monitorado(nome, compartilhado=False, **opcoes):
+    """
+    Equivalente a `st.cache_data(**opcoes)`, contando as chamadas e as faltas
+    (quando a função realmente executa) do cache `nome`.
+
+    Com `compartilhado=True`, usa `st.cache_resource`: todas as sessões recebem
+    o mesmo objeto, sem a cópia (serialização) feita a cada acesso pelo
+    cache_data. Quem chama não pode alterar o resultado.
+    """
+    import streamlit as st
+
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def executar(*args, **kwargs):
+            with _lock:
+                caches[nome][1] += 1
+            return funcao(*args, **kwargs)
+
+        em_cache = (st.cache_resource if compartilhado else st.cache_data)(**opcoes)(executar)
+
+        @functools.wraps(funcao)
+        def chamar(*args, **kwargs):
+            with _lock:
+                caches[nome][0] += 1
+            return em_cache(*args, **kwargs)
+
+        chamar.clear = em_cache.clear
+        return chamar
+    return decorar
+
+# --- Consulta das medições ---
+
+def limpar():
+    with _lock:
+        consultas.clear()
+        execucoes.clear()
+        etapas.clear()
+        caches.clear()
+
+def instantaneo():
+    """Cópia das medições atuais: (consultas, execucoes, etapas, caches)."""
+    with _lock:
+        return list(consultas), list(execucoes), list(etapas), {k: tuple(v) for k, v in caches.items()}
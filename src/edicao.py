@@ -0,0 +1,99 @@
+# src/edicao.py
+"""
+Gravação em lote das alterações feitas nas tabelas editáveis (st.data_editor).
+
+Em vez de um UPDATE por linha, as alterações são agrupadas pelo conjunto de
+colunas alteradas e cada grupo é enviado como um único UPDATE parametrizado
+com várias linhas (executemany), dentro da transação de quem chama.
+"""
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import date, datetime
+
+import pandas as pd
+from sqlalchemy import Date, Integer, Numeric, bindparam, update
+
+from src.database import Base
+from src.leitura_csv import converter_datas
+from src.resumos import atualizando_pagamentos
+from src.versoes import registrar_alteracao, chave_edicoes
+
+def converter_valor(coluna, valor):
+    """
+    Converte o valor vindo do editor para o tipo da coluna. Datas podem vir como
+    texto (DD/MM/AAAA nas tabelas formatadas, ou ISO) e células apagadas como ''.
+    """
+    if valor is None:
+        return None
+    if isinstance(coluna.type, (Date, Integer, Numeric)) and isinstance(valor, str) and valor.strip() in ('', '-'):
+        return None
+    if isinstance(coluna.type, Date):
+        if isinstance(valor, datetime):
+            return valor.date()
+        if isinstance(valor, date):
+            return valor
+        # Mesmos formatos aceitos na importação dos CSVs
+        data = converter_datas(pd.Series([str(valor).strip()], dtype=object)).iloc[0]
+        if pd.isna(data):
+            raise ValueError(f"Data inválida: {valor!r}")
+        return data.date()
+    if isinstance(coluna.type, Integer):
+        return int(valor)
+    if isinstance(coluna.type, Numeric):
+        return float(valor)
+    return valor
+
+def _chave_python(valor):
+    # Índices do pandas chegam como tipos do numpy, que o driver não aceita
+    return valor.item() if hasattr(valor, 'item') else valor
+
+def normalizar_alteracoes(table_name, alteracoes, colunas=None):
+    """
+    Converte as alterações do editor em {chave: {coluna do banco: valor convertido}},
+    sem as colunas desconhecidas nem a chave primária e sem as linhas que ficam sem alteração.
+    """
+    tabela = Base.metadata.tables[table_name]
+    pk = tabela.primary_key.columns.values()[0]
+    normalizadas = {}
+    for chave, mudancas in alteracoes.items():
+        valores = {}
+        for nome, valor in mudancas.items():
+            nome = colunas.get(nome) if colunas is not None else nome
+            if nome is not None and nome in tabela.c and nome != pk.name:
+                valores[nome] = converter_valor(tabela.c[nome], valor)
+        if valores:
+            normalizadas[_chave_python(chave)] = valores
+    return normalizadas
+
+def atualizar_em_lote(conn, table_name, alteracoes, colunas=None):
+    """
+    Aplica as alterações {chave_primária: {coluna: novo_valor}} na tabela.
+
+    `colunas` mapeia o nome exibido no editor para a coluna do banco; sem ele, os
+    nomes já são os das colunas. Colunas desconhecidas são ignoradas. Para PAGTO,
+    as tabelas de resumo são ajustadas na mesma transação. Registra a nova versão
+    de dados da tabela (e o contador de edições, ver `chave_edicoes`) e retorna o
+    número de linhas atualizadas.
+    """
+    tabela = Base.metadata.tables[table_name]
+    pk = tabela.primary_key.columns.values()[0]
+
+    grupos = defaultdict(list)
+    for chave, valores in normalizar_alteracoes(table_name, alteracoes, colunas).items():
+        grupos[tuple(sorted(valores))].append({'_chave': chave, **{f'_{k}': v for k, v in valores.items()}})
+    if not grupos:
+        return 0
+
+    chaves = [p['_chave'] for parametros in grupos.values() for p in parametros]
+    ajuste_resumos = atualizando_pagamentos(conn, chaves) if table_name == 'PAGTO' else nullcontext()
+    atualizadas = 0
+    with ajuste_resumos:
+        for nomes, parametros in grupos.items():
+            stmt = (
+                update(tabela)
+                .where(pk == bindparam('_chave'))
+                .values({nome: bindparam(f'_{nome}') for nome in nomes})
+            )
+            atualizadas += conn.execute(stmt, parametros).rowcount
+    registrar_alteracao(conn, table_name, chave_edicoes(table_name))
+    return atualizadas
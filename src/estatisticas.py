@@ -0,0 +1,110 @@
+# src/estatisticas.py
+"""
+Estatísticas por tabela (linhas, última importação e tamanho em disco).
+
+Ficam em CONTROLE_TABELAS, ao lado da versão de dados (src/versoes.py), e são
+mantidas pelos caminhos de gravação: a importação e os cadastros somam as linhas
+que inserem. Assim o painel de status lê tudo com uma única consulta, sem um
+COUNT(*) por tabela. O tamanho em disco é medido ao fim da importação de cada arquivo.
+
+Para recalcular todas as estatísticas a partir das tabelas (reparo):
+    python -m src.estatisticas
+"""
+from datetime import datetime
+
+from sqlalchemy import select, func, text
+
+from src import fila_escrita
+from src.busca import INDICES_BUSCA
+from src.database import get_engine, inicializar_banco, insert_com_conflito, Base, ControleTabela
+
+# Tabelas internas ou derivadas, cujas linhas não são mantidas por `registrar_linhas`
+# (os resumos mudam a cada pagamento) e que o painel de status não exibe
+SEM_ESTATISTICAS = (
+    'CONTROLE_TABELAS', 'SCHEMA_VERSAO', 'RESUMO_CREDOR', 'RESUMO_CONTRATO', 'RESUMO_PERIODO',
+    'TRABALHO_IMPORTACAO', 'TRABALHO_ARQUIVO',
+)
+# Tabelas internas de um índice FTS5 ("<índice>_data", ...), onde ficam os seus dados
+SUFIXOS_FTS5 = ('_data', '_idx', '_content', '_docsize', '_config')
+
+def _gravar(conn, table_name, inserir, atualizar):
+    stmt = insert_com_conflito(conn, ControleTabela.__table__).values(TABELA=table_name, VERSAO=0, **inserir)
+    conn.execute(stmt.on_conflict_do_update(index_elements=['TABELA'], set_=atualizar))
+
+def registrar_linhas(conn, table_name, quantidade):
+    """Soma `quantidade` às linhas da tabela (deve rodar na transação da gravação)."""
+    linhas = ControleTabela.__table__.c.LINHAS
+    _gravar(conn, table_name, {'LINHAS': quantidade}, {'LINHAS': func.coalesce(linhas, 0) + quantidade})
+
+def registrar_importacao(conn, table_name):
+    """Registra o horário da importação de um arquivo da tabela e mede o seu novo tamanho."""
+    valores = {'ULTIMA_IMPORTACAO': datetime.now(), 'TAMANHO_BYTES': tamanho_em_disco(conn, table_name)}
+    _gravar(conn, table_name, valores, valores)
+
+def tamanho_em_disco(conn, table_name):
+    """
+    Bytes ocupados pela tabela e seus índices, ou None se o banco não informar.
+    No SQLite depende da tabela virtual dbstat, que nem toda compilação inclui.
+    """
+    try:
+        with conn.begin_nested():
+            return _consultar_tamanho(conn, table_name)
+    except Exception:
+        return None
+
+def _objetos_sqlite(conn, table_name):
+    """
+    Nomes da tabela e dos objetos que ocupam páginas por ela: os seus índices,
+    inclusive os automáticos (sqlite_autoindex_*, da chave primária de texto e
+    das restrições UNIQUE), e as tabelas internas do seu índice de busca.
+    """
+    donos = [table_name] + [
+        indice + sufixo for indice, spec in INDICES_BUSCA.items() if spec['tabela'] == table_name
+        for sufixo in SUFIXOS_FTS5
+    ]
+    parametros = {f'd{i}': nome for i, nome in enumerate(donos)}
+    consulta = text(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'index') "
+        f"AND tbl_name IN ({', '.join(f':{p}' for p in parametros)})"
+    )
+    return conn.execute(consulta, parametros).scalars().all()
+
+def _consultar_tamanho(conn, table_name):
+    if conn.dialect.name == 'sqlite':
+        nomes = _objetos_sqlite(conn, table_name)
+        parametros = {f'n{i}': nome for i, nome in enumerate(nomes)}
+        marcadores = ", ".join(f":{p}" for p in parametros)
+        # aggregate=TRUE soma as páginas de cada objeto sem percorrer as demais tabelas
+        consulta = text(f"SELECT SUM(pgsize) FROM dbstat WHERE aggregate = TRUE AND name IN ({marcadores})")
+        return conn.execute(consulta, parametros).scalar()
+    if conn.dialect.name == 'postgresql':
+        return conn.execute(text("SELECT pg_total_relation_size(:t)"), {'t': f'"{table_name}"'}).scalar()
+    return None
+
+def recalcular_estatisticas(conn, tabelas=None):
+    """Recalcula linhas e tamanho das tabelas informadas (por padrão, as de dados do modelo)."""
+    tabelas = tabelas or [t.name for t in Base.metadata.sorted_tables if t.name not in SEM_ESTATISTICAS]
+    for table_name in tabelas:
+        linhas = conn.execute(select(func.count()).select_from(Base.metadata.tables[table_name])).scalar()
+        valores = {'LINHAS': linhas, 'TAMANHO_BYTES': tamanho_em_disco(conn, table_name)}
+        _gravar(conn, table_name, valores, valores)
+
+def estatisticas_tabelas(tabelas, bind=None):
+    """
+    DataFrame indexado pelo nome da tabela com LINHAS, ULTIMA_IMPORTACAO e
+    TAMANHO_BYTES, lido com uma única consulta. Tabelas sem registro ficam com NaN.
+    """
+    # Importado aqui: as migrações usam este módulo na inicialização do banco, que não precisa do pandas
+    import pandas as pd
+    controle = ControleTabela.__table__
+    consulta = select(
+        controle.c.TABELA, controle.c.LINHAS, controle.c.ULTIMA_IMPORTACAO, controle.c.TAMANHO_BYTES
+    ).where(controle.c.TABELA.in_(list(tabelas)))
+    with (bind or get_engine()).connect() as conn:
+        df = pd.DataFrame(conn.execute(consulta).all(), columns=['TABELA', 'LINHAS', 'ULTIMA_IMPORTACAO', 'TAMANHO_BYTES'])
+    return df.set_index('TABELA').reindex(list(tabelas))
+
+if __name__ == "__main__":
+    inicializar_banco()
+    fila_escrita.executar(recalcular_estatisticas)
+    print("Estatísticas das tabelas recalculadas.")
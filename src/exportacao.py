@@ -0,0 +1,150 @@
+# src/exportacao.py
+"""
+Exportação do relatório de pagamentos em XLSX, CSV ou Parquet.
+
+As linhas são lidas do cursor do banco em lotes e escritas diretamente no
+arquivo de saída, sem montar um DataFrame com o relatório inteiro. Relatórios
+maiores que o limite de linhas são divididos em várias planilhas (XLSX) ou em
+vários arquivos compactados em um .zip (CSV e Parquet).
+"""
+import csv
+import io
+import itertools
+import shutil
+import tempfile
+import zipfile
+from decimal import Decimal
+
+from sqlalchemy import Date, Integer, Numeric
+
+from src.database import get_engine
+from src.consultas import consulta_relatorio_pagamentos
+
+# Linhas lidas do cursor por vez
+TAMANHO_LOTE = 10_000
+# O Excel aceita 1.048.576 linhas por planilha, incluindo o cabeçalho
+LINHAS_POR_PLANILHA = 1_000_000
+# Acima deste número de linhas, CSV e Parquet são divididos em vários arquivos
+LINHAS_POR_ARQUIVO = 1_000_000
+
+FORMATOS = {
+    "xlsx": ("Excel (.xlsx)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV (.csv)", "text/csv"),
+    "parquet": ("Parquet (.parquet)", "application/vnd.apache.parquet"),
+}
+
+def _linhas(consulta):
+    """Executa a consulta em modo streaming, lendo do cursor TAMANHO_LOTE linhas por vez."""
+    with get_engine().connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=TAMANHO_LOTE).execute(consulta)
+        for lote in resultado.partitions():
+            yield from lote
+
+def _partes(linhas, limite):
+    """
+    Divide o iterador de linhas em partes de no máximo `limite` linhas. Sempre
+    produz ao menos uma parte (vazia, se não houver linhas); cada parte deve ser
+    consumida antes de se avançar para a seguinte.
+    """
+    linhas = iter(linhas)
+    primeira = next(linhas, None)
+    if primeira is None:
+        yield iter(())
+        return
+    while primeira is not None:
+        yield itertools.chain([primeira], itertools.islice(linhas, limite - 1))
+        primeira = next(linhas, None)
+
+def _esquema_arrow(colunas):
+    """Esquema Arrow correspondente aos tipos das colunas da consulta."""
+    import pyarrow as pa
+
+    campos = []
+    for coluna in colunas:
+        if isinstance(coluna.type, Date):
+            tipo = pa.date32()
+        elif isinstance(coluna.type, Integer):
+            tipo = pa.int64()
+        elif isinstance(coluna.type, Numeric):
+            tipo = pa.float64()
+        else:
+            tipo = pa.string()
+        campos.append(pa.field(coluna.name, tipo))
+    return pa.schema(campos)
+
+def _escrever_xlsx(colunas, linhas, destino):
+    from openpyxl import Workbook
+
+    # Modo write_only: as linhas são gravadas em disco à medida que chegam
+    workbook = Workbook(write_only=True)
+    for numero, parte in enumerate(_partes(linhas, LINHAS_POR_PLANILHA), start=1):
+        planilha = workbook.create_sheet(title="Pagamentos" if numero == 1 else f"Pagamentos {numero}")
+        planilha.append([c.name for c in colunas])
+        for linha in parte:
+            planilha.append(list(linha))
+    workbook.save(destino)
+
+def _escrever_csv(colunas, linhas, destino):
+    # Mesmo formato aceito pela página de upload: `;` como separador e `,` como decimal
+    texto = io.TextIOWrapper(destino, encoding="utf-8-sig", newline="")
+    escritor = csv.writer(texto, delimiter=";")
+    escritor.writerow([c.name for c in colunas])
+    escritor.writerows(
+        [f"{v:.2f}".replace(".", ",") if isinstance(v, (float, Decimal)) else v for v in linha]
+        for linha in linhas
+    )
+    texto.flush()
+    texto.detach()
+
+def _escrever_parquet(colunas, linhas, destino):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = _esquema_arrow(colunas)
+    linhas = iter(linhas)
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        while lote := list(itertools.islice(linhas, TAMANHO_LOTE)):
+            valores = zip(*lote)
+            escritor.write_table(pa.table({
+                campo.name: pa.array([float(v) if isinstance(v, Decimal) else v for v in coluna], campo.type)
+                for campo, coluna in zip(esquema, valores)
+            }, schema=esquema))
+
+ESCRITORES = {"xlsx": _escrever_xlsx, "csv": _escrever_csv, "parquet": _escrever_parquet}
+
+def exportar_pagamentos(filtros, formato, nome_base="relatorio_pagamentos"):
+    """
+    Gera o arquivo do relatório de pagamentos filtrado no formato informado.
+    Retorna (nome_do_arquivo, tipo_mime, arquivo), onde `arquivo` é um arquivo
+    temporário posicionado no início.
+    """
+    consulta = consulta_relatorio_pagamentos(filtros, incluir_id=False)
+    colunas = list(consulta.selected_columns)
+    escrever = ESCRITORES[formato]
+    linhas = _linhas(consulta)
+
+    if formato == "xlsx":
+        # A divisão em várias planilhas é feita dentro do próprio arquivo
+        saida = tempfile.TemporaryFile()
+        escrever(colunas, linhas, saida)
+        nome, mime = f"{nome_base}.xlsx", FORMATOS[formato][1]
+    else:
+        partes = []
+        for parte in _partes(linhas, LINHAS_POR_ARQUIVO):
+            arquivo = tempfile.TemporaryFile()
+            escrever(colunas, parte, arquivo)
+            partes.append(arquivo)
+        if len(partes) == 1:
+            saida = partes[0]
+            nome, mime = f"{nome_base}.{formato}", FORMATOS[formato][1]
+        else:
+            saida = tempfile.TemporaryFile()
+            with zipfile.ZipFile(saida, "w", compression=zipfile.ZIP_DEFLATED) as pacote:
+                for numero, arquivo in enumerate(partes, start=1):
+                    arquivo.seek(0)
+                    with pacote.open(f"{nome_base}_{numero:03d}.{formato}", "w") as entrada:
+                        shutil.copyfileobj(arquivo, entrada)
+                    arquivo.close()
+            nome, mime = f"{nome_base}.zip", "application/zip"
+    saida.seek(0)
+    return nome, mime, saida
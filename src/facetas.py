@@ -0,0 +1,86 @@
+# src/facetas.py
+"""
+Índice de facetas dos filtros em cascata do relatório de pagamentos.
+
+Montado uma vez a partir do relatório compacto (src/tipagem.py), guarda para
+cada dimensão de DIMENSOES_FILTRO os valores distintos em ordem alfabética e,
+por linha, o código do valor (posição nessa lista; 0 para nulos). A cada
+execução da página, as opções de uma dimensão e suas quantidades saem de um
+np.bincount dos códigos das linhas que passam pelos filtros anteriores, e cada
+seleção vira uma consulta a uma tabela de booleanos por código, sem varrer
+textos nem reordenar valores.
+
+O índice acompanha o DataFrame de onde foi montado: as páginas o guardam em
+cache com as mesmas versões de dados (src/versoes.py), e uma alteração em
+pagamentos ou credores gera um novo índice.
+"""
+import numpy as np
+import pandas as pd
+
+from src.consultas import DIMENSOES_FILTRO
+
+class IndiceFacetas:
+    def __init__(self, df, dimensoes=tuple(DIMENSOES_FILTRO)):
+        self.linhas = len(df)
+        self.datas = df['Data'].to_numpy()
+        self.valores = {}
+        self.posicoes = {}
+        self.codigos = {}
+        self.totais = {}
+        for dimensao in dimensoes:
+            valores, codigos = self._codificar(df[dimensao])
+            self.valores[dimensao] = valores
+            self.posicoes[dimensao] = {valor: codigo for codigo, valor in enumerate(valores, start=1)}
+            self.codigos[dimensao] = codigos
+            self.totais[dimensao] = np.bincount(codigos, minlength=len(valores) + 1)
+
+    @staticmethod
+    def _codificar(serie):
+        """Retorna (valores distintos ordenados, código por linha com 0 para nulos)."""
+        if not isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype('category')
+        categorias = serie.cat.categories
+        # Renumera os códigos das categorias na ordem alfabética, deslocados de 1
+        ordem = np.argsort(categorias.to_numpy(dtype=str), kind='stable')
+        nova_posicao = np.empty(len(categorias) + 1, dtype=np.int32)
+        nova_posicao[0] = 0
+        nova_posicao[ordem + 1] = np.arange(1, len(categorias) + 1, dtype=np.int32)
+        codigos = nova_posicao[serie.cat.codes.to_numpy().astype(np.int32) + 1]
+        return categorias[ordem].tolist(), codigos
+
+    def mascara_datas(self, inicio=None, fim=None):
+        """Linhas com Data no intervalo (inclusive); None quando não há restrição."""
+        if inicio is None and fim is None:
+            return None
+        mascara = np.ones(self.linhas, dtype=bool)
+        if inicio is not None:
+            mascara &= self.datas >= np.datetime64(pd.Timestamp(inicio))
+        if fim is not None:
+            mascara &= self.datas <= np.datetime64(pd.Timestamp(fim))
+        return mascara
+
+    def contagens(self, dimensao, mascara=None):
+        """{valor: quantidade de linhas} da dimensão entre as linhas da máscara, em ordem alfabética."""
+        if mascara is None:
+            quantidades = self.totais[dimensao]
+        else:
+            quantidades = np.bincount(self.codigos[dimensao][mascara], minlength=len(self.valores[dimensao]) + 1)
+        return {
+            valor: int(quantidade)
+            for valor, quantidade in zip(self.valores[dimensao], quantidades[1:]) if quantidade
+        }
+
+    def restringir(self, mascara, dimensao, selecionados):
+        """Aplica à máscara a seleção de valores de uma dimensão (sem seleção, não restringe)."""
+        if not selecionados:
+            return mascara
+        posicoes = self.posicoes[dimensao]
+        aceitos = np.zeros(len(posicoes) + 1, dtype=bool)
+        aceitos[[posicoes[valor] for valor in selecionados if valor in posicoes]] = True
+        selecao = aceitos[self.codigos[dimensao]]
+        return selecao if mascara is None else mascara & selecao
+
+    @staticmethod
+    def filtrar(df, mascara):
+        """Linhas do DataFrame (o mesmo de onde o índice foi montado) selecionadas pela máscara."""
+        return df if mascara is None else df[mascara]
@@ -0,0 +1,180 @@
+# src/fila_escrita.py
+"""
+Fila única de gravações do processo, para que as sessões não disputem o banco.
+
+No SQLite só uma transação de escrita pode estar aberta por vez: com vários
+usuários salvando formulários e edições ao mesmo tempo, cada um na sua
+conexão, as transações esperam umas pelas outras e, sob carga ou durante uma
+importação, falham com "database is locked". Aqui todas as gravações do
+processo são entregues a uma única thread gravadora:
+- cada gravação é uma função que recebe a conexão e executa os seus comandos;
+- quando há gravações acumuladas, as que chegam dentro de JANELA_AGRUPAMENTO
+  segundos são reunidas em uma só transação (até MAX_GRAVACOES_POR_TRANSACAO),
+  trocando vários commits (e fsyncs) por um; uma gravação sozinha na fila é
+  feita sem espera;
+- se o banco estiver bloqueado por outro processo (o trabalhador de
+  importação, a linha de comando), a transação é desfeita e repetida com
+  espera crescente, até TENTATIVAS vezes; esgotadas as tentativas, falha só a
+  gravação que recebeu o erro, e as demais são refeitas sem ela;
+- cada chamador recebe o seu próprio resultado ou erro: uma gravação que
+  falha (com qualquer exceção, inclusive KeyboardInterrupt ou SystemExit) é
+  retirada da transação, que é refeita apenas com as demais. Um erro que não
+  pode ser atribuído a uma gravação (no commit, por exemplo) faz cada uma ser
+  refeita sozinha antes de desistir.
+
+Os resultados só são entregues depois do commit. Como uma transação pode ser
+repetida, as funções não devem ter efeitos fora do banco que não possam ser
+refeitos; ajustes em memória (por exemplo, o índice de contratos) ficam para
+depois do retorno de `executar`.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from sqlalchemy.exc import OperationalError
+
+from src.database import get_engine
+
+JANELA_AGRUPAMENTO = 0.005
+MAX_GRAVACOES_POR_TRANSACAO = 50
+TENTATIVAS = 6
+ESPERA_INICIAL = 0.05
+ESPERA_MAXIMA = 2.0
+
+def banco_bloqueado(erro):
+    """Indica se o erro é de bloqueio do banco (SQLITE_BUSY/SQLITE_LOCKED), que vale repetir."""
+    return isinstance(erro, OperationalError) and "locked" in str(erro.orig).lower()
+
+class _GravacaoComErro(Exception):
+    """Erro de uma gravação do lote, que desfaz a transação sem ser repetido."""
+    def __init__(self, futuro, erro):
+        super().__init__(erro)
+        self.futuro = futuro
+        self.erro = erro
+
+class FilaEscrita:
+    def __init__(self, bind=None):
+        # Sem bind, usa o engine da aplicação, resolvido só na primeira gravação
+        self._bind = bind
+        self._pendentes = deque()
+        self._condicao = threading.Condition()
+        self._thread = None
+        # transações, gravações, repetições por bloqueio e gravações com erro
+        self.contadores = {'transacoes': 0, 'gravacoes': 0, 'repeticoes': 0, 'erros': 0}
+
+    @property
+    def bind(self):
+        return self._bind or get_engine()
+
+    def enviar(self, funcao):
+        """Enfileira `funcao(conn)` e retorna um Future com o seu resultado."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Gravação enfileirada de dentro de outra gravação da fila.")
+        futuro = Future()
+        with self._condicao:
+            # Também recria a thread se ela tiver terminado por um erro inesperado
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._gravar, name="fila_escrita", daemon=True)
+                self._thread.start()
+            self._pendentes.append((funcao, futuro))
+            self._condicao.notify()
+        return futuro
+
+    def executar(self, funcao):
+        """Grava `funcao(conn)` pela fila e retorna o seu resultado (ou relança o seu erro)."""
+        return self.enviar(funcao).result()
+
+    def _proximo_lote(self):
+        with self._condicao:
+            while not self._pendentes:
+                self._condicao.wait()
+            agrupar = len(self._pendentes) > 1
+        # Com gravações acumuladas (sessões gravando ao mesmo tempo), dá às que chegam
+        # juntas a chance de entrar na mesma transação; uma gravação sozinha não espera
+        if agrupar:
+            time.sleep(JANELA_AGRUPAMENTO)
+        with self._condicao:
+            quantidade = min(len(self._pendentes), MAX_GRAVACOES_POR_TRANSACAO)
+            return [self._pendentes.popleft() for _ in range(quantidade)]
+
+    def _gravar(self):
+        while True:
+            lote = [(funcao, futuro) for funcao, futuro in self._proximo_lote() if futuro.set_running_or_notify_cancel()]
+            if not lote:
+                continue
+            try:
+                self._gravar_lote(lote)
+            except BaseException as e:
+                # Falha da própria fila: os chamadores recebem o erro e a thread continua
+                pendentes = [futuro for _, futuro in lote if not futuro.done()]
+                for futuro in pendentes:
+                    futuro.set_exception(e)
+                self.contadores['erros'] += len(pendentes)
+
+    def _gravar_lote(self, lote):
+        tentativa = 0
+        while lote:
+            # Gravação em execução quando a transação falhou (None: no begin ou no commit)
+            atual = None
+            try:
+                with self.bind.begin() as conn:
+                    resultados = []
+                    for funcao, futuro in lote:
+                        atual = futuro
+                        resultados.append(self._chamar(funcao, futuro, conn))
+                    atual = None
+            except _GravacaoComErro as falha:
+                # O lote inteiro foi desfeito: é refeito sem a gravação que falhou
+                falha.futuro.set_exception(falha.erro)
+                self.contadores['erros'] += 1
+                lote = [(funcao, futuro) for funcao, futuro in lote if futuro is not falha.futuro]
+                continue
+            except Exception as e:
+                tentativa += 1
+                if not banco_bloqueado(e) or tentativa >= TENTATIVAS:
+                    if atual is not None and len(lote) > 1:
+                        # Falha apenas a gravação que recebeu o erro; as demais recomeçam sem ela
+                        atual.set_exception(e)
+                        self.contadores['erros'] += 1
+                        lote = [(funcao, futuro) for funcao, futuro in lote if futuro is not atual]
+                        tentativa = 0
+                        continue
+                    if len(lote) > 1:
+                        # Erro sem gravação responsável: cada uma é refeita sozinha
+                        for gravacao in lote:
+                            self._gravar_lote([gravacao])
+                        return
+                    lote[0][1].set_exception(e)
+                    self.contadores['erros'] += 1
+                    return
+                self.contadores['repeticoes'] += 1
+                espera = min(ESPERA_INICIAL * 2 ** (tentativa - 1), ESPERA_MAXIMA)
+                time.sleep(espera * random.uniform(0.5, 1.5))
+                continue
+            self.contadores['transacoes'] += 1
+            self.contadores['gravacoes'] += len(lote)
+            for (_, futuro), resultado in zip(lote, resultados):
+                futuro.set_result(resultado)
+            return
+
+    @staticmethod
+    def _chamar(funcao, futuro, conn):
+        try:
+            return funcao(conn)
+        except BaseException as e:
+            if banco_bloqueado(e):
+                raise
+            raise _GravacaoComErro(futuro, e) from e
+
+    def estatisticas(self):
+        """Contadores da fila e o número de gravações aguardando, para a página Diagnóstico."""
+        with self._condicao:
+            return {**self.contadores, 'pendentes': len(self._pendentes)}
+
+fila = FilaEscrita()
+
+def executar(funcao):
+    """Grava `funcao(conn)` pela fila do processo e retorna o seu resultado."""
+    return fila.executar(funcao)
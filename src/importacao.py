@@ -0,0 +1,283 @@
+# src/importacao.py
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, MetaData, Table, and_, delete, exists, insert, select
+
+from src import fila_escrita
+from src.business_rules import VALIDADORES_LOTE
+from src.database import Base
+from src.estatisticas import registrar_linhas, registrar_importacao
+from src.leitura_csv import ler_texto, tipar
+from src.resumos import acumular_origem
+from src.versoes import registrar_alteracao
+
+# Quantidade de linhas lidas do CSV por bloco no modo de importação em blocos.
+TAMANHO_BLOCO_PADRAO = 50_000
+# Tabelas que podem ser carregadas a partir de CSV, na ordem das chaves estrangeiras
+TABELAS_IMPORTACAO = (
+    'CREDOR', 'PRODUTOS_SERVICOS', 'LISTA_ITENS', 'CONTRATO', 'ADITIVOS',
+    'NF', 'RECIBO', 'FATURA', 'BOLETO', 'PAGTO',
+)
+
+@dataclass
+class ResultadoImportacao:
+    tabela: str
+    linhas_lidas: int = 0
+    linhas_inseridas: int = 0
+    blocos: int = 0
+    # Linhas recusadas pelas regras de negócio: número da linha no arquivo, motivo e valores
+    rejeicoes: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=['Linha', 'Motivo']))
+
+    @property
+    def linhas_rejeitadas(self):
+        return len(self.rejeicoes)
+
+class ErroImportacao(Exception):
+    """Falha em um ou mais arquivos de uma importação em lote; `erros` mapeia tabela -> exceção."""
+
+    def __init__(self, erros):
+        self.erros = erros
+        detalhes = "; ".join(f"{tabela}: {erro}" for tabela, erro in erros.items())
+        super().__init__(f"Importação cancelada, nenhum dado foi gravado ({detalhes})")
+
+def preparar_dataframe(df, table_name):
+    """
+    Converte o DataFrame lido do CSV para os tipos da tabela (src/leitura_csv.py:
+    remoção de espaços e aspas simples, correção do nome de coluna CONTRATO_LALOR)
+    e, em PAGTO, deriva o PAGTO_TIPO dos documentos informados.
+    Retorna (DataFrame, Series com as células inválidas de cada linha).
+    """
+    df, invalidas = tipar(df, table_name)
+
+    # --- Lógica para determinar o PAGTO_TIPO automaticamente ---
+    if table_name == 'PAGTO':
+        if 'NF_N' in df.columns:
+            df = df.assign(NF_N=df['NF_N'].str.lower())
+        # Condições e tipos de pagamento correspondentes, na ordem de prioridade
+        doc_cols = {'NF_N': 'Nota Fiscal', 'RECIBO_N': 'Recibo', 'FATURA_N': 'Fatura', 'BOLETO_N': 'Boleto'}
+        conditions = [df[col].notna().to_numpy() for col in doc_cols if col in df.columns]
+        choices = [tipo for col, tipo in doc_cols.items() if col in df.columns]
+        df = df.assign(PAGTO_TIPO=np.select(conditions, choices, default='Outro') if conditions else 'Outro')
+    return df, invalidas
+
+def ler_csv(arquivo, chunksize=None):
+    """
+    Lê o CSV no formato exportado pelo sistema (`;` como separador), com todas as
+    colunas como texto; os tipos são aplicados por `preparar_dataframe`. Com
+    `chunksize`, retorna um iterador de blocos em vez do arquivo inteiro.
+    """
+    return ler_texto(arquivo, chunksize)
+
+def datas_iso(serie):
+    """Converte uma coluna datetime64 em textos AAAA-MM-DD (None nos nulos)."""
+    textos = serie.to_numpy(dtype='datetime64[D]').astype(str).astype(object)
+    textos[serie.isna().to_numpy()] = None
+    return pd.Series(textos, index=serie.index, name=serie.name)
+
+def inserir_novos_registros(df, table_name, conn):
+    """
+    Insere no banco apenas as linhas cujas chaves primárias ainda não existem.
+
+    As linhas são gravadas primeiro em uma tabela temporária de preparação e a
+    deduplicação é feita pelo próprio banco: as chaves que já existem são removidas
+    da preparação (anti-join) e o restante é copiado com um único INSERT ... SELECT.
+    Assim o custo depende apenas do
+    tamanho do lote, e não do histórico da tabela. Para PAGTO, os totais das
+    linhas novas também são somados às tabelas de resumo. Retorna o número de linhas inseridas.
+    """
+    tabela = Base.metadata.tables[table_name]
+    colunas = [c.name for c in tabela.columns if c.name in df.columns]
+    pk_cols = [c.name for c in tabela.primary_key.columns if c.name in df.columns]
+    # Datas gravadas como texto AAAA-MM-DD, o formato das demais gravações no SQLite
+    df_final = df[colunas].assign(**{
+        col: datas_iso(df[col]) for col in colunas if pd.api.types.is_datetime64_any_dtype(df[col])
+    })
+
+    if df_final.empty:
+        return 0
+    if pk_cols:
+        df_final = df_final.drop_duplicates(subset=pk_cols)
+
+    preparacao = _criar_tabela_preparacao(tabela, colunas, conn)
+    try:
+        with warnings.catch_warnings():
+            # O pandas procura o nome apenas no esquema principal e não enxerga a tabela temporária
+            warnings.filterwarnings('ignore', message='The provided table name')
+            df_final.to_sql(preparacao.name, conn, if_exists='append', index=False)
+
+        # --- Lógica Anti-Duplicidade ---
+        # Sem chave primária no arquivo não há como identificar duplicatas: tudo é inserido
+        if pk_cols:
+            # Remove da preparação as chaves que já existem no banco (anti-join),
+            # deixando nela exatamente as linhas novas
+            ja_existe = exists().where(and_(*(tabela.c[col] == preparacao.c[col] for col in pk_cols)))
+            conn.execute(delete(preparacao).where(ja_existe))
+
+        origem = select(*(preparacao.c[col] for col in colunas))
+        inseridas = conn.execute(insert(tabela).from_select(colunas, origem)).rowcount
+        if inseridas:
+            registrar_alteracao(conn, table_name)
+            registrar_linhas(conn, table_name, inseridas)
+            if table_name == 'PAGTO':
+                acumular_origem(conn, preparacao)
+        return inseridas
+    finally:
+        preparacao.drop(conn)
+
+def separar_rejeitadas(df, table_name, conn, invalidas=None):
+    """
+    Aplica ao DataFrame as validações em lote da tabela (src/business_rules.py).
+    As linhas com células inválidas (`invalidas`, de `preparar_dataframe`) são
+    rejeitadas com essa descrição e não passam pelas validações.
+    Retorna (linhas aceitas, relatório das linhas rejeitadas). O número da linha
+    no relatório considera o cabeçalho do CSV como linha 1.
+    """
+    validador = VALIDADORES_LOTE.get(table_name)
+    sem_invalidas = invalidas is None or not (invalidas != '').any()
+    if df.empty or (validador is None and sem_invalidas):
+        return df, pd.DataFrame(columns=['Linha', 'Motivo'])
+    motivos = pd.Series('', index=df.index, dtype=object) if invalidas is None else invalidas
+    if validador is not None:
+        validas = motivos == ''
+        if validas.all():
+            motivos = validador(df, conn)
+        elif validas.any():
+            motivos = motivos.where(~validas, validador(df[validas], conn).reindex(df.index))
+    rejeitadas = motivos != ''
+    relatorio = df[rejeitadas].copy()
+    relatorio.insert(0, 'Motivo', motivos[rejeitadas])
+    relatorio.insert(0, 'Linha', df.index[rejeitadas] + 2)
+    return df[~rejeitadas], relatorio.reset_index(drop=True)
+
+def _criar_tabela_preparacao(tabela, colunas, conn):
+    """Cria a tabela temporária (visível só nesta conexão) que recebe o lote a importar."""
+    preparacao = Table(
+        f"_PREP_{tabela.name}", MetaData(),
+        *(Column(col, tabela.c[col].type) for col in colunas),
+        prefixes=['TEMPORARY'],
+    )
+    preparacao.drop(conn, checkfirst=True)
+    preparacao.create(conn)
+    return preparacao
+
+def importar_csv(arquivo, table_name, chunksize=None, progresso=None, retomar=None, checkpoint=None):
+    """
+    Importa um arquivo CSV para a tabela informada.
+
+    Sem `chunksize`, o arquivo é lido inteiro e gravado em uma única transação.
+    Com `chunksize`, o arquivo é lido em blocos de tamanho fixo: cada bloco é
+    limpo, deduplicado e gravado em uma transação separada, de modo que o uso de
+    memória não cresce com o tamanho do arquivo. Os blocos passam pela fila de
+    escrita (src/fila_escrita.py), intercalados com as gravações das outras
+    sessões. `progresso`, se informado, é chamado após cada bloco com
+    (fração_lida, resultado). As linhas recusadas
+    pelas regras de negócio não são gravadas e ficam em `resultado.rejeicoes`.
+
+    Para continuar uma importação interrompida, `retomar` é o resultado dos
+    blocos já gravados: esses blocos são lidos e descartados e a contagem segue
+    a partir dele. `checkpoint`, se informado, é chamado dentro da transação de
+    cada bloco com (conn, resultado, rejeitadas), para que o registro do
+    progresso seja confirmado junto com os dados do bloco.
+    """
+    resultado = retomar or ResultadoImportacao(tabela=table_name)
+    blocos_gravados = resultado.blocos
+    tamanho_total = getattr(arquivo, 'size', None)
+    rejeicoes = []
+
+    blocos = ler_csv(arquivo, chunksize) if chunksize else [ler_csv(arquivo)]
+    for numero, bloco in enumerate(blocos):
+        if numero < blocos_gravados:
+            continue
+        bloco, invalidas = preparar_dataframe(bloco, table_name)
+
+        def gravar_bloco(conn):
+            # Sobre uma cópia do resultado: a fila de escrita pode repetir a transação
+            gravado = replace(resultado, linhas_lidas=resultado.linhas_lidas + len(bloco), blocos=resultado.blocos + 1)
+            aceitas, rejeitadas = separar_rejeitadas(bloco, table_name, conn, invalidas)
+            gravado.linhas_inseridas += inserir_novos_registros(aceitas, table_name, conn)
+            if checkpoint is not None:
+                checkpoint(conn, gravado, rejeitadas)
+            return gravado, rejeitadas
+
+        resultado, rejeitadas = fila_escrita.executar(gravar_bloco)
+        if not rejeitadas.empty:
+            rejeicoes.append(rejeitadas)
+
+        if progresso is not None:
+            fracao = None
+            if tamanho_total and hasattr(arquivo, 'tell'):
+                fracao = min(arquivo.tell() / tamanho_total, 1.0)
+            progresso(fracao, resultado)
+    fila_escrita.executar(lambda conn: registrar_importacao(conn, table_name))
+    if rejeicoes:
+        resultado.rejeicoes = pd.concat(rejeicoes, ignore_index=True)
+    return resultado
+
+def validar_colunas(df, table_name):
+    """Garante que o arquivo traz todas as colunas obrigatórias da tabela."""
+    tabela = Base.metadata.tables[table_name]
+    obrigatorias = [
+        c.name for c in tabela.columns
+        if not c.nullable and c is not tabela.autoincrement_column
+    ]
+    faltando = [col for col in obrigatorias if col not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes no arquivo: {', '.join(faltando)}")
+
+def ler_e_preparar(arquivo, table_name):
+    """
+    Lê, converte e valida as colunas de um arquivo inteiro, sem tocar no banco.
+    Retorna (DataFrame, células inválidas por linha), como `preparar_dataframe`.
+    """
+    df, invalidas = preparar_dataframe(ler_csv(arquivo), table_name)
+    validar_colunas(df, table_name)
+    return df, invalidas
+
+def importar_lote(arquivos, max_workers=None):
+    """
+    Importa vários arquivos de uma só vez, de forma atômica.
+
+    `arquivos` mapeia o nome da tabela para o arquivo CSV. A leitura e a validação
+    dos arquivos são feitas em paralelo; a gravação segue a ordem das chaves
+    estrangeiras (CREDOR -> CONTRATO -> ADITIVOS -> PAGTO ...) dentro de uma única
+    transação. Se qualquer arquivo falhar, nada é gravado e `ErroImportacao` é lançado;
+    linhas recusadas pelas regras de negócio apenas deixam de ser gravadas e são
+    informadas em `rejeicoes`. Retorna um dicionário tabela -> ResultadoImportacao.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {tabela: executor.submit(ler_e_preparar, arquivo, tabela) for tabela, arquivo in arquivos.items()}
+    dataframes, erros = {}, {}
+    for tabela, futuro in futuros.items():
+        try:
+            dataframes[tabela] = futuro.result()
+        except Exception as e:
+            erros[tabela] = e
+    if erros:
+        raise ErroImportacao(erros)
+
+    ordem = [t.name for t in Base.metadata.sorted_tables if t.name in dataframes]
+    # Tabela em gravação, para identificar o arquivo que falhou
+    atual = [None]
+
+    def gravar(conn):
+        # Os erros saem sem ser embrulhados: os de bloqueio do banco são repetidos pela fila
+        resultados = {}
+        for tabela in ordem:
+            atual[0] = tabela
+            df, invalidas = dataframes[tabela]
+            aceitas, rejeitadas = separar_rejeitadas(df, tabela, conn, invalidas)
+            inseridas = inserir_novos_registros(aceitas, tabela, conn)
+            registrar_importacao(conn, tabela)
+            resultados[tabela] = ResultadoImportacao(
+                tabela=tabela, linhas_lidas=len(df), linhas_inseridas=inseridas, blocos=1, rejeicoes=rejeitadas
+            )
+        return resultados
+
+    try:
+        return fila_escrita.executar(gravar)
+    except Exception as e:
+        raise ErroImportacao({atual[0]: e}) from e
@@ -0,0 +1,31 @@
+# src/inicializacao.py
+"""
+Inicialização do processo da aplicação web.
+
+O Streamlit executa apenas o script da página aberta, de modo que a Home e cada
+página são pontos de entrada; todas chamam `inicializar_processo` antes de
+qualquer outro trabalho. Na primeira chamada do processo ela:
+- ativa o copy-on-write do pandas (src/tipagem.py), opção global, antes que
+  qualquer DataFrame seja criado;
+- cria o banco e aplica as migrações (`garantir_banco`).
+Nas chamadas seguintes não faz nada. A linha de comando e o trabalhador de
+importação ativam o copy-on-write nos seus próprios pontos de entrada.
+"""
+import threading
+
+from src.database import garantir_banco
+from src.tipagem import ativar_copy_on_write
+
+_processo_inicializado = False
+_lock_processo = threading.Lock()
+
+def inicializar_processo():
+    """Prepara o processo para as páginas, uma única vez (ver o docstring do módulo)."""
+    global _processo_inicializado
+    if _processo_inicializado:
+        return
+    with _lock_processo:
+        if not _processo_inicializado:
+            ativar_copy_on_write()
+            garantir_banco()
+            _processo_inicializado = True
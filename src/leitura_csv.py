@@ -0,0 +1,116 @@
+# src/leitura_csv.py
+"""
+Leitura tipada dos CSVs de importação, guiada pelos modelos de src/database.py.
+
+O arquivo é lido inteiramente como texto (sem deixar o pandas adivinhar tipos,
+o que transformava documentos como "00012" em números e colunas com uma célula
+ruim em texto), em colunas de texto do Arrow. Em seguida, cada coluna passa uma
+única vez pela remoção de espaços e aspas simples e é convertida conforme o
+tipo da coluna do modelo:
+- Date: AAAA-MM-DD (formato gravado no banco) ou DD/MM/AAAA;
+- Numeric: número com `,` decimal (e `.` de milhar) ou com `.` decimal; sem
+  vírgula, um valor só com pontos em grupos de milhar ("1.250", "1.250.000")
+  é ambíguo e rejeitado, em vez de lido como 1,25;
+- Integer: como Numeric, mas apenas valores inteiros (Int64, que aceita nulos);
+- String e colunas fora do modelo: texto.
+
+Células que não podem ser convertidas não interrompem a leitura: viram nulas e
+são descritas, por linha, na Series de motivos devolvida junto com os dados,
+para que a importação rejeite apenas essas linhas.
+"""
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import Date, Integer, Numeric
+
+from src.database import Base
+
+# Nomes de coluna corrigidos na leitura (erro de digitação em arquivos antigos)
+RENOMEAR_COLUNAS = {'CONTRATO_LALOR': 'CONTRATO_VALOR'}
+FORMATO_DATA_ALTERNATIVO = '%d/%m/%Y'
+# Número já normalizado para `.` decimal, sem separador de milhar
+PADRAO_NUMERO = r'^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$'
+# Sem vírgula, pontos só em grupos de três dígitos: milhar ("1.250") ou decimal? Rejeitado
+PADRAO_MILHAR_SEM_DECIMAL = r'^[+-]?\d{1,3}(\.\d{3})+$'
+
+def tipo_coluna(coluna):
+    """Classifica uma coluna do modelo em 'data', 'inteiro', 'numero' ou 'texto'."""
+    if isinstance(coluna.type, Date):
+        return 'data'
+    if isinstance(coluna.type, Integer):
+        return 'inteiro'
+    if isinstance(coluna.type, Numeric):
+        return 'numero'
+    return 'texto'
+
+def esquema_csv(table_name):
+    """{coluna: tipo} das colunas da tabela, conforme `tipo_coluna`."""
+    return {coluna.name: tipo_coluna(coluna) for coluna in Base.metadata.tables[table_name].columns}
+
+def ler_texto(arquivo, chunksize=None):
+    """
+    Lê o CSV (`;` como separador) com todas as colunas como texto. Com
+    `chunksize`, retorna um iterador de blocos em vez do arquivo inteiro.
+    """
+    return pd.read_csv(arquivo, sep=';', dtype='string[pyarrow]', chunksize=chunksize)
+
+# --- Conversões (texto já limpo, nulos nas células vazias) ---
+# Feitas com as funções vetorizadas do Arrow, sobre as colunas de texto sem cópia
+
+def limpar_texto(serie):
+    """Remove espaços e aspas simples (usadas para forçar texto em planilhas) e anula células vazias."""
+    texto = pc.utf8_trim(pa.array(serie.array), characters=" '")
+    texto = pc.if_else(pc.equal(texto, ''), pa.scalar(None, pa.string()), texto)
+    return pd.Series(pd.arrays.ArrowStringArray(texto), index=serie.index, name=serie.name)
+
+def converter_numeros(texto):
+    # "1.250,50" -> "1250.50"; sem vírgula, o ponto é o separador decimal, exceto em "1.250"
+    valores = pa.array(texto.array)
+    normalizados = pc.replace_substring(pc.replace_substring(valores, '.', ''), ',', '.')
+    ambiguos = pc.match_substring_regex(valores, PADRAO_MILHAR_SEM_DECIMAL)
+    valores = pc.if_else(pc.match_substring(valores, ','), normalizados, valores)
+    validos = pc.and_not(pc.match_substring_regex(valores, PADRAO_NUMERO), ambiguos)
+    numeros = pc.cast(pc.if_else(validos, valores, pa.scalar(None, pa.string())), pa.float64())
+    return pd.Series(numeros.to_numpy(zero_copy_only=False), index=texto.index, name=texto.name)
+
+def converter_inteiros(texto):
+    numeros = converter_numeros(texto)
+    return numeros.where((numeros == numeros.round()) & (numeros.abs() < 2**63)).astype('Int64')
+
+def converter_datas(texto):
+    # Também usada pelas validações em lote (src/business_rules.py), que podem receber a coluna já convertida
+    if pd.api.types.is_datetime64_any_dtype(texto):
+        return texto.astype('datetime64[ns]')
+    datas = pd.to_datetime(texto, format='ISO8601', errors='coerce')
+    alternativas = texto.notna() & datas.isna()
+    if alternativas.any():
+        datas = datas.where(~alternativas, pd.to_datetime(texto.where(alternativas), format=FORMATO_DATA_ALTERNATIVO, errors='coerce'))
+    return datas.astype('datetime64[ns]')
+
+CONVERSORES = {'data': converter_datas, 'inteiro': converter_inteiros, 'numero': converter_numeros}
+
+def tipar(df, table_name):
+    """
+    Converte um DataFrame lido por `ler_texto` para os tipos da tabela.
+    Retorna (DataFrame convertido, Series com a descrição das células inválidas
+    de cada linha; vazia nas linhas sem problemas).
+    """
+    df = df.rename(columns=RENOMEAR_COLUNAS)
+    esquema = esquema_csv(table_name)
+    colunas = {}
+    motivos = pd.Series('', index=df.index, dtype=object)
+    for nome in df.columns:
+        texto = limpar_texto(df[nome])
+        conversor = CONVERSORES.get(esquema.get(nome))
+        if conversor is None:
+            colunas[nome] = texto
+            continue
+        valores = conversor(texto)
+        invalidas = (texto.notna() & valores.isna()).to_numpy()
+        if invalidas.any():
+            motivos[invalidas] += f"; {nome} inválido ('" + texto[invalidas].astype(object) + "')"
+        colunas[nome] = valores
+    com_motivo = (motivos != '').to_numpy()
+    if com_motivo.any():
+        motivos[com_motivo] = motivos[com_motivo].str.removeprefix('; ')
+    return pd.DataFrame(colunas, index=df.index), motivos
@@ -0,0 +1,161 @@
+# src/migracoes.py
+"""
+Migrações versionadas do esquema do banco de dados.
+
+O `create_all` só cria tabelas ausentes; índices e colunas novos em tabelas que
+já existem precisam ser aplicados por uma migração. Cada migração recebe um
+número de versão sequencial e é executada uma única vez: a versão aplicada fica
+registrada na tabela SCHEMA_VERSAO. As operações devem ser idempotentes, pois em
+um banco novo o `create_all` já terá criado os objetos definidos nos modelos.
+
+Uso pela linha de comando:
+    python -m src.migracoes           # aplica as migrações pendentes
+    python -m src.migracoes --explain # mostra o plano das consultas principais
+"""
+import sys
+from datetime import datetime
+
+from sqlalchemy import inspect, select, func, text
+
+from src.database import get_engine, Base, Pagamento, Credor, VersaoEsquema
+from src.resumos import reconstruir_resumos
+from src.estatisticas import recalcular_estatisticas
+from src.busca import criar_indices_busca, remover_indices_busca
+
+MIGRACOES = []
+
+def migracao(versao, descricao):
+    """Registra a função decorada como a migração de número `versao`."""
+    def registrar(funcao):
+        MIGRACOES.append((versao, descricao, funcao))
+        MIGRACOES.sort(key=lambda m: m[0])
+        return funcao
+    return registrar
+
+# --- Operações auxiliares ---
+
+def criar_indices(conn, table_name, *nomes):
+    """Cria os índices declarados no modelo da tabela, caso ainda não existam."""
+    tabela = Base.metadata.tables[table_name]
+    for indice in tabela.indexes:
+        if indice.name in nomes:
+            indice.create(conn, checkfirst=True)
+
+def adicionar_coluna(conn, table_name, column_name):
+    """Adiciona ao banco uma coluna declarada no modelo, caso ela ainda não exista."""
+    existentes = {c['name'] for c in inspect(conn).get_columns(table_name)}
+    if column_name not in existentes:
+        coluna = Base.metadata.tables[table_name].c[column_name]
+        preparer = conn.dialect.identifier_preparer
+        tipo = coluna.type.compile(dialect=conn.dialect)
+        conn.execute(text(
+            f"ALTER TABLE {preparer.quote(table_name)} ADD COLUMN {preparer.quote(column_name)} {tipo}"
+        ))
+
+# --- Migrações ---
+
+@migracao(1, "Índices para a ordenação e os filtros do relatório de pagamentos")
+def _indices_relatorio(conn):
+    criar_indices(
+        conn, 'PAGTO',
+        'IX_PAGTO_DATA', 'IX_PAGTO_CREDOR_DATA', 'IX_PAGTO_CONTRATO_DATA',
+        'IX_PAGTO_PERIODO_DATA', 'IX_PAGTO_TIPO_DATA',
+    )
+    criar_indices(conn, 'CONTRATO', 'IX_CONTRATO_CREDOR')
+    criar_indices(conn, 'ADITIVOS', 'IX_ADITIVOS_CONTRATO')
+    if conn.dialect.name == 'sqlite':
+        # Atualiza as estatísticas usadas pelo planejador na escolha dos índices
+        conn.execute(text("ANALYZE"))
+
+@migracao(2, "Tabelas de resumo de pagamentos por credor, contrato e período")
+def _resumos_pagamentos(conn):
+    # As tabelas já foram criadas pelo create_all; falta preenchê-las com o histórico
+    reconstruir_resumos(conn)
+
+@migracao(3, "Estatísticas por tabela (linhas, última importação e tamanho) em CONTROLE_TABELAS")
+def _estatisticas_tabelas(conn):
+    for coluna in ('LINHAS', 'ULTIMA_IMPORTACAO', 'TAMANHO_BYTES'):
+        adicionar_coluna(conn, 'CONTROLE_TABELAS', coluna)
+    recalcular_estatisticas(conn)
+
+@migracao(4, "Índices de texto completo (FTS5) para a busca de credores e produtos/serviços")
+def _indices_busca(conn):
+    criar_indices_busca(conn)
+
+@migracao(5, "Índice de PRODUTOS_SERVICOS na ordem do editor paginado de Cadastros")
+def _indice_produtos_descricao(conn):
+    criar_indices(conn, 'PRODUTOS_SERVICOS', 'IX_PRODUTOS_DESCRICAO')
+
+@migracao(6, "Índices de busca ligados às tabelas pela chave primária, e não pelo rowid")
+def _indices_busca_por_chave(conn):
+    # Os índices da migração 4 apontavam para o rowid, que o VACUUM pode renumerar em CREDOR
+    remover_indices_busca(conn)
+    criar_indices_busca(conn)
+
+# --- Execução ---
+
+def versao_atual(conn):
+    """Retorna a última versão de esquema aplicada (0 se nenhuma)."""
+    return conn.execute(select(func.max(VersaoEsquema.VERSAO))).scalar() or 0
+
+def aplicar_migracoes(bind=None):
+    """
+    Aplica, em ordem, as migrações ainda não registradas no banco.
+    Cada migração roda em sua própria transação junto com o registro da versão.
+    Retorna a lista de versões aplicadas.
+    """
+    bind = bind or get_engine()
+    VersaoEsquema.__table__.create(bind, checkfirst=True)
+    aplicadas = []
+    for versao, descricao, funcao in MIGRACOES:
+        with bind.begin() as conn:
+            if versao <= versao_atual(conn):
+                continue
+            funcao(conn)
+            conn.execute(VersaoEsquema.__table__.insert().values(
+                VERSAO=versao, DESCRICAO=descricao, APLICADA_EM=datetime.now()
+            ))
+        aplicadas.append(versao)
+    return aplicadas
+
+# --- Diagnóstico do uso de índices ---
+
+def consultas_monitoradas():
+    """Consultas representativas dos relatórios, usadas para conferir o uso dos índices."""
+    base = (
+        select(Pagamento.PAGTO_ID, Pagamento.PAGTO_DATA, Credor.CREDOR_NOME, Pagamento.PAGTO_VALOR)
+        .outerjoin(Credor, Pagamento.CREDOR_DOC == Credor.CREDOR_DOC)
+        .order_by(Pagamento.PAGTO_DATA.desc())
+    )
+    return {
+        "Relatório completo ordenado por data": base,
+        "Filtro por credor": base.where(Pagamento.CREDOR_DOC == '0'),
+        "Filtro por contrato": base.where(Pagamento.CONTRATO_N == '0'),
+        "Filtro por período": base.where(Pagamento.PAGTO_PERIODO == 'jan/2025'),
+        "Filtro por tipo de pagamento": base.where(Pagamento.PAGTO_TIPO == 'Recibo'),
+    }
+
+def planos_de_consulta(bind=None):
+    """
+    Retorna, para cada consulta monitorada, as linhas do plano de execução
+    (EXPLAIN QUERY PLAN no SQLite, EXPLAIN nos demais bancos).
+    """
+    planos = {}
+    with (bind or get_engine()).connect() as conn:
+        prefixo = "EXPLAIN QUERY PLAN" if conn.dialect.name == 'sqlite' else "EXPLAIN"
+        for descricao, consulta in consultas_monitoradas().items():
+            sql = str(consulta.compile(conn, compile_kwargs={"literal_binds": True}))
+            linhas = conn.execute(text(f"{prefixo} {sql}")).fetchall()
+            planos[descricao] = [str(linha[-1]) for linha in linhas]
+    return planos
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=get_engine())
+    aplicadas = aplicar_migracoes()
+    with get_engine().connect() as conn:
+        print(f"Versão do esquema: {versao_atual(conn)} (aplicadas agora: {aplicadas or 'nenhuma'})")
+    if "--explain" in sys.argv:
+        for descricao, plano in planos_de_consulta().items():
+            print(f"\n{descricao}:")
+            for linha in plano:
+                print(f"  {linha}")
@@ -0,0 +1,260 @@
+# src/relatorio_colunar.py
+"""
+Cópia colunar (Arrow) do relatório de pagamentos, usada no lugar da consulta SQL.
+
+Montar o relatório completo com `pd.read_sql` converte cada linha em objetos
+Python, o que domina o tempo de abertura da página. Aqui o relatório
+(PAGTO, já nos tipos finais) é gravado em arquivos Arrow IPC em PASTA_COLUNAR e
+lido por mapeamento de memória. O mapeamento evita ler os arquivos para um
+buffer próprio (as páginas ficam no cache do sistema operacional), mas o
+DataFrame devolvido não aponta para eles: a conversão para pandas copia as
+colunas (os arquivos são gravados em lotes, e categóricas e centavos são
+arrays novos), e a ordenação de uma cópia com várias partes copia a tabela
+antes disso. O custo da leitura é o dessa conversão, não o do arquivo.
+
+As partes guardam o CREDOR_DOC de cada pagamento; os nomes vêm de um arquivo
+à parte, pequeno (doc -> nome de todos os credores), aplicado na leitura.
+
+O manifesto (manifesto.json) guarda as versões de dados (src/versoes.py) de
+PAGTO e CREDOR com que a cópia foi feita. A cada leitura:
+- versões iguais: a cópia é usada como está;
+- alterações em CREDOR (inclusões ou edições): apenas o arquivo de nomes é refeito;
+- apenas inclusões em PAGTO: as linhas com PAGTO_ID acima do maior já copiado
+  são acrescentadas em uma nova parte;
+- edições de pagamentos ou inclusões que não sejam as de maior PAGTO_ID: as
+  partes são refeitas por completo.
+As versões são lidas antes dos dados, então a cópia nunca é mais antiga que o
+manifesto indica; na dúvida, a próxima leitura a refaz.
+
+Uso pela linha de comando:
+    python -m src.relatorio_colunar   # refaz a cópia a partir do banco
+"""
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import func, select
+
+from src.database import get_engine, ControleTabela, Credor, Pagamento
+from src.tipagem import CATEGORICAS_RELATORIO, DINHEIRO_RELATORIO, compactar
+from src.versoes import chave_edicoes
+
+PASTA_COLUNAR = os.environ.get("SISPAGTO_PASTA_COLUNAR", os.path.join("data", "relatorio_pagamentos"))
+MANIFESTO = "manifesto.json"
+# Muda quando o conteúdo das partes muda: cópias em outro formato são refeitas
+FORMATO = 2
+# Acima deste número de partes, elas são reunidas em um único arquivo ordenado
+MAX_PARTES = 32
+LINHAS_POR_LOTE = 100_000
+
+ESQUEMA = pa.schema([
+    ("PAGTO_ID", pa.int64()),
+    ("Data", pa.timestamp("ns")),
+    ("Período", pa.string()),
+    ("CREDOR_DOC", pa.string()),
+    ("Contrato", pa.string()),
+    ("Tipo de pagamento", pa.string()),
+    ("Valor", pa.float64()),
+])
+ORDEM = [("Data", "descending"), ("PAGTO_ID", "descending")]
+ESQUEMA_CREDORES = pa.schema([("CREDOR_DOC", pa.string()), ("CREDOR_NOME", pa.string())])
+EDICOES_PAGTO = chave_edicoes('PAGTO')
+TABELAS_ORIGEM = ('PAGTO', EDICOES_PAGTO, 'CREDOR')
+
+_lock = threading.Lock()
+
+# --- Manifesto ---
+
+def _caminho(nome):
+    return os.path.join(PASTA_COLUNAR, nome)
+
+def ler_manifesto():
+    try:
+        with open(_caminho(MANIFESTO), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+def _gravar_manifesto(manifesto):
+    temporario = _caminho(f"{MANIFESTO}.{uuid.uuid4().hex}.tmp")
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo)
+    os.replace(temporario, _caminho(MANIFESTO))
+
+def _remover_partes_antigas(manifesto):
+    em_uso = set(manifesto['partes']) | {manifesto['credores'], MANIFESTO}
+    for nome in os.listdir(PASTA_COLUNAR):
+        if nome not in em_uso and not nome.endswith('.tmp'):
+            try:
+                os.remove(_caminho(nome))
+            except OSError:
+                # No Windows, um arquivo ainda mapeado por outra leitura não pode ser removido
+                pass
+
+# --- Gravação ---
+
+def _versoes(conn):
+    controle = ControleTabela.__table__
+    atuais = dict(conn.execute(
+        select(controle.c.TABELA, controle.c.VERSAO).where(controle.c.TABELA.in_(TABELAS_ORIGEM))
+    ).all())
+    return {tabela: atuais.get(tabela, 0) for tabela in TABELAS_ORIGEM}
+
+# Tipo em que cada coluna chega do banco, quando difere do tipo gravado
+TIPOS_ORIGEM = {"Data": pa.date32(), "Valor": None}  # Valor: Numeric chega como Decimal
+
+def consulta_copia():
+    """Pagamentos na ordem do relatório, com o documento do credor no lugar do nome."""
+    return (
+        select(
+            Pagamento.PAGTO_ID, Pagamento.PAGTO_DATA.label("Data"), Pagamento.PAGTO_PERIODO.label("Período"),
+            Pagamento.CREDOR_DOC, Pagamento.CONTRATO_N.label("Contrato"),
+            Pagamento.PAGTO_TIPO.label("Tipo de pagamento"), Pagamento.PAGTO_VALOR.label("Valor"),
+        )
+        .order_by(Pagamento.PAGTO_DATA.desc(), Pagamento.PAGTO_ID.desc())
+    )
+
+def _lote(linhas):
+    arrays = []
+    for campo, valores in zip(ESQUEMA, zip(*linhas)):
+        if campo.name in TIPOS_ORIGEM:
+            arrays.append(pa.array(valores, type=TIPOS_ORIGEM[campo.name]).cast(campo.type))
+        else:
+            arrays.append(pa.array(valores, type=campo.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=ESQUEMA)
+
+def _gravar_credores(conn):
+    """Grava os nomes de todos os credores em um novo arquivo e retorna o seu nome."""
+    linhas = conn.execute(select(Credor.CREDOR_DOC, Credor.CREDOR_NOME)).all()
+    colunas = list(zip(*linhas)) or [(), ()]
+    tabela = pa.table([pa.array(valores, type=campo.type) for campo, valores in zip(ESQUEMA_CREDORES, colunas)], schema=ESQUEMA_CREDORES)
+    nome = f"credores_{uuid.uuid4().hex}.arrow"
+    temporario = _caminho(f"{nome}.tmp")
+    with pa.OSFile(temporario, 'wb') as destino, pa.ipc.new_file(destino, ESQUEMA_CREDORES) as escritor:
+        escritor.write_table(tabela)
+    os.replace(temporario, _caminho(nome))
+    return nome
+
+def _gravar_parte(conn, consulta):
+    """Grava o resultado da consulta em uma nova parte; retorna (nome, linhas, maior PAGTO_ID)."""
+    nome = f"parte_{uuid.uuid4().hex}.arrow"
+    temporario = _caminho(f"{nome}.tmp")
+    linhas, maior_id = 0, None
+    resultado = conn.execution_options(stream_results=True).execute(consulta)
+    try:
+        with pa.OSFile(temporario, 'wb') as destino, pa.ipc.new_file(destino, ESQUEMA) as escritor:
+            for bloco in resultado.partitions(LINHAS_POR_LOTE):
+                lote = _lote(bloco)
+                escritor.write_batch(lote)
+                linhas += lote.num_rows
+                maior_bloco = pc.max(lote.column("PAGTO_ID")).as_py()
+                maior_id = maior_bloco if maior_id is None else max(maior_id, maior_bloco)
+    except BaseException:
+        os.remove(temporario)
+        raise
+    os.replace(temporario, _caminho(nome))
+    return nome, linhas, maior_id
+
+def _novo_manifesto(versoes, partes, linhas, maior_id, credores):
+    return {
+        'formato': FORMATO, 'versoes': versoes, 'partes': partes, 'linhas': linhas, 'max_pagto_id': maior_id,
+        'credores': credores, 'atualizado_em': datetime.now().isoformat(timespec='seconds'),
+    }
+
+def reconstruir(bind=None):
+    """Refaz a cópia inteira a partir do banco e retorna o novo manifesto."""
+    os.makedirs(PASTA_COLUNAR, exist_ok=True)
+    with _lock, (bind or get_engine()).connect() as conn:
+        versoes = _versoes(conn)
+        nome, linhas, maior_id = _gravar_parte(conn, consulta_copia())
+        manifesto = _novo_manifesto(versoes, [nome], linhas, maior_id, _gravar_credores(conn))
+        _gravar_manifesto(manifesto)
+    _remover_partes_antigas(manifesto)
+    return manifesto
+
+def _compactar(manifesto):
+    """Reúne as partes em um único arquivo, na ordem do relatório, sem consultar o banco."""
+    tabela = _ler_partes(manifesto['partes']).sort_by(ORDEM)
+    nome = f"parte_{uuid.uuid4().hex}.arrow"
+    temporario = _caminho(f"{nome}.tmp")
+    with pa.OSFile(temporario, 'wb') as destino, pa.ipc.new_file(destino, ESQUEMA) as escritor:
+        escritor.write_table(tabela, max_chunksize=LINHAS_POR_LOTE)
+    os.replace(temporario, _caminho(nome))
+    return {**manifesto, 'partes': [nome]}
+
+def sincronizar(bind=None):
+    """Coloca a cópia em dia com o banco (acrescentando ou refazendo) e retorna o manifesto."""
+    manifesto = ler_manifesto()
+    if (
+        manifesto is None or manifesto.get('formato') != FORMATO
+        or not all(os.path.exists(_caminho(p)) for p in manifesto['partes'] + [manifesto['credores']])
+    ):
+        return reconstruir(bind)
+
+    with _lock, (bind or get_engine()).connect() as conn:
+        versoes = _versoes(conn)
+        anteriores = manifesto['versoes']
+        if versoes == anteriores:
+            return manifesto
+        if versoes[EDICOES_PAGTO] == anteriores.get(EDICOES_PAGTO):
+            credores = manifesto['credores']
+            if versoes['CREDOR'] != anteriores.get('CREDOR'):
+                # Credores novos ou renomeados não mudam as partes, só os nomes
+                credores = _gravar_credores(conn)
+            partes, total, maior_id = manifesto['partes'], manifesto['linhas'], manifesto['max_pagto_id']
+            novas = 0
+            if versoes['PAGTO'] != anteriores.get('PAGTO'):
+                consulta = consulta_copia()
+                if maior_id is not None:
+                    consulta = consulta.where(Pagamento.PAGTO_ID > maior_id)
+                nome, novas, maior_novo = _gravar_parte(conn, consulta)
+                total = conn.execute(select(func.count()).select_from(Pagamento)).scalar()
+                if novas:
+                    partes, maior_id = partes + [nome], maior_novo
+            # Se alguma inclusão não for a de maior PAGTO_ID, faltariam linhas na cópia
+            if total == manifesto['linhas'] + novas:
+                manifesto = _novo_manifesto(versoes, partes, total, maior_id, credores)
+                if len(partes) > MAX_PARTES:
+                    manifesto = _compactar(manifesto)
+                _gravar_manifesto(manifesto)
+                _remover_partes_antigas(manifesto)
+                return manifesto
+    # Edições de pagamentos ou inclusões fora da ordem de PAGTO_ID
+    return reconstruir(bind)
+
+# --- Leitura ---
+
+def _ler_partes(partes):
+    tabelas = [pa.ipc.open_file(pa.memory_map(_caminho(parte))).read_all() for parte in partes]
+    return pa.concat_tables(tabelas) if tabelas else ESQUEMA.empty_table()
+
+def _nomes_credores(manifesto):
+    tabela = pa.ipc.open_file(pa.memory_map(_caminho(manifesto['credores']))).read_all()
+    return pd.Series(tabela.column("CREDOR_NOME").to_numpy(zero_copy_only=False), index=tabela.column("CREDOR_DOC").to_pylist())
+
+def carregar_relatorio_pagamentos(bind=None):
+    """
+    Relatório completo de pagamentos, indexado por PAGTO_ID e na ordem do
+    relatório, lido da cópia colunar (atualizada antes, se necessário), na
+    representação compacta de src/tipagem.py (categóricas e Valor em centavos).
+    """
+    manifesto = sincronizar(bind)
+    tabela = _ler_partes(manifesto['partes'])
+    if len(manifesto['partes']) > 1:
+        tabela = tabela.sort_by(ORDEM)
+    # Os textos são convertidos direto do Arrow em categóricas, sem passar por objetos Python
+    df = tabela.to_pandas(strings_to_categorical=True, split_blocks=True).set_index("PAGTO_ID")
+    # Nome do credor: o mapeamento é feito nas categorias (um por credor), não nas linhas
+    credor = df['CREDOR_DOC'].map(_nomes_credores(manifesto))
+    df = df.drop(columns='CREDOR_DOC')
+    df.insert(2, 'Credor', credor)
+    return compactar(df, CATEGORICAS_RELATORIO, DINHEIRO_RELATORIO)
+
+if __name__ == "__main__":
+    manifesto = reconstruir()
+    print(f"Cópia colunar refeita: {manifesto['linhas']} pagamentos em {PASTA_COLUNAR}.")
@@ -0,0 +1,246 @@
+# src/repositorios.py
+"""
+Acesso aos dados de cadastro sem dependência do Streamlit.
+
+Cada repositório concentra, para uma tabela, a leitura completa, o cadastro de
+um registro e a gravação em lote das alterações, junto com tudo o que essas
+gravações precisam manter coerente na mesma transação: regras de negócio,
+tabelas de resumo, versões de dados, estatísticas e o índice de contratos.
+As páginas e a linha de comando (src/cli.py) usam apenas estas funções.
+As gravações passam pela fila de escrita do processo (src/fila_escrita.py).
+"""
+import pandas as pd
+from sqlalchemy import Numeric, func, insert, select, tuple_
+
+from src import busca, fila_escrita
+from src.business_rules import indice_contratos, validar_data_pagamento, validar_valor_pagamento, validar_datas_contrato
+from src.database import get_engine, Base, Credor, Contrato, ProdutoServico, Pagamento
+from src.edicao import atualizar_em_lote, normalizar_alteracoes
+from src.estatisticas import registrar_linhas
+from src.resumos import acumular
+from src.versoes import registrar_alteracao
+
+class ErroValidacao(ValueError):
+    """Registro recusado por uma regra de negócio; a mensagem é exibível ao usuário."""
+
+def carregar_tabela(table_name, ordem=None):
+    """
+    Carrega uma tabela completa, indexada pela chave primária. As colunas Numeric,
+    que podem chegar como Decimal ou texto, já são convertidas para float.
+    """
+    tabela = Base.metadata.tables[table_name]
+    consulta = select(tabela)
+    if ordem:
+        consulta = consulta.order_by(tabela.c[ordem])
+    df = pd.read_sql(consulta, get_engine(), index_col=tabela.primary_key.columns.values()[0].name)
+    return _numericas_como_float(df, tabela)
+
+def _numericas_como_float(df, tabela):
+    numericas = [c.name for c in tabela.columns if isinstance(c.type, Numeric) and c.name in df.columns]
+    return df.assign(**{c: pd.to_numeric(df[c], errors='coerce') for c in numericas})
+
+def _ler(tabela, consulta):
+    chave = tabela.primary_key.columns.values()[0]
+    with get_engine().connect() as conn:
+        linhas = conn.execute(consulta).all()
+    df = pd.DataFrame(linhas, columns=[c.name for c in tabela.columns]).set_index(chave.name)
+    return _numericas_como_float(df, tabela)
+
+# --- Leitura paginada (editor paginado de Cadastros) ---
+
+def _colunas_ordem(tabela, ordem):
+    """Colunas da ordenação keyset: `ordem` seguida da chave primária, que desempata."""
+    chave = tabela.primary_key.columns.values()[0]
+    return ([tabela.c[ordem]] if ordem and ordem != chave.name else []) + [chave]
+
+def carregar_pagina(table_name, ordem=None, apos=None, tamanho=100, termo=None):
+    """
+    Lê uma janela de `tamanho` registros na ordem de `ordem` (e da chave
+    primária), por paginação keyset: `apos` é o cursor devolvido para a página
+    anterior (None na primeira) e a consulta continua a partir dele pelo índice,
+    sem OFFSET. Com `termo`, apenas os registros encontrados pela busca
+    (src/busca.py). Retorna (DataFrame indexado pela chave primária, cursor da
+    próxima página ou None se esta for a última).
+    """
+    tabela = Base.metadata.tables[table_name]
+    colunas = _colunas_ordem(tabela, ordem)
+    consulta = (
+        select(tabela)
+        .where(*busca.condicoes_busca(table_name, termo, get_engine().dialect.name))
+        .order_by(*colunas)
+        .limit(tamanho + 1)
+    )
+    if apos is not None:
+        consulta = consulta.where(
+            colunas[0] > apos[0] if len(colunas) == 1 else tuple_(*colunas) > tuple_(*apos)
+        )
+    df = _ler(tabela, consulta)
+    if len(df) <= tamanho:
+        return df, None
+    df = df.iloc[:tamanho]
+    # Valores da última linha exibida, já como tipos do Python (hasheáveis, aceitos pelo driver)
+    ultima = df.iloc[-1]
+    proximo = tuple(ultima[c.name] if c.name in df.columns else df.index[-1] for c in colunas)
+    return df, tuple(v.item() if hasattr(v, 'item') else v for v in proximo)
+
+def contar_registros(table_name, termo=None):
+    """Quantidade de registros da tabela (encontrados pela busca, se houver `termo`)."""
+    consulta = select(func.count()).select_from(Base.metadata.tables[table_name]).where(
+        *busca.condicoes_busca(table_name, termo, get_engine().dialect.name)
+    )
+    with get_engine().connect() as conn:
+        return conn.execute(consulta).scalar()
+
+def contratos_do_credor(credor_doc):
+    """Números dos contratos de um credor, em ordem."""
+    consulta = select(Contrato.CONTRATO_N).where(Contrato.CREDOR_DOC == credor_doc).order_by(Contrato.CONTRATO_N)
+    with get_engine().connect() as conn:
+        return conn.execute(consulta).scalars().all()
+
+class Repositorio:
+    modelo = None
+    ordem = None
+
+    @property
+    def tabela(self):
+        return self.modelo.__table__
+
+    def listar(self):
+        return carregar_tabela(self.tabela.name, self.ordem)
+
+    def validar(self, valores):
+        """Lança ErroValidacao se o novo registro violar uma regra de negócio."""
+
+    def _validar_na_transacao(self, conn, valores):
+        """Regras que dependem de dados que outras gravações podem alterar, verificadas na transação do cadastro."""
+
+    def _apos_inserir(self, conn, valores):
+        """Ajustes na mesma transação do cadastro (por exemplo, tabelas de resumo)."""
+
+    def _apos_gravar(self, chaves, contratos=()):
+        """Ajustes após a confirmação da transação (por exemplo, o índice de contratos)."""
+
+    def cadastrar(self, **valores):
+        """Insere um registro e retorna o valor da sua chave primária."""
+        self.validar(valores)
+
+        def gravar(conn):
+            self._validar_na_transacao(conn, valores)
+            chave = conn.execute(insert(self.tabela).values(**valores)).inserted_primary_key[0]
+            self._apos_inserir(conn, valores)
+            registrar_alteracao(conn, self.tabela.name)
+            registrar_linhas(conn, self.tabela.name, 1)
+            return chave
+
+        chave = fila_escrita.executar(gravar)
+        self._apos_gravar([chave], [valores.get('CONTRATO_N')])
+        return chave
+
+    def atualizar(self, alteracoes, colunas=None):
+        """
+        Grava as alterações {chave: {coluna: valor}} em uma única transação (ver
+        src/edicao.py) e retorna o número de linhas atualizadas.
+        """
+        atualizadas = fila_escrita.executar(lambda conn: atualizar_em_lote(conn, self.tabela.name, alteracoes, colunas))
+        self._apos_gravar(list(alteracoes))
+        return atualizadas
+
+class RepositorioCredores(Repositorio):
+    modelo = Credor
+    ordem = 'CREDOR_NOME'
+
+class RepositorioProdutos(Repositorio):
+    modelo = ProdutoServico
+    ordem = 'PROD_SERV_DESCRICAO'
+
+class RepositorioContratos(Repositorio):
+    modelo = Contrato
+
+    def validar(self, valores):
+        if valores.get('CONTRATO_DATA_INI') and valores.get('CONTRATO_DATA_FIM'):
+            valido, mensagem = validar_datas_contrato(valores['CONTRATO_DATA_INI'], valores['CONTRATO_DATA_FIM'])
+            if not valido:
+                raise ErroValidacao(mensagem)
+
+    def _apos_gravar(self, chaves, contratos=()):
+        indice_contratos.atualizar_contratos(chaves)
+
+class RepositorioPagamentos(Repositorio):
+    modelo = Pagamento
+
+    def validar(self, valores, conn=None):
+        for regra, valor in ((validar_data_pagamento, valores['PAGTO_DATA']), (validar_valor_pagamento, valores['PAGTO_VALOR'])):
+            valido, mensagem = regra(valor, valores.get('CONTRATO_N'), conn)
+            if not valido:
+                raise ErroValidacao(mensagem)
+
+    def _validar_na_transacao(self, conn, valores):
+        # O índice em memória (validar) dá a resposta rápida; a confirmação lê o saldo na
+        # própria transação, depois dos pagamentos gravados antes pela fila, inclusive no mesmo lote
+        self.validar(valores, conn)
+
+    def _apos_inserir(self, conn, valores):
+        acumular(conn, [valores])
+
+    def _apos_gravar(self, chaves, contratos=()):
+        # O saldo muda nos contratos de origem e de destino dos pagamentos alterados
+        indice_contratos.atualizar_contratos(contratos)
+
+    def atualizar(self, alteracoes, colunas=None):
+        ids = [int(i) for i in alteracoes]
+
+        def gravar(conn):
+            self._validar_edicoes(conn, normalizar_alteracoes(self.tabela.name, alteracoes, colunas))
+            contratos = set(self._contratos_dos_pagamentos(conn, ids))
+            atualizadas = atualizar_em_lote(conn, self.tabela.name, alteracoes, colunas)
+            contratos.update(self._contratos_dos_pagamentos(conn, ids))
+            return atualizadas, contratos
+
+        atualizadas, contratos = fila_escrita.executar(gravar)
+        self._apos_gravar(ids, contratos)
+        return atualizadas
+
+    @staticmethod
+    def _validar_edicoes(conn, alteracoes):
+        """
+        Aplica as regras de cadastro aos pagamentos editados, antes da gravação: a
+        nova data (ou o novo contrato) deve estar na vigência, e o aumento do valor
+        pago em cada contrato não pode passar do seu saldo.
+        """
+        regras = {'PAGTO_DATA', 'PAGTO_VALOR', 'CONTRATO_N'}
+        ids = [i for i, valores in alteracoes.items() if regras & set(valores)]
+        if not ids:
+            return
+        consulta = select(Pagamento.PAGTO_ID, Pagamento.PAGTO_DATA, Pagamento.PAGTO_VALOR, Pagamento.CONTRATO_N).where(
+            Pagamento.PAGTO_ID.in_(ids)
+        )
+        acrescimos = {}
+        for pagto_id, data, valor, contrato_n in conn.execute(consulta).all():
+            novos = alteracoes[pagto_id]
+            nova_data, novo_valor = novos.get('PAGTO_DATA', data), novos.get('PAGTO_VALOR', valor)
+            novo_contrato = novos.get('CONTRATO_N', contrato_n)
+            if nova_data is not None and ({'PAGTO_DATA', 'CONTRATO_N'} & set(novos)):
+                valido, mensagem = validar_data_pagamento(nova_data, novo_contrato, conn)
+                if not valido:
+                    raise ErroValidacao(f"Pagamento {pagto_id}: {mensagem}")
+            # Variação do valor pago em cada contrato: sai do antigo, entra no novo
+            if contrato_n:
+                acrescimos[contrato_n] = acrescimos.get(contrato_n, 0.0) - float(valor or 0)
+            if novo_contrato:
+                acrescimos[novo_contrato] = acrescimos.get(novo_contrato, 0.0) + float(novo_valor or 0)
+        for contrato_n, acrescimo in acrescimos.items():
+            if acrescimo > 0.005:
+                valido, mensagem = validar_valor_pagamento(acrescimo, contrato_n, conn)
+                if not valido:
+                    raise ErroValidacao(mensagem)
+
+    @staticmethod
+    def _contratos_dos_pagamentos(conn, ids):
+        return conn.execute(
+            select(Pagamento.CONTRATO_N).where(Pagamento.PAGTO_ID.in_(ids), Pagamento.CONTRATO_N.is_not(None)).distinct()
+        ).scalars().all()
+
+credores = RepositorioCredores()
+produtos = RepositorioProdutos()
+contratos = RepositorioContratos()
+pagamentos = RepositorioPagamentos()
@@ -0,0 +1,117 @@
+# src/resumos.py
+"""
+Manutenção incremental das tabelas de resumo de pagamentos.
+
+RESUMO_CREDOR, RESUMO_CONTRATO e RESUMO_PERIODO guardam a quantidade e o valor
+total dos pagamentos por credor, por contrato e por período. Todo caminho que
+grava em PAGTO (cadastro, importação e edição) aplica aqui a diferença que
+provocou, na mesma transação, de modo que os relatórios leem só algumas
+centenas de linhas pré-agregadas.
+
+Para reconstruir os resumos a partir de PAGTO (reparo):
+    python -m src.resumos
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+
+from sqlalchemy import select, func, delete
+
+from src import fila_escrita
+from src.database import inicializar_banco, insert_com_conflito, Pagamento, ResumoCredor, ResumoContrato, ResumoPeriodo
+from src.versoes import registrar_alteracao
+
+# Tabela de resumo -> coluna de PAGTO usada como chave
+RESUMOS = {
+    ResumoCredor.__table__: 'CREDOR_DOC',
+    ResumoContrato.__table__: 'CONTRATO_N',
+    ResumoPeriodo.__table__: 'PAGTO_PERIODO',
+}
+
+COLUNAS_PAGAMENTO = ['CREDOR_DOC', 'CONTRATO_N', 'PAGTO_PERIODO', 'PAGTO_VALOR']
+
+def _somar(conn, tabela, chave, deltas):
+    """Soma os deltas {chave: (quantidade, valor)} aos totais da tabela de resumo."""
+    registros = [
+        {chave: k, 'QTD_PAGAMENTOS': qtd, 'VALOR_TOTAL': float(valor)}
+        for k, (qtd, valor) in deltas.items() if k is not None and (qtd or valor)
+    ]
+    if not registros:
+        return
+    stmt = insert_com_conflito(conn, tabela)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[chave],
+        set_={
+            'QTD_PAGAMENTOS': tabela.c.QTD_PAGAMENTOS + stmt.excluded.QTD_PAGAMENTOS,
+            'VALOR_TOTAL': tabela.c.VALOR_TOTAL + stmt.excluded.VALOR_TOTAL,
+        },
+    )
+    conn.execute(stmt, registros)
+    registrar_alteracao(conn, tabela.name)
+
+def acumular(conn, pagamentos, sinal=1):
+    """
+    Aplica aos resumos uma lista de pagamentos (dicionários com CREDOR_DOC,
+    CONTRATO_N, PAGTO_PERIODO e PAGTO_VALOR). Use `sinal=-1` para retirá-los.
+    """
+    for tabela, chave in RESUMOS.items():
+        deltas = defaultdict(lambda: [0, 0.0])
+        for pagamento in pagamentos:
+            delta = deltas[pagamento.get(chave)]
+            delta[0] += sinal
+            delta[1] += sinal * float(pagamento.get('PAGTO_VALOR') or 0)
+        _somar(conn, tabela, chave, deltas)
+
+def acumular_origem(conn, origem):
+    """
+    Soma aos resumos as linhas de uma tabela ou consulta com as colunas de PAGTO
+    (por exemplo, a tabela de preparação de uma importação). A agregação é feita
+    pelo banco; resumos cuja chave não está presente na origem são ignorados.
+    """
+    if 'PAGTO_VALOR' not in origem.c:
+        return
+    for tabela, chave in RESUMOS.items():
+        if chave not in origem.c:
+            continue
+        consulta = (
+            select(origem.c[chave], func.count(), func.coalesce(func.sum(origem.c.PAGTO_VALOR), 0))
+            .where(origem.c[chave].is_not(None))
+            .group_by(origem.c[chave])
+        )
+        deltas = {k: (qtd, valor) for k, qtd, valor in conn.execute(consulta)}
+        _somar(conn, tabela, chave, deltas)
+
+def _carregar_pagamentos(conn, ids):
+    colunas = [Pagamento.__table__.c[col] for col in COLUNAS_PAGAMENTO]
+    return [dict(linha._mapping) for linha in conn.execute(select(*colunas).where(Pagamento.PAGTO_ID.in_(list(ids))))]
+
+@contextmanager
+def atualizando_pagamentos(conn, ids):
+    """
+    Envolve alterações em pagamentos existentes: retira dos resumos os valores
+    anteriores dos PAGTO_ID informados e soma os valores após a alteração.
+    """
+    antes = _carregar_pagamentos(conn, ids)
+    yield
+    acumular(conn, antes, sinal=-1)
+    acumular(conn, _carregar_pagamentos(conn, ids))
+    for tabela in RESUMOS:
+        # Remove as chaves que ficaram sem pagamentos após a alteração
+        conn.execute(delete(tabela).where(tabela.c.QTD_PAGAMENTOS <= 0))
+
+def reconstruir_resumos(conn):
+    """Recalcula todas as tabelas de resumo a partir de PAGTO."""
+    for tabela, chave in RESUMOS.items():
+        conn.execute(delete(tabela))
+        coluna = Pagamento.__table__.c[chave]
+        origem = (
+            select(coluna, func.count(), func.coalesce(func.sum(Pagamento.PAGTO_VALOR), 0))
+            .where(coluna.is_not(None))
+            .group_by(coluna)
+        )
+        conn.execute(tabela.insert().from_select([chave, 'QTD_PAGAMENTOS', 'VALOR_TOTAL'], origem))
+        registrar_alteracao(conn, tabela.name)
+
+if __name__ == "__main__":
+    inicializar_banco()
+    fila_escrita.executar(reconstruir_resumos)
+    print("Tabelas de resumo reconstruídas.")
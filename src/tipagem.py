@@ -0,0 +1,59 @@
+# src/tipagem.py
+"""
+Representação compacta dos DataFrames mantidos em cache pelas páginas.
+
+- Colunas de texto com poucos valores distintos (credor, período, tipo,
+  contrato) viram categóricas: cada linha guarda apenas um código inteiro.
+- Valores monetários são guardados em centavos, como inteiros (Int64, que
+  aceita nulos), o que também torna as somas exatas. `reais` converte de volta
+  apenas para exibição.
+
+Os DataFrames compactos são compartilhados entre as sessões (st.cache_resource)
+e nunca são alterados: filtros geram novos DataFrames e, com o copy-on-write do
+pandas ativado (uma vez por processo, nos pontos de entrada: ver
+src/inicializacao.py), sem copiar as colunas que não mudam.
+"""
+import numpy as np
+import pandas as pd
+
+# Relatório de pagamentos (src/consultas.py, src/relatorio_colunar.py)
+CATEGORICAS_RELATORIO = ('Período', 'Credor', 'Contrato', 'Tipo de pagamento')
+DINHEIRO_RELATORIO = ('Valor',)
+
+def ativar_copy_on_write():
+    """
+    Ativa o copy-on-write do pandas (padrão a partir do pandas 3.0). A opção é
+    global: vale para todos os módulos e sessões do processo, e por isso é ligada
+    só nos pontos de entrada (`inicializar_processo`, linha de comando e
+    trabalhador de importação), nunca durante uma página.
+    """
+    pd.set_option("mode.copy_on_write", True)
+
+def centavos(serie):
+    """Converte valores em reais (números ou texto numérico) para centavos inteiros."""
+    return (pd.to_numeric(serie, errors='coerce') * 100).round().astype('Int64')
+
+def reais(serie):
+    """Converte centavos para reais (float), com NaN nos nulos."""
+    return pd.Series(serie.to_numpy(dtype='float64', na_value=np.nan) / 100, index=serie.index, name=serie.name)
+
+def compactar(df, categoricas=(), dinheiro=()):
+    """Retorna o DataFrame com as colunas categóricas e monetárias (em centavos) convertidas."""
+    conversoes = {c: 'category' for c in categoricas if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype)}
+    df = df.astype(conversoes) if conversoes else df
+    return df.assign(**{c: centavos(df[c]) for c in dinheiro if c in df.columns})
+
+def para_exibicao(df, dinheiro=(), texto=()):
+    """
+    Cópia para o st.data_editor: dinheiro em reais e as colunas de `texto`
+    categóricas como texto livre (o editor limita categóricas às categorias existentes).
+    """
+    return df.assign(
+        **{c: reais(df[c]) for c in dinheiro if c in df.columns},
+        **{c: df[c].astype(object) for c in texto
+           if c in df.columns and c not in dinheiro and isinstance(df[c].dtype, pd.CategoricalDtype)},
+    )
+
+def memoria(df):
+    """Memória ocupada pelo DataFrame, em bytes, incluindo o conteúdo dos textos."""
+    return int(df.memory_usage(deep=True).sum())
@@ -0,0 +1,307 @@
+# src/trabalhos.py
+"""
+Importações em segundo plano, executadas por um processo trabalhador local.
+
+A página de Upload copia os arquivos enviados para PASTA_TRABALHOS, registra o
+trabalho em TRABALHO_IMPORTACAO / TRABALHO_ARQUIVO e inicia um processo
+independente da sessão (`python -m src.trabalhos <id>`), que grava cada arquivo
+bloco a bloco. O progresso de cada bloco é confirmado na mesma transação dos
+seus dados, de modo que um trabalho interrompido (servidor reiniciado, processo
+encerrado) é retomado a partir do primeiro bloco não gravado, sem repetir nem
+perder linhas.
+
+Enquanto executa, o trabalhador atualiza ATUALIZADO_EM periodicamente; um
+trabalho sem esse sinal de vida há mais de LIMITE_SEM_BATIMENTO segundos é
+considerado interrompido e `retomar_interrompidos` inicia um novo trabalhador
+(a página de Upload faz isso uma vez por processo, com `retomar_uma_vez`).
+
+Uso pela linha de comando:
+    python -m src.trabalhos <id>       # executa (ou retoma) o trabalho <id>
+    python -m src.trabalhos --retomar  # reinicia os trabalhos interrompidos
+"""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import and_, func, insert, or_, select, update
+
+from src import fila_escrita
+from src.database import get_engine, TrabalhoImportacao, ArquivoImportacao
+from src.importacao import TABELAS_IMPORTACAO, TAMANHO_BLOCO_PADRAO, ResultadoImportacao, importar_csv
+from src.tipagem import ativar_copy_on_write
+
+PASTA_TRABALHOS = os.environ.get("SISPAGTO_PASTA_TRABALHOS", os.path.join("data", "importacoes"))
+# Segundos entre os sinais de vida do trabalhador e prazo sem sinal para considerá-lo interrompido
+INTERVALO_BATIMENTO = 5
+LIMITE_SEM_BATIMENTO = 120
+
+PENDENTE, EXECUTANDO, CONCLUIDO, ERRO = 'pendente', 'executando', 'concluido', 'erro'
+ATIVOS = (PENDENTE, EXECUTANDO)
+
+# Processos iniciados por este servidor; consultá-los evita que os encerrados fiquem como zumbis
+_processos = []
+
+def pasta_do_trabalho(trabalho_id):
+    return os.path.join(PASTA_TRABALHOS, str(trabalho_id))
+
+def caminho_rejeicoes(trabalho_id, table_name):
+    """Relatório das linhas rejeitadas de um arquivo do trabalho (existe apenas se houve rejeições)."""
+    return os.path.join(pasta_do_trabalho(trabalho_id), f"rejeicoes_{table_name}.csv")
+
+def _caminho_rejeicoes_bloco(trabalho_id, table_name, bloco):
+    return os.path.join(pasta_do_trabalho(trabalho_id), "blocos", f"rejeicoes_{table_name}_{bloco:06d}.csv")
+
+# --- Criação e início ---
+
+def criar_trabalho(arquivos, tamanho_bloco=TAMANHO_BLOCO_PADRAO, iniciar=True):
+    """
+    Registra um trabalho de importação e retorna o seu número. `arquivos` mapeia
+    o nome da tabela para o arquivo CSV (qualquer objeto com `read`, como os
+    arquivos enviados pelo st.file_uploader), que é copiado para o disco.
+    """
+    agora = datetime.now()
+    trabalho_id = fila_escrita.executar(lambda conn: conn.execute(insert(TrabalhoImportacao).values(
+        SITUACAO=PENDENTE, TAMANHO_BLOCO=tamanho_bloco, CRIADO_EM=agora,
+    )).inserted_primary_key[0])
+    # A cópia dos arquivos é feita fora da transação, sem ocupar a fila de escrita
+    try:
+        pasta = pasta_do_trabalho(trabalho_id)
+        os.makedirs(pasta, exist_ok=True)
+        registros = []
+        for ordem, tabela in enumerate(t for t in TABELAS_IMPORTACAO if t in arquivos):
+            arquivo = arquivos[tabela]
+            if hasattr(arquivo, 'seek'):
+                arquivo.seek(0)
+            caminho = os.path.join(pasta, f"{tabela}.csv")
+            with open(caminho, 'wb') as destino:
+                shutil.copyfileobj(arquivo, destino)
+            registros.append({
+                'TRABALHO_ID': trabalho_id, 'TABELA': tabela, 'ORDEM': ordem, 'CAMINHO': caminho,
+                'SITUACAO': PENDENTE, 'TAMANHO_BYTES': os.path.getsize(caminho),
+            })
+    except Exception as e:
+        fila_escrita.executar(lambda conn: _finalizar(conn, trabalho_id, ERRO, f"Falha ao copiar os arquivos: {e}"))
+        raise
+    fila_escrita.executar(lambda conn: conn.execute(insert(ArquivoImportacao), registros))
+    if iniciar:
+        iniciar_trabalhador(trabalho_id)
+    return trabalho_id
+
+def iniciar_trabalhador(trabalho_id):
+    """Inicia o processo trabalhador em uma sessão própria, que sobrevive ao fim da sessão do navegador."""
+    _processos[:] = [p for p in _processos if p.poll() is None]
+    if os.name == 'nt':
+        opcoes = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS}
+    else:
+        opcoes = {'start_new_session': True}
+    pasta = pasta_do_trabalho(trabalho_id)
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, "trabalhador.log"), 'ab') as log:
+        _processos.append(subprocess.Popen(
+            [sys.executable, '-m', 'src.trabalhos', str(trabalho_id)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log, **opcoes,
+        ))
+
+def retomar_interrompidos():
+    """
+    Inicia um novo trabalhador para cada trabalho pendente ou em execução que
+    está sem sinal de vida há mais de LIMITE_SEM_BATIMENTO segundos. Retorna os números retomados.
+    """
+    limite = datetime.now() - timedelta(seconds=LIMITE_SEM_BATIMENTO)
+    with get_engine().connect() as conn:
+        ids = conn.execute(select(TrabalhoImportacao.TRABALHO_ID).where(_interrompido(limite))).scalars().all()
+    for trabalho_id in ids:
+        iniciar_trabalhador(trabalho_id)
+    return ids
+
+_retomados_no_processo = False
+_lock_retomada = threading.Lock()
+
+def retomar_uma_vez():
+    """
+    Executa `retomar_interrompidos` uma única vez por processo. A página de
+    Upload chama esta função a cada execução do script; depois da primeira, ela
+    não consulta o banco nem inicia trabalhadores (para retomar de novo, use
+    `python -m src.trabalhos --retomar`).
+    """
+    global _retomados_no_processo
+    if _retomados_no_processo:
+        return []
+    with _lock_retomada:
+        if _retomados_no_processo:
+            return []
+        ids = retomar_interrompidos()
+        _retomados_no_processo = True
+        return ids
+
+def _interrompido(limite):
+    t = TrabalhoImportacao
+    return or_(
+        and_(t.SITUACAO == PENDENTE, t.CRIADO_EM < limite),
+        and_(t.SITUACAO == EXECUTANDO, or_(t.ATUALIZADO_EM.is_(None), t.ATUALIZADO_EM < limite)),
+    )
+
+# --- Execução (processo trabalhador) ---
+
+def _assumir(conn, trabalho_id):
+    """Marca o trabalho como em execução; falha se outro trabalhador ativo já o assumiu."""
+    agora = datetime.now()
+    limite = agora - timedelta(seconds=LIMITE_SEM_BATIMENTO)
+    t = TrabalhoImportacao
+    assumido = conn.execute(
+        update(t)
+        .where(t.TRABALHO_ID == trabalho_id, or_(t.SITUACAO == PENDENTE, _interrompido(limite)))
+        .values(SITUACAO=EXECUTANDO, INICIADO_EM=func.coalesce(t.INICIADO_EM, agora), ATUALIZADO_EM=agora)
+    ).rowcount
+    return assumido == 1
+
+def _batimento(conn, trabalho_id):
+    conn.execute(
+        update(TrabalhoImportacao).where(TrabalhoImportacao.TRABALHO_ID == trabalho_id)
+        .values(ATUALIZADO_EM=datetime.now())
+    )
+
+def _batimentos(trabalho_id, parar):
+    while not parar.wait(INTERVALO_BATIMENTO):
+        try:
+            fila_escrita.executar(lambda conn: _batimento(conn, trabalho_id))
+        except Exception:
+            # Banco bloqueado além das tentativas da fila: o checkpoint do próximo bloco também renova o sinal
+            pass
+
+def _finalizar(conn, trabalho_id, situacao, mensagem=None):
+    conn.execute(
+        update(TrabalhoImportacao).where(TrabalhoImportacao.TRABALHO_ID == trabalho_id)
+        .values(SITUACAO=situacao, FINALIZADO_EM=datetime.now(), MENSAGEM=mensagem)
+    )
+
+def _atualizar_arquivo(conn, trabalho_id, table_name, **valores):
+    a = ArquivoImportacao
+    conn.execute(update(a).where(a.TRABALHO_ID == trabalho_id, a.TABELA == table_name).values(**valores))
+
+def _juntar_rejeicoes(trabalho_id, table_name, blocos):
+    """Reúne os relatórios de rejeição de cada bloco em um único CSV."""
+    partes = [_caminho_rejeicoes_bloco(trabalho_id, table_name, b) for b in range(1, blocos + 1)]
+    partes = [p for p in partes if os.path.exists(p)]
+    if not partes:
+        return
+    with open(caminho_rejeicoes(trabalho_id, table_name), 'w', encoding='utf-8-sig', newline='') as destino:
+        for i, parte in enumerate(partes):
+            with open(parte, encoding='utf-8', newline='') as origem:
+                if i > 0:
+                    origem.readline()
+                shutil.copyfileobj(origem, destino)
+    for parte in partes:
+        os.remove(parte)
+
+def _importar_arquivo(trabalho_id, arquivo, tamanho_bloco):
+    tabela = arquivo['TABELA']
+    retomar = ResultadoImportacao(
+        tabela=tabela, linhas_lidas=arquivo['LINHAS_LIDAS'], linhas_inseridas=arquivo['LINHAS_INSERIDAS'],
+        blocos=arquivo['BLOCOS_CONCLUIDOS'],
+    )
+    fila_escrita.executar(lambda conn: _atualizar_arquivo(conn, trabalho_id, tabela, SITUACAO=EXECUTANDO))
+
+    with open(arquivo['CAMINHO'], 'rb') as csv:
+        def checkpoint(conn, resultado, rejeitadas):
+            # O relatório do bloco é sobrescrito se o bloco for repetido, sem duplicar linhas
+            if not rejeitadas.empty:
+                caminho = _caminho_rejeicoes_bloco(trabalho_id, tabela, resultado.blocos)
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                rejeitadas.to_csv(caminho, sep=';', decimal=',', index=False, encoding='utf-8')
+            _atualizar_arquivo(
+                conn, trabalho_id, tabela,
+                BLOCOS_CONCLUIDOS=resultado.blocos, LINHAS_LIDAS=resultado.linhas_lidas,
+                LINHAS_INSERIDAS=resultado.linhas_inseridas,
+                LINHAS_REJEITADAS=ArquivoImportacao.LINHAS_REJEITADAS + len(rejeitadas),
+                BYTES_LIDOS=min(csv.tell(), arquivo['TAMANHO_BYTES']),
+            )
+            _batimento(conn, trabalho_id)
+
+        resultado = importar_csv(csv, tabela, chunksize=tamanho_bloco, retomar=retomar, checkpoint=checkpoint)
+
+    _juntar_rejeicoes(trabalho_id, tabela, resultado.blocos)
+    fila_escrita.executar(lambda conn: _atualizar_arquivo(
+        conn, trabalho_id, tabela, SITUACAO=CONCLUIDO, BYTES_LIDOS=arquivo['TAMANHO_BYTES'],
+    ))
+
+def executar_trabalho(trabalho_id):
+    """
+    Executa (ou retoma) o trabalho no processo atual, arquivo por arquivo, na
+    ordem das chaves estrangeiras. Retorna False se o trabalho não estava
+    disponível (concluído ou em execução por outro trabalhador).
+    """
+    def assumir(conn):
+        if not _assumir(conn, trabalho_id):
+            return None
+        tamanho_bloco = conn.execute(
+            select(TrabalhoImportacao.TAMANHO_BLOCO).where(TrabalhoImportacao.TRABALHO_ID == trabalho_id)
+        ).scalar_one()
+        arquivos = conn.execute(
+            select(ArquivoImportacao)
+            .where(ArquivoImportacao.TRABALHO_ID == trabalho_id, ArquivoImportacao.SITUACAO != CONCLUIDO)
+            .order_by(ArquivoImportacao.ORDEM)
+        ).mappings().all()
+        return tamanho_bloco, arquivos
+
+    assumido = fila_escrita.executar(assumir)
+    if assumido is None:
+        return False
+    tamanho_bloco, arquivos = assumido
+
+    parar = threading.Event()
+    threading.Thread(target=_batimentos, args=(trabalho_id, parar), daemon=True).start()
+    erros = []
+    try:
+        for arquivo in arquivos:
+            try:
+                _importar_arquivo(trabalho_id, arquivo, tamanho_bloco)
+            except Exception as e:
+                erros.append(arquivo['TABELA'])
+                fila_escrita.executar(lambda conn: _atualizar_arquivo(
+                    conn, trabalho_id, arquivo['TABELA'], SITUACAO=ERRO, MENSAGEM=str(e),
+                ))
+    finally:
+        parar.set()
+
+    fila_escrita.executar(lambda conn: _finalizar(
+        conn, trabalho_id, ERRO if erros else CONCLUIDO, f"Falha em: {', '.join(erros)}" if erros else None,
+    ))
+    with get_engine().connect() as conn:
+        caminhos = conn.execute(
+            select(ArquivoImportacao.CAMINHO).where(ArquivoImportacao.TRABALHO_ID == trabalho_id)
+        ).scalars().all()
+    if not erros:
+        # Os CSVs copiados não são mais necessários; os relatórios de rejeição ficam
+        for caminho in caminhos:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+    return True
+
+# --- Consulta do progresso ---
+
+def situacao_trabalhos(quantidade=5):
+    """Retorna (trabalhos, arquivos) dos `quantidade` trabalhos mais recentes, como DataFrames."""
+    t, a = TrabalhoImportacao, ArquivoImportacao
+    with get_engine().connect() as conn:
+        trabalhos = pd.read_sql(select(t).order_by(t.TRABALHO_ID.desc()).limit(quantidade), conn)
+        arquivos = pd.read_sql(
+            select(a).where(a.TRABALHO_ID.in_(trabalhos['TRABALHO_ID'].tolist())).order_by(a.TRABALHO_ID, a.ORDEM), conn
+        )
+    return trabalhos, arquivos
+
+if __name__ == "__main__":
+    # Opção global do pandas, ligada antes de qualquer DataFrame (ver src/tipagem.py)
+    ativar_copy_on_write()
+    if sys.argv[1:] == ["--retomar"]:
+        print(f"Trabalhos retomados: {retomar_interrompidos()}")
+    elif len(sys.argv) == 2 and sys.argv[1].isdigit():
+        if not executar_trabalho(int(sys.argv[1])):
+            print(f"Trabalho {sys.argv[1]} já concluído ou em execução por outro trabalhador.")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,42 @@
+# src/versoes.py
+"""
+Versões de dados por tabela, usadas para invalidar caches de forma seletiva.
+
+Cada gravação incrementa, na mesma transação, o contador da tabela alterada em
+CONTROLE_TABELAS. Os carregadores em cache das páginas recebem a versão das
+tabelas que leem como parte da chave do cache: cadastrar um credor muda apenas
+a versão de CREDOR e não obriga a recarregar os pagamentos.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+
+from src.database import get_engine, insert_com_conflito, ControleTabela
+
+def registrar_alteracao(conn, *tabelas):
+    """Incrementa a versão das tabelas informadas (deve rodar na transação da gravação)."""
+    controle = ControleTabela.__table__
+    agora = datetime.now()
+    stmt = insert_com_conflito(conn, controle)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['TABELA'],
+        set_={'VERSAO': controle.c.VERSAO + 1, 'ATUALIZADO_EM': stmt.excluded.ATUALIZADO_EM},
+    )
+    conn.execute(stmt, [{'TABELA': tabela, 'VERSAO': 1, 'ATUALIZADO_EM': agora} for tabela in tabelas])
+
+def chave_edicoes(table_name):
+    """
+    Nome do contador que só muda quando linhas existentes da tabela são alteradas
+    (e não quando linhas novas são incluídas). Permite a quem guarda uma cópia da
+    tabela saber se basta acrescentar as linhas novas (ver src/relatorio_colunar.py).
+    """
+    return f"{table_name}:EDICOES"
+
+def versoes(*tabelas, bind=None):
+    """Retorna {tabela: versão} para as tabelas informadas (0 para as nunca alteradas)."""
+    controle = ControleTabela.__table__
+    with (bind or get_engine()).connect() as conn:
+        atuais = dict(conn.execute(
+            select(controle.c.TABELA, controle.c.VERSAO).where(controle.c.TABELA.in_(tabelas))
+        ).all())
+    return {tabela: atuais.get(tabela, 0) for tabela in tabelas}
@@ -0,0 +1,28 @@
+# tests/conftest.py
+import os
+
+import pytest
+
+# Nenhum teste deve abrir data/sispagto.db, nem por engano
+os.environ.setdefault("SISPAGTO_DATABASE_URL", "sqlite://")
+
+from src import database  # noqa: E402
+from src.business_rules import indice_contratos  # noqa: E402
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Banco SQLite novo, com o esquema e as migrações aplicados, usado como engine da aplicação."""
+    engine = database.criar_engine(f"sqlite:///{tmp_path / 'teste.db'}")
+    monkeypatch.setattr(database, "_engine", engine)
+    monkeypatch.setattr(database, "_banco_inicializado", False)
+    # O índice de contratos em memória é do processo: recomeça vazio a cada banco
+    monkeypatch.setattr(indice_contratos, "_contratos", {})
+    monkeypatch.setattr(indice_contratos, "_versoes", None)
+    database.garantir_banco()
+    yield engine
+    engine.dispose()
+
+def escrever_csv(caminho, linhas):
+    """Grava um CSV de importação (`;` como separador) a partir de uma lista de linhas."""
+    caminho.write_text("\n".join(";".join(map(str, linha)) for linha in linhas) + "\n", encoding="utf-8")
+    return caminho
@@ -0,0 +1,54 @@
+# tests/test_busca.py
+from sqlalchemy import select, text
+
+from src import busca, repositorios
+from src.database import Credor
+
+def _cadastrar_credores(*credores):
+    for doc, nome in credores:
+        repositorios.credores.cadastrar(CREDOR_DOC=doc, CREDOR_NOME=nome)
+
+def test_busca_por_prefixo_sem_acentos(banco):
+    _cadastrar_credores(('111.222.333-44', 'José da Silva'), ('555', 'Maria Souza'))
+    assert busca.buscar_credores('jose sil') == {'111.222.333-44': 'José da Silva'}
+    # Documento com ou sem pontuação
+    assert list(busca.buscar_credores('11122233344')) == ['111.222.333-44']
+    assert busca.buscar_credores('') == {'111.222.333-44': 'José da Silva', '555': 'Maria Souza'}
+
+def test_busca_acompanha_alteracoes_e_exclusoes(banco):
+    _cadastrar_credores(('001', 'Ana Lima'), ('002', 'Bruno Costa'))
+    repositorios.credores.atualizar({'001': {'CREDOR_NOME': 'Ana Prado'}})
+    assert busca.buscar_credores('lima') == {}
+    assert busca.buscar_credores('prado') == {'001': 'Ana Prado'}
+    with banco.begin() as conn:
+        conn.execute(Credor.__table__.delete().where(Credor.CREDOR_DOC == '002'))
+    assert busca.buscar_credores('bruno') == {}
+
+def test_busca_nao_depende_do_rowid(banco):
+    _cadastrar_credores(('001', 'Ana'), ('002', 'Bruno'))
+    # Como o VACUUM pode fazer nas tabelas sem chave inteira: troca os rowids das linhas
+    with banco.begin() as conn:
+        conn.execute(text("UPDATE CREDOR SET rowid = -rowid"))
+        conn.execute(text("UPDATE CREDOR SET rowid = 3 + rowid WHERE rowid < 0"))
+
+    assert busca.buscar_credores('bruno') == {'002': 'Bruno'}
+    assert busca.buscar_credores('ana') == {'001': 'Ana'}
+    repositorios.credores.atualizar({'002': {'CREDOR_NOME': 'Bruno Alves'}})
+    assert busca.buscar_credores('alves') == {'002': 'Bruno Alves'}
+    assert busca.buscar_credores('ana') == {'001': 'Ana'}
+
+def test_condicoes_busca_combinam_com_outras_consultas(banco):
+    _cadastrar_credores(('001', 'Ana Lima'), ('002', 'Bruno Lima'), ('003', 'Carla Dias'))
+    tabela = Credor.__table__
+    consulta = select(tabela.c.CREDOR_DOC).where(*busca.condicoes_busca('CREDOR', 'lima')).order_by(tabela.c.CREDOR_DOC)
+    with banco.connect() as conn:
+        assert conn.execute(consulta).scalars().all() == ['001', '002']
+    assert busca.condicoes_busca('CREDOR', '  ') == []
+
+def test_busca_de_produtos(banco):
+    numero = repositorios.produtos.cadastrar(PROD_SERV_DESCRICAO='Papel sulfite A4', PROD_SERV_VALOR=25)
+    repositorios.produtos.cadastrar(PROD_SERV_DESCRICAO='Caneta azul', PROD_SERV_VALOR=2)
+    assert busca.buscar_produtos('sulf') == {numero: 'Papel sulfite A4'}
+    repositorios.produtos.atualizar({numero: {'PROD_SERV_DESCRICAO': 'Papel reciclado'}})
+    assert busca.buscar_produtos('sulf') == {}
+    assert busca.buscar_produtos('recic') == {numero: 'Papel reciclado'}
@@ -0,0 +1,66 @@
+# tests/test_cli.py
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from src import cli
+from tests.conftest import escrever_csv
+
+@pytest.fixture
+def pasta(tmp_path):
+    """CSVs de credores, contratos e pagamentos (um fora da vigência), com nomes em minúsculas."""
+    dados = tmp_path / "carga"
+    dados.mkdir()
+    escrever_csv(dados / "credor.csv", [("CREDOR_DOC", "CREDOR_NOME"), ("001", "Ana"), ("002", "Bruno")])
+    escrever_csv(dados / "CONTRATO.csv", [
+        ("CONTRATO_N", "CREDOR_DOC", "CONTRATO_DATA_INI", "CONTRATO_DATA_FIM", "CONTRATO_VALOR"),
+        ("C1", "001", "2024-01-01", "2024-12-31", "1.000,00"),
+    ])
+    escrever_csv(dados / "PAGTO.csv", [
+        ("PAGTO_ID", "PAGTO_DATA", "PAGTO_VALOR", "CREDOR_DOC", "CONTRATO_N"),
+        (1, "2024-02-01", "100,00", "001", "C1"),
+        (2, "2025-02-01", "100,00", "001", "C1"),
+    ])
+    (dados / "notas.txt").write_text("ignorado")
+    return dados
+
+def _executar(*argv):
+    # main ativa o copy-on-write do pandas: limitado ao teste
+    with pd.option_context("mode.copy_on_write", False):
+        return cli.main(list(argv))
+
+def _contar(engine, tabela):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {tabela}")).scalar()
+
+def test_localizar_arquivos_na_ordem_das_chaves(pasta):
+    assert list(cli.localizar_arquivos(pasta)) == ['CREDOR', 'CONTRATO', 'PAGTO']
+
+@pytest.mark.parametrize("blocos", [[], ["--blocos", "1"]])
+def test_importar_e_status(banco, pasta, tmp_path, capsys, blocos):
+    rejeicoes = tmp_path / "rejeicoes"
+    assert _executar("importar", str(pasta), "--rejeicoes", str(rejeicoes), *blocos) == 0
+
+    saida = capsys.readouterr().out
+    assert "CREDOR: 2 linhas lidas, 2 novas, 0 rejeitadas" in saida
+    assert "PAGTO: 2 linhas lidas, 1 novas, 1 rejeitadas" in saida
+    assert [_contar(banco, t) for t in ('CREDOR', 'CONTRATO', 'PAGTO')] == [2, 1, 1]
+    relatorio = pd.read_csv(rejeicoes / "rejeicoes_PAGTO.csv", sep=';', encoding='utf-8-sig')
+    assert relatorio['Linha'].tolist() == [3]
+
+    assert _executar("status") == 0
+    linhas = {linha.split()[0]: linha.split()[1] for linha in capsys.readouterr().out.splitlines()[2:]}
+    assert linhas['CREDOR'] == '2' and linhas['PAGTO'] == '1'
+
+def test_importar_em_lote_nao_grava_nada_se_um_arquivo_falha(banco, pasta, capsys):
+    # O nome do credor é único: o arquivo de pagamentos seria válido, mas o de credores falha
+    escrever_csv(pasta / "credor.csv", [("CREDOR_DOC", "CREDOR_NOME"), ("001", "Ana"), ("002", "Ana")])
+    assert _executar("importar", str(pasta)) == 1
+    erros = capsys.readouterr().err
+    assert "Erro ao processar 'CREDOR'" in erros
+    assert "Nenhum dado foi gravado." in erros
+    assert _contar(banco, 'CREDOR') == 0
+
+def test_pasta_sem_csv(banco, tmp_path, capsys):
+    assert _executar("importar", str(tmp_path)) == 1
+    assert "Nenhum CSV" in capsys.readouterr().err
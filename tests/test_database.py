@@ -0,0 +1,34 @@
+# tests/test_database.py
+import threading
+
+import pytest
+from sqlalchemy import inspect, select
+
+from src import database
+from src.database import Base, Credor
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:"])
+def test_engine_em_memoria(url):
+    engine = database.criar_engine(url)
+    try:
+        Base.metadata.create_all(engine)
+        # Outra thread (como a fila de escrita) enxerga o mesmo banco em memória
+        def gravar():
+            with engine.begin() as conn:
+                conn.execute(Credor.__table__.insert().values(CREDOR_DOC='001', CREDOR_NOME='Ana'))
+        escritor = threading.Thread(target=gravar)
+        escritor.start()
+        escritor.join()
+        with engine.connect() as conn:
+            assert conn.execute(select(Credor.CREDOR_NOME)).scalars().all() == ['Ana']
+        assert 'PAGTO' in inspect(engine).get_table_names()
+    finally:
+        engine.dispose()
+
+def test_engine_em_arquivo_usa_pool_configurado(tmp_path):
+    engine = database.criar_engine(f"sqlite:///{tmp_path / 'dados' / 'banco.db'}")
+    try:
+        assert engine.pool.size() == database.POOL_SIZE
+        assert (tmp_path / 'dados').is_dir()
+    finally:
+        engine.dispose()
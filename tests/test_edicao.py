@@ -0,0 +1,96 @@
+# tests/test_edicao.py
+from datetime import date
+
+import pytest
+from sqlalchemy import event, select, text
+
+from src import repositorios
+from src.database import Pagamento, ResumoPeriodo
+from src.edicao import atualizar_em_lote
+from src.versoes import versoes
+
+@pytest.fixture
+def pagamentos(banco):
+    repositorios.credores.cadastrar(CREDOR_DOC='001', CREDOR_NOME='Ana')
+    repositorios.contratos.cadastrar(
+        CONTRATO_N='C1', CREDOR_DOC='001', CONTRATO_DATA_INI=date(2024, 1, 1),
+        CONTRATO_DATA_FIM=date(2024, 12, 31), CONTRATO_VALOR=1000,
+    )
+    return [
+        repositorios.pagamentos.cadastrar(
+            PAGTO_DATA=date(2024, 1, 10), PAGTO_PERIODO='2024-01', PAGTO_VALOR=10, CREDOR_DOC='001', CONTRATO_N='C1',
+        )
+        for _ in range(3)
+    ]
+
+@pytest.fixture
+def updates(banco):
+    """Lista (comando, quantidade de linhas de parâmetros) de cada UPDATE enviado ao banco."""
+    enviados = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE "PAGTO"'):
+            enviados.append((statement, len(parameters) if executemany else 1))
+
+    event.listen(banco, "before_cursor_execute", registrar)
+    yield enviados
+    event.remove(banco, "before_cursor_execute", registrar)
+
+def _pagamentos(engine):
+    with engine.connect() as conn:
+        return {
+            pagto_id: (data, periodo, float(valor))
+            for pagto_id, data, periodo, valor in conn.execute(
+                select(Pagamento.PAGTO_ID, Pagamento.PAGTO_DATA, Pagamento.PAGTO_PERIODO, Pagamento.PAGTO_VALOR)
+            )
+        }
+
+def test_agrupa_por_conjunto_de_colunas_alteradas(banco, pagamentos, updates):
+    a, b, c = pagamentos
+    with banco.begin() as conn:
+        atualizadas = atualizar_em_lote(conn, 'PAGTO', {
+            a: {'PAGTO_VALOR': 11},
+            b: {'PAGTO_VALOR': 12},
+            c: {'PAGTO_DATA': '05/02/2024', 'PAGTO_VALOR': 13},
+        })
+
+    assert atualizadas == 3
+    # Um UPDATE com várias linhas (executemany) por conjunto de colunas
+    assert sorted(linhas for _, linhas in updates) == [1, 2]
+    assert _pagamentos(banco) == {
+        a: (date(2024, 1, 10), '2024-01', 11.0),
+        b: (date(2024, 1, 10), '2024-01', 12.0),
+        c: (date(2024, 2, 5), '2024-01', 13.0),
+    }
+
+def test_nomes_do_editor_e_colunas_desconhecidas(banco, pagamentos, updates):
+    a, b, _ = pagamentos
+    with banco.begin() as conn:
+        atualizadas = atualizar_em_lote(
+            conn, 'PAGTO',
+            {a: {'Data': '2024-03-01', 'Credor': 'ignorado'}, b: {'Credor': 'ignorado'}},
+            colunas={'Data': 'PAGTO_DATA', 'Valor': 'PAGTO_VALOR'},
+        )
+        # Sem alterações conhecidas, nada é enviado
+        assert atualizar_em_lote(conn, 'PAGTO', {b: {'Credor': 'x'}}, colunas={'Data': 'PAGTO_DATA'}) == 0
+    assert atualizadas == 1
+    assert len(updates) == 1
+    assert _pagamentos(banco)[a][0] == date(2024, 3, 1)
+
+def test_data_invalida_e_recusada(banco, pagamentos):
+    with pytest.raises(ValueError):
+        with banco.begin() as conn:
+            atualizar_em_lote(conn, 'PAGTO', {pagamentos[0]: {'PAGTO_DATA': '31/02/2024'}})
+
+def test_ajusta_resumos_e_versoes_de_pagto(banco, pagamentos):
+    a, b, _ = pagamentos
+    antes = versoes('PAGTO', 'PAGTO:EDICOES', 'CREDOR')
+    with banco.begin() as conn:
+        atualizar_em_lote(conn, 'PAGTO', {a: {'PAGTO_PERIODO': '2024-02', 'PAGTO_VALOR': 50}, b: {'PAGTO_VALOR': 0.5}})
+        resumo = dict(conn.execute(select(ResumoPeriodo.PAGTO_PERIODO, ResumoPeriodo.VALOR_TOTAL)).all())
+    assert {k: float(v) for k, v in resumo.items()} == {'2024-01': 10.5, '2024-02': 50.0}
+
+    depois = versoes('PAGTO', 'PAGTO:EDICOES', 'CREDOR')
+    assert depois['PAGTO'] == antes['PAGTO'] + 1
+    assert depois['PAGTO:EDICOES'] == antes['PAGTO:EDICOES'] + 1
+    assert depois['CREDOR'] == antes['CREDOR']
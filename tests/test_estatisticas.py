@@ -0,0 +1,45 @@
+# tests/test_estatisticas.py
+from sqlalchemy import text
+
+from src import fila_escrita, repositorios
+from src.estatisticas import estatisticas_tabelas, recalcular_estatisticas, tamanho_em_disco
+from src.importacao import importar_csv
+from tests.conftest import escrever_csv
+
+def _paginas(conn, nome):
+    return conn.execute(
+        text("SELECT SUM(pgsize) FROM dbstat WHERE aggregate = TRUE AND name = :n"), {'n': nome}
+    ).scalar() or 0
+
+def test_importacao_e_cadastro_somam_as_linhas(banco, tmp_path):
+    arquivo = escrever_csv(tmp_path / "credor.csv", [("CREDOR_DOC", "CREDOR_NOME"), ("001", "Ana"), ("002", "Bruno")])
+    importar_csv(arquivo, 'CREDOR')
+    # Linhas repetidas não são contadas de novo
+    importar_csv(arquivo, 'CREDOR')
+    repositorios.credores.cadastrar(CREDOR_DOC='003', CREDOR_NOME='Carla')
+
+    estatisticas = estatisticas_tabelas(['CREDOR', 'PAGTO'])
+    assert estatisticas.loc['CREDOR', 'LINHAS'] == 3
+    assert estatisticas.loc['CREDOR', 'ULTIMA_IMPORTACAO'] is not None
+    assert estatisticas.loc['CREDOR', 'TAMANHO_BYTES'] > 0
+    assert estatisticas.loc['PAGTO', 'LINHAS'] == 0
+
+def test_tamanho_inclui_indices_automaticos_e_de_busca(banco):
+    with banco.begin() as conn:
+        conn.execute(text("INSERT INTO CREDOR (CREDOR_DOC, CREDOR_NOME) VALUES ('001', 'Ana')"))
+        objetos = ['CREDOR', 'BUSCA_CREDOR_data', 'BUSCA_CREDOR_content'] + conn.execute(
+            text("SELECT name FROM sqlite_master WHERE name LIKE 'sqlite_autoindex_CREDOR%'")
+        ).scalars().all()
+        assert len(objetos) > 3
+        tamanho = tamanho_em_disco(conn, 'CREDOR')
+        assert tamanho >= sum(_paginas(conn, nome) for nome in objetos)
+
+def test_recalcular_ignora_tabelas_sem_estatisticas(banco):
+    repositorios.credores.cadastrar(CREDOR_DOC='001', CREDOR_NOME='Ana')
+    with banco.begin() as conn:
+        conn.execute(text("UPDATE CONTROLE_TABELAS SET LINHAS = 99 WHERE TABELA = 'CREDOR'"))
+    fila_escrita.executar(recalcular_estatisticas)
+
+    estatisticas = estatisticas_tabelas(['CREDOR', 'RESUMO_CREDOR', 'TRABALHO_IMPORTACAO'])
+    assert estatisticas.loc['CREDOR', 'LINHAS'] == 1
+    assert estatisticas.loc[['RESUMO_CREDOR', 'TRABALHO_IMPORTACAO'], 'LINHAS'].isna().all()
@@ -0,0 +1,68 @@
+# tests/test_exportacao.py
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import text
+
+from src import exportacao
+from src.consultas import FiltrosPagamento
+from src.exportacao import exportar_pagamentos
+
+LINHAS = 7
+
+@pytest.fixture
+def pagamentos(banco, monkeypatch):
+    """LINHAS pagamentos e limites de 3 linhas por planilha/arquivo (e lotes de 2 no cursor)."""
+    with banco.begin() as conn:
+        conn.execute(text("INSERT INTO CREDOR (CREDOR_DOC, CREDOR_NOME) VALUES ('001', 'Ana')"))
+        conn.execute(
+            text("INSERT INTO PAGTO (PAGTO_ID, PAGTO_DATA, PAGTO_PERIODO, PAGTO_VALOR, CREDOR_DOC) "
+                 "VALUES (:id, :data, '2024-01', :valor, '001')"),
+            [{'id': i, 'data': f'2024-01-{i:02d}', 'valor': i + 0.5} for i in range(1, LINHAS + 1)],
+        )
+    monkeypatch.setattr(exportacao, "LINHAS_POR_PLANILHA", 3)
+    monkeypatch.setattr(exportacao, "LINHAS_POR_ARQUIVO", 3)
+    monkeypatch.setattr(exportacao, "TAMANHO_LOTE", 2)
+
+def _ler(formato, conteudo):
+    if formato == "csv":
+        return pd.read_csv(io.BytesIO(conteudo), sep=";", decimal=",", encoding="utf-8-sig")
+    return pd.read_parquet(io.BytesIO(conteudo))
+
+def test_xlsx_dividido_em_planilhas(pagamentos):
+    nome, _, arquivo = exportar_pagamentos(FiltrosPagamento(), "xlsx")
+    planilhas = load_workbook(arquivo, read_only=True).worksheets
+
+    assert nome == "relatorio_pagamentos.xlsx"
+    assert [p.title for p in planilhas] == ["Pagamentos", "Pagamentos 2", "Pagamentos 3"]
+    linhas = [linha for p in planilhas for linha in list(p.values)[1:]]
+    assert len(linhas) == LINHAS
+    assert all(list(p.values)[0][0] == "Data" for p in planilhas)
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_partes_compactadas(pagamentos, formato):
+    nome, mime, arquivo = exportar_pagamentos(FiltrosPagamento(), formato)
+
+    assert (nome, mime) == ("relatorio_pagamentos.zip", "application/zip")
+    with zipfile.ZipFile(arquivo) as pacote:
+        nomes = pacote.namelist()
+        partes = [_ler(formato, pacote.read(n)) for n in nomes]
+    assert nomes == [f"relatorio_pagamentos_{i:03d}.{formato}" for i in (1, 2, 3)]
+    assert [len(p) for p in partes] == [3, 3, 1]
+    relatorio = pd.concat(partes)
+    assert relatorio["Valor"].sum() == pytest.approx(sum(i + 0.5 for i in range(1, LINHAS + 1)))
+    assert (relatorio["Credor"] == "Ana").all()
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_arquivo_unico_ate_o_limite(pagamentos, formato):
+    filtros = FiltrosPagamento(data_fim=pd.Timestamp("2024-01-03").date())
+    nome, _, arquivo = exportar_pagamentos(filtros, formato)
+    assert nome == f"relatorio_pagamentos.{formato}"
+    assert len(_ler(formato, arquivo.read())) == 3
+
+def test_relatorio_vazio(banco):
+    _, _, arquivo = exportar_pagamentos(FiltrosPagamento(), "csv")
+    assert list(_ler("csv", arquivo.read()).columns)[:2] == ["Data", "Período"]
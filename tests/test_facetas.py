@@ -0,0 +1,40 @@
+# tests/test_facetas.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.facetas import IndiceFacetas
+
+DIMENSOES = ("Credor", "Tipo de pagamento")
+
+@pytest.fixture
+def relatorio():
+    return pd.DataFrame({
+        "Data": pd.to_datetime(["2024-01-10", "2024-02-10", "2024-03-10", "2024-04-10", "2024-05-10"]),
+        "Credor": pd.Categorical(["Maria", "Ana", "Maria", None, "Bruno"], categories=["Maria", "Bruno", "Ana"]),
+        "Tipo de pagamento": ["Boleto", "NF", "NF", "NF", None],
+    })
+
+def test_valores_em_ordem_alfabetica_sem_nulos(relatorio):
+    indice = IndiceFacetas(relatorio, DIMENSOES)
+    assert indice.valores["Credor"] == ["Ana", "Bruno", "Maria"]
+    assert indice.contagens("Credor") == {"Ana": 1, "Bruno": 1, "Maria": 2}
+    assert indice.contagens("Tipo de pagamento") == {"Boleto": 1, "NF": 3}
+
+def test_cascata_de_filtros(relatorio):
+    indice = IndiceFacetas(relatorio, DIMENSOES)
+    mascara = indice.mascara_datas("2024-02-01", "2024-04-30")
+    assert mascara.tolist() == [False, True, True, True, False]
+    assert indice.contagens("Credor", mascara) == {"Ana": 1, "Maria": 1}
+
+    mascara = indice.restringir(mascara, "Credor", ["Maria", "Inexistente"])
+    assert indice.contagens("Tipo de pagamento", mascara) == {"NF": 1}
+    assert indice.filtrar(relatorio, mascara)["Data"].tolist() == [pd.Timestamp("2024-03-10")]
+
+def test_sem_restricao(relatorio):
+    indice = IndiceFacetas(relatorio, DIMENSOES)
+    assert indice.mascara_datas() is None
+    assert indice.restringir(None, "Credor", []) is None
+    assert indice.filtrar(relatorio, None) is relatorio
+    mascara = indice.restringir(None, "Tipo de pagamento", ["NF"])
+    assert np.array_equal(mascara, [False, True, True, True, False])
@@ -0,0 +1,191 @@
+# tests/test_fila_escrita.py
+import sqlite3
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src import fila_escrita
+from src.fila_escrita import FilaEscrita, banco_bloqueado
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fila.db'}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE T (ID INTEGER PRIMARY KEY, VALOR TEXT)"))
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def sem_espera(monkeypatch):
+    monkeypatch.setattr(fila_escrita, "ESPERA_INICIAL", 0.001)
+
+def _bloqueado():
+    return OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+
+def _inserir(id_, valor="x"):
+    def gravar(conn):
+        conn.execute(text("INSERT INTO T VALUES (:id, :valor)"), {"id": id_, "valor": valor})
+        return id_
+    return gravar
+
+def _ids(engine):
+    with engine.connect() as conn:
+        return sorted(conn.execute(text("SELECT ID FROM T")).scalars())
+
+def test_banco_bloqueado():
+    assert banco_bloqueado(_bloqueado())
+    assert not banco_bloqueado(OperationalError("SELECT", {}, sqlite3.OperationalError("no such table: X")))
+    assert not banco_bloqueado(ValueError("database is locked"))
+
+def test_executar_retorna_o_resultado_apos_o_commit(engine):
+    fila = FilaEscrita(bind=engine)
+    assert fila.executar(_inserir(1)) == 1
+    assert _ids(engine) == [1]
+    assert fila.estatisticas() == {'transacoes': 1, 'gravacoes': 1, 'repeticoes': 0, 'erros': 0, 'pendentes': 0}
+
+def test_gravacoes_simultaneas_sao_agrupadas(engine):
+    fila = FilaEscrita(bind=engine)
+    liberar = threading.Event()
+    # A primeira gravação segura a thread gravadora enquanto as demais se acumulam
+    primeira = fila.enviar(lambda conn: liberar.wait())
+    futuros = [fila.enviar(_inserir(i)) for i in range(10)]
+    liberar.set()
+    assert [f.result() for f in futuros] == list(range(10))
+    assert primeira.result() is True
+    assert _ids(engine) == list(range(10))
+    assert fila.contadores['gravacoes'] == 11
+    assert fila.contadores['transacoes'] <= 2
+
+def test_gravacao_com_erro_nao_afeta_as_demais_do_lote(engine):
+    fila = FilaEscrita(bind=engine)
+    liberar = threading.Event()
+    fila.enviar(lambda conn: liberar.wait())
+    antes = fila.enviar(_inserir(1))
+    duplicada = fila.enviar(_inserir(1, "duplicada"))
+    depois = fila.enviar(_inserir(2))
+    liberar.set()
+
+    assert antes.result() == 1
+    assert depois.result() == 2
+    with pytest.raises(Exception, match="UNIQUE"):
+        duplicada.result()
+    assert _ids(engine) == [1, 2]
+    assert fila.contadores['erros'] == 1
+
+def test_bloqueio_e_repetido_ate_o_commit(engine, sem_espera):
+    fila = FilaEscrita(bind=engine)
+    tentativas = []
+
+    def gravar(conn):
+        tentativas.append(1)
+        _inserir(len(tentativas))(conn)
+        if len(tentativas) < 3:
+            raise _bloqueado()
+        return "ok"
+
+    assert fila.executar(gravar) == "ok"
+    # As tentativas bloqueadas foram desfeitas
+    assert _ids(engine) == [3]
+    assert fila.contadores['repeticoes'] == 2
+
+def test_bloqueio_persistente_desiste_apos_as_tentativas(engine, sem_espera, monkeypatch):
+    monkeypatch.setattr(fila_escrita, "ESPERA_MAXIMA", 0.001)
+    fila = FilaEscrita(bind=engine)
+
+    def gravar(conn):
+        raise _bloqueado()
+
+    with pytest.raises(OperationalError):
+        fila.executar(gravar)
+    assert fila.contadores['repeticoes'] == fila_escrita.TENTATIVAS - 1
+    assert fila.contadores['erros'] == 1
+
+def test_bloqueio_persistente_falha_so_a_gravacao_bloqueada(engine, sem_espera, monkeypatch):
+    monkeypatch.setattr(fila_escrita, "ESPERA_MAXIMA", 0.001)
+    fila = FilaEscrita(bind=engine)
+    liberar = threading.Event()
+    fila.enviar(lambda conn: liberar.wait())
+    antes = fila.enviar(_inserir(1))
+    bloqueada = fila.enviar(lambda conn: (_ for _ in ()).throw(_bloqueado()))
+    depois = fila.enviar(_inserir(2))
+    liberar.set()
+
+    with pytest.raises(OperationalError):
+        bloqueada.result()
+    assert antes.result() == 1
+    assert depois.result() == 2
+    assert _ids(engine) == [1, 2]
+    assert fila.contadores['erros'] == 1
+
+def test_erro_no_commit_refaz_cada_gravacao_sozinha(engine, monkeypatch):
+    # O commit falha sempre que `armar` estiver na transação
+    armada = []
+    commit = engine.dialect.do_commit
+
+    def do_commit(conexao):
+        if armada:
+            armada.clear()
+            raise ValueError("falha no commit")
+        commit(conexao)
+
+    monkeypatch.setattr(engine.dialect, "do_commit", do_commit)
+    fila = FilaEscrita(bind=engine)
+    liberar = threading.Event()
+    fila.enviar(lambda conn: liberar.wait())
+    armar = fila.enviar(lambda conn: armada.append(1))
+    futuros = [fila.enviar(_inserir(i)) for i in (1, 2)]
+    liberar.set()
+
+    with pytest.raises(ValueError):
+        armar.result()
+    assert [f.result() for f in futuros] == [1, 2]
+    assert _ids(engine) == [1, 2]
+
+@pytest.mark.parametrize("erro", [KeyboardInterrupt, SystemExit])
+def test_excecao_base_nao_interrompe_a_fila(engine, erro):
+    fila = FilaEscrita(bind=engine)
+    liberar = threading.Event()
+    fila.enviar(lambda conn: liberar.wait())
+    antes = fila.enviar(_inserir(1))
+
+    def interromper(conn):
+        raise erro()
+
+    interrompida = fila.enviar(interromper)
+    liberar.set()
+    with pytest.raises(erro):
+        interrompida.result(timeout=5)
+    assert antes.result(timeout=5) == 1
+    assert fila.enviar(_inserir(2)).result(timeout=5) == 2
+    assert _ids(engine) == [1, 2]
+
+def test_falha_da_propria_fila_e_entregue_e_a_thread_continua(engine):
+    class Conexao:
+        def __init__(self):
+            self.falhas = 1
+
+        def begin(self):
+            if self.falhas:
+                self.falhas -= 1
+                raise SystemExit("conexão perdida")
+            return engine.begin()
+
+    fila = FilaEscrita(bind=Conexao())
+    with pytest.raises(SystemExit):
+        fila.enviar(_inserir(1)).result(timeout=5)
+    assert fila.enviar(_inserir(2)).result(timeout=5) == 2
+
+def test_gravacao_sozinha_nao_espera_a_janela(engine, monkeypatch):
+    monkeypatch.setattr(fila_escrita, "JANELA_AGRUPAMENTO", 5)
+    fila = FilaEscrita(bind=engine)
+    inicio = time.monotonic()
+    assert fila.executar(_inserir(1)) == 1
+    assert time.monotonic() - inicio < 1
+
+def test_gravacao_de_dentro_da_fila_e_recusada(engine):
+    fila = FilaEscrita(bind=engine)
+    with pytest.raises(RuntimeError):
+        fila.executar(lambda conn: fila.executar(_inserir(1)))
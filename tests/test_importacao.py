@@ -0,0 +1,53 @@
+# tests/test_importacao.py
+import sqlite3
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from src import fila_escrita, importacao
+from src.database import Credor
+from src.importacao import ErroImportacao, importar_lote
+from tests.conftest import escrever_csv
+
+def _bloqueado():
+    return OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+
+def _credores(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(Credor)).scalar()
+
+def test_importar_lote_repete_quando_o_banco_esta_bloqueado(banco, tmp_path, monkeypatch):
+    arquivo = escrever_csv(tmp_path / "credor.csv", [("CREDOR_DOC", "CREDOR_NOME"), ("001", "Ana"), ("002", "Bruno")])
+    original = importacao.registrar_importacao
+    chamadas = []
+
+    def registrar_com_bloqueio(conn, tabela):
+        chamadas.append(tabela)
+        if len(chamadas) == 1:
+            raise _bloqueado()
+        return original(conn, tabela)
+
+    monkeypatch.setattr(importacao, "registrar_importacao", registrar_com_bloqueio)
+    repeticoes = fila_escrita.fila.contadores['repeticoes']
+
+    resultados = importar_lote({'CREDOR': arquivo})
+
+    assert resultados['CREDOR'].linhas_inseridas == 2
+    assert len(chamadas) == 2
+    assert fila_escrita.fila.contadores['repeticoes'] == repeticoes + 1
+    assert _credores(banco) == 2
+
+def test_importar_lote_identifica_o_arquivo_que_falhou(banco, tmp_path, monkeypatch):
+    arquivo = escrever_csv(tmp_path / "credor.csv", [("CREDOR_DOC", "CREDOR_NOME"), ("001", "Ana")])
+
+    def falhar(conn, tabela):
+        raise RuntimeError("falha na gravação")
+
+    monkeypatch.setattr(importacao, "registrar_importacao", falhar)
+    with pytest.raises(ErroImportacao) as erro:
+        importar_lote({'CREDOR': arquivo})
+
+    assert list(erro.value.erros) == ['CREDOR']
+    assert isinstance(erro.value.erros['CREDOR'], RuntimeError)
+    assert _credores(banco) == 0
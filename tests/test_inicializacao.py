@@ -0,0 +1,26 @@
+# tests/test_inicializacao.py
+import pandas as pd
+import pytest
+
+from src import database, inicializacao
+
+@pytest.fixture
+def copy_on_write():
+    with pd.option_context("mode.copy_on_write", False):
+        yield
+
+def test_garantir_banco_nao_altera_opcoes_do_pandas(banco, copy_on_write, monkeypatch):
+    monkeypatch.setattr(database, "_banco_inicializado", False)
+    database.garantir_banco()
+    assert pd.get_option("mode.copy_on_write") is False
+
+def test_inicializar_processo_uma_vez(banco, copy_on_write, monkeypatch):
+    monkeypatch.setattr(inicializacao, "_processo_inicializado", False)
+    monkeypatch.setattr(database, "_banco_inicializado", False)
+    inicializacao.inicializar_processo()
+    assert pd.get_option("mode.copy_on_write") is True
+    assert database._banco_inicializado
+
+    pd.set_option("mode.copy_on_write", False)
+    inicializacao.inicializar_processo()
+    assert pd.get_option("mode.copy_on_write") is False
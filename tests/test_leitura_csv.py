@@ -0,0 +1,55 @@
+# tests/test_leitura_csv.py
+import pandas as pd
+
+from src.leitura_csv import converter_datas, converter_inteiros, converter_numeros, ler_texto, tipar
+from tests.conftest import escrever_csv
+
+
+def texto(*valores):
+    return pd.Series(list(valores), dtype=object)
+
+
+def test_converter_numeros_aceita_virgula_e_ponto_decimal():
+    numeros = converter_numeros(texto("1.250,50", "1250,5", "12.5", "-3", ".5", "1e3", None))
+    assert numeros.iloc[:6].tolist() == [1250.5, 1250.5, 12.5, -3.0, 0.5, 1000.0]
+    assert pd.isna(numeros.iloc[6])
+
+
+def test_converter_numeros_rejeita_milhar_sem_decimal():
+    numeros = converter_numeros(texto("1.250", "1.250.000", "-12.345", "1.25", "1234.567"))
+    assert numeros.iloc[:3].isna().all()
+    assert numeros.iloc[3:].tolist() == [1.25, 1234.567]
+
+
+def test_converter_numeros_rejeita_texto():
+    assert converter_numeros(texto("abc", "1,2,3", "")).isna().all()
+
+
+def test_converter_inteiros_rejeita_fracao():
+    inteiros = converter_inteiros(texto("42", "1.000,00", "1,5", "1.000"))
+    assert str(inteiros.dtype) == "Int64"
+    assert inteiros.iloc[:2].tolist() == [42, 1000]
+    assert inteiros.iloc[2:].isna().all()
+
+
+def test_converter_datas_nos_dois_formatos():
+    datas = converter_datas(texto("2024-03-05", "05/03/2024", "31/02/2024", None))
+    assert datas.iloc[:2].tolist() == [pd.Timestamp("2024-03-05")] * 2
+    assert datas.iloc[2:].isna().all()
+
+
+def test_tipar_descreve_celulas_invalidas_por_linha(tmp_path):
+    csv = escrever_csv(tmp_path / "pagto.csv", [
+        ["PAGTO_ID", "CONTRATO_N", "PAGTO_DATA", "PAGTO_VALOR"],
+        ["1", "C1", "2024-01-10", "1.250,00"],
+        ["2", "C1", "10/01/2024", "1.250"],
+        ["x", "C1", "ontem", "10"],
+    ])
+    df, motivos = tipar(ler_texto(csv), "PAGTO")
+
+    assert df["PAGTO_VALOR"].iloc[0] == 1250.0
+    assert motivos.iloc[0] == ""
+    assert motivos.iloc[1] == "PAGTO_VALOR inválido ('1.250')"
+    assert "PAGTO_ID inválido ('x')" in motivos.iloc[2]
+    assert "PAGTO_DATA inválido ('ontem')" in motivos.iloc[2]
+    assert df["CONTRATO_N"].tolist() == ["C1"] * 3
@@ -0,0 +1,95 @@
+# tests/test_migracoes.py
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+
+from src import busca, database
+from src.database import Base
+from src.migracoes import MIGRACOES, aplicar_migracoes
+
+# Tabelas do esquema original, anterior às migrações (sem os índices dos modelos)
+TABELAS_ORIGINAIS = (
+    'CREDOR', 'PRODUTOS_SERVICOS', 'LISTA_ITENS', 'CONTRATO', 'ADITIVOS',
+    'NF', 'RECIBO', 'FATURA', 'BOLETO', 'PAGTO',
+)
+
+@pytest.fixture
+def banco_original(tmp_path, monkeypatch):
+    """Banco com o esquema original e alguns dados, usado como engine da aplicação."""
+    engine = database.criar_engine(f"sqlite:///{tmp_path / 'original.db'}")
+    monkeypatch.setattr(database, "_engine", engine)
+    with engine.begin() as conn:
+        for nome in TABELAS_ORIGINAIS:
+            conn.execute(CreateTable(Base.metadata.tables[nome]))
+        # CONTROLE_TABELAS como antes das estatísticas (migração 3)
+        conn.execute(text("CREATE TABLE CONTROLE_TABELAS (TABELA VARCHAR PRIMARY KEY, VERSAO INTEGER NOT NULL, ATUALIZADO_EM DATETIME)"))
+        conn.execute(text("INSERT INTO CREDOR VALUES ('001', 'José Lima'), ('002', 'Maria')"))
+        conn.execute(text("INSERT INTO CONTRATO (CONTRATO_N, CREDOR_DOC, CONTRATO_VALOR) VALUES ('C1', '001', 100)"))
+        conn.execute(text(
+            "INSERT INTO PAGTO (PAGTO_DATA, PAGTO_PERIODO, PAGTO_VALOR, CREDOR_DOC, CONTRATO_N) VALUES "
+            "('2024-01-10', '2024-01', 10, '001', 'C1'), ('2024-02-10', '2024-02', 15, '001', 'C1')"
+        ))
+    yield engine
+    engine.dispose()
+
+def _versoes(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT VERSAO FROM SCHEMA_VERSAO ORDER BY VERSAO")).scalars().all()
+
+def test_migra_o_esquema_original(banco_original):
+    database.inicializar_banco()
+    engine = banco_original
+
+    assert _versoes(engine) == [versao for versao, _, _ in MIGRACOES] == [1, 2, 3, 4, 5, 6]
+    inspetor = inspect(engine)
+    indices = {i['name'] for i in inspetor.get_indexes('PAGTO')}
+    assert {'IX_PAGTO_DATA', 'IX_PAGTO_CREDOR_DATA', 'IX_PAGTO_TIPO_DATA'} <= indices
+    assert 'IX_PRODUTOS_DESCRICAO' in {i['name'] for i in inspetor.get_indexes('PRODUTOS_SERVICOS')}
+    assert {'LINHAS', 'ULTIMA_IMPORTACAO', 'TAMANHO_BYTES'} <= {c['name'] for c in inspetor.get_columns('CONTROLE_TABELAS')}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT CONTRATO_N, QTD_PAGAMENTOS, VALOR_TOTAL FROM RESUMO_CONTRATO")).all() == [('C1', 2, 25)]
+        assert conn.execute(text("SELECT LINHAS FROM CONTROLE_TABELAS WHERE TABELA = 'PAGTO'")).scalar() == 2
+    # Índices de busca preenchidos com os dados existentes e mantidos pelos gatilhos
+    assert busca.buscar_credores('jose') == {'001': 'José Lima'}
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO CREDOR VALUES ('003', 'Joana')"))
+    assert set(busca.buscar_credores('jo')) == {'001', '003'}
+
+def test_segunda_execucao_nao_aplica_nada(banco_original):
+    database.inicializar_banco()
+    with banco_original.connect() as conn:
+        registros = conn.execute(text("SELECT * FROM SCHEMA_VERSAO")).all()
+
+    assert aplicar_migracoes() == []
+    database.inicializar_banco()
+    with banco_original.connect() as conn:
+        assert conn.execute(text("SELECT * FROM SCHEMA_VERSAO")).all() == registros
+
+def test_migracao_6_refaz_os_indices_de_busca_pelo_rowid(banco_original):
+    engine = banco_original
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Banco na versão 5, com o índice de busca no formato da migração 4 (ligado pelo rowid)
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE BUSCA_CREDOR USING fts5(CREDOR_NOME, CREDOR_DOC, DOC_DIGITOS, content='')"
+        ))
+        conn.execute(text(
+            'CREATE TRIGGER "BUSCA_CREDOR_AI" AFTER INSERT ON CREDOR BEGIN '
+            'INSERT INTO BUSCA_CREDOR(rowid, CREDOR_NOME, CREDOR_DOC, DOC_DIGITOS) '
+            'VALUES (NEW.rowid, NEW.CREDOR_NOME, NEW.CREDOR_DOC, NEW.CREDOR_DOC); END'
+        ))
+        conn.execute(text(
+            "INSERT INTO SCHEMA_VERSAO VALUES (1, 'm', '2024-01-01'), (2, 'm', '2024-01-01'), "
+            "(3, 'm', '2024-01-01'), (4, 'm', '2024-01-01'), (5, 'm', '2024-01-01')"
+        ))
+
+    assert aplicar_migracoes() == [6]
+    colunas = {c['name'] for c in inspect(engine).get_columns('BUSCA_CREDOR')}
+    assert 'CHAVE' in colunas
+    with engine.connect() as conn:
+        gatilhos = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'CREDOR'")).scalars()
+        assert set(gatilhos) == {'BUSCA_CREDOR_AI', 'BUSCA_CREDOR_AD', 'BUSCA_CREDOR_AU'}
+    assert busca.buscar_credores('maria') == {'002': 'Maria'}
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE CREDOR SET CREDOR_NOME = 'Mariana' WHERE CREDOR_DOC = '002'"))
+    assert busca.buscar_credores('mariana') == {'002': 'Mariana'}
@@ -0,0 +1,54 @@
+# tests/test_relatorio_colunar.py
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src import relatorio_colunar, repositorios
+
+@pytest.fixture
+def copia(banco, tmp_path, monkeypatch):
+    monkeypatch.setattr(relatorio_colunar, "PASTA_COLUNAR", str(tmp_path / "colunar"))
+    repositorios.credores.cadastrar(CREDOR_DOC='001', CREDOR_NOME='Ana')
+    for dia in (1, 2):
+        repositorios.pagamentos.cadastrar(PAGTO_DATA=date(2024, 1, dia), PAGTO_VALOR=10.5, CREDOR_DOC='001')
+    return relatorio_colunar
+
+def test_carrega_o_relatorio_com_os_nomes(copia):
+    df = copia.carregar_relatorio_pagamentos()
+    assert list(df.columns) == ['Data', 'Período', 'Credor', 'Contrato', 'Tipo de pagamento', 'Valor']
+    assert df['Credor'].tolist() == ['Ana', 'Ana']
+    assert df['Data'].tolist() == [pd.Timestamp(2024, 1, 2), pd.Timestamp(2024, 1, 1)]
+    assert df['Valor'].tolist() == [1050, 1050]
+
+def test_credor_novo_nao_refaz_as_partes(copia):
+    partes = copia.reconstruir()['partes']
+    # Pagamento de um credor ainda não cadastrado (importado antes do arquivo de credores)
+    repositorios.pagamentos.cadastrar(PAGTO_DATA=date(2024, 1, 3), PAGTO_VALOR=1, CREDOR_DOC='002')
+    assert copia.carregar_relatorio_pagamentos()['Credor'].isna().sum() == 1
+
+    repositorios.credores.cadastrar(CREDOR_DOC='002', CREDOR_NOME='Bruno')
+    manifesto = copia.sincronizar()
+    assert manifesto['partes'][0] == partes[0]
+    assert copia.carregar_relatorio_pagamentos()['Credor'].tolist() == ['Bruno', 'Ana', 'Ana']
+
+def test_credor_renomeado_nao_refaz_as_partes(copia):
+    partes = copia.reconstruir()['partes']
+    repositorios.credores.atualizar({'001': {'CREDOR_NOME': 'Ana Lima'}})
+    assert copia.sincronizar()['partes'] == partes
+    assert copia.carregar_relatorio_pagamentos()['Credor'].tolist() == ['Ana Lima', 'Ana Lima']
+
+def test_pagamentos_novos_sao_acrescentados(copia):
+    partes = copia.reconstruir()['partes']
+    repositorios.pagamentos.cadastrar(PAGTO_DATA=date(2023, 12, 31), PAGTO_VALOR=2, CREDOR_DOC='001')
+    manifesto = copia.sincronizar()
+    assert manifesto['partes'][:1] == partes and len(manifesto['partes']) == 2
+    df = copia.carregar_relatorio_pagamentos()
+    assert df['Data'].tolist() == [pd.Timestamp(2024, 1, 2), pd.Timestamp(2024, 1, 1), pd.Timestamp(2023, 12, 31)]
+
+def test_edicao_de_pagamento_refaz_a_copia(copia):
+    partes = copia.reconstruir()['partes']
+    pagto_id = copia.carregar_relatorio_pagamentos().index[0]
+    repositorios.pagamentos.atualizar({pagto_id: {'PAGTO_VALOR': 20}})
+    assert copia.sincronizar()['partes'] != partes
+    assert copia.carregar_relatorio_pagamentos().loc[pagto_id, 'Valor'] == 2000
@@ -0,0 +1,102 @@
+# tests/test_repositorios.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from src import fila_escrita, repositorios
+from src.database import Pagamento, ResumoContrato
+from src.repositorios import ErroValidacao
+
+@pytest.fixture
+def contrato(banco):
+    """Contrato de R$ 100,00 vigente em 2024, de um credor cadastrado."""
+    repositorios.credores.cadastrar(CREDOR_DOC='001', CREDOR_NOME='Ana')
+    repositorios.contratos.cadastrar(
+        CONTRATO_N='C1', CREDOR_DOC='001', CONTRATO_DATA_INI=date(2024, 1, 1),
+        CONTRATO_DATA_FIM=date(2024, 12, 31), CONTRATO_VALOR=100,
+    )
+    return 'C1'
+
+def _pagamento(valor, data=date(2024, 6, 1), contrato_n='C1'):
+    return dict(PAGTO_DATA=data, PAGTO_VALOR=valor, CREDOR_DOC='001', CONTRATO_N=contrato_n)
+
+def _valor_pago(engine, contrato_n):
+    with engine.connect() as conn:
+        return float(conn.execute(
+            select(ResumoContrato.VALOR_TOTAL).where(ResumoContrato.CONTRATO_N == contrato_n)
+        ).scalar() or 0)
+
+def test_cadastro_recusa_valor_acima_do_saldo(banco, contrato):
+    repositorios.pagamentos.cadastrar(**_pagamento(60))
+    with pytest.raises(ErroValidacao, match="superior ao disponível"):
+        repositorios.pagamentos.cadastrar(**_pagamento(60))
+    assert _valor_pago(banco, contrato) == 60
+
+def test_cadastros_simultaneos_nao_ultrapassam_o_saldo(banco, contrato):
+    # Os dois passam pela validação do índice em memória e chegam à fila no mesmo lote
+    liberar = threading.Event()
+    fila_escrita.fila.enviar(lambda conn: liberar.wait())
+    with ThreadPoolExecutor(2) as executor:
+        futuros = [executor.submit(repositorios.pagamentos.cadastrar, **_pagamento(60)) for _ in range(2)]
+        while fila_escrita.fila.estatisticas()['pendentes'] < 2:
+            threading.Event().wait(0.001)
+        liberar.set()
+        erros = [f.exception() for f in futuros]
+
+    assert sum(isinstance(e, ErroValidacao) for e in erros) == 1
+    assert erros.count(None) == 1
+    assert _valor_pago(banco, contrato) == 60
+
+def test_edicao_recusa_data_fora_da_vigencia(banco, contrato):
+    pagto_id = repositorios.pagamentos.cadastrar(**_pagamento(10))
+    with pytest.raises(ErroValidacao, match="fora da vigência"):
+        repositorios.pagamentos.atualizar({pagto_id: {'PAGTO_DATA': '15/03/2025'}})
+    repositorios.pagamentos.atualizar({pagto_id: {'PAGTO_DATA': '15/03/2024'}})
+    with banco.connect() as conn:
+        assert conn.execute(select(Pagamento.PAGTO_DATA).where(Pagamento.PAGTO_ID == pagto_id)).scalar() == date(2024, 3, 15)
+
+def test_edicao_recusa_aumento_acima_do_saldo(banco, contrato):
+    pagto_id = repositorios.pagamentos.cadastrar(**_pagamento(50))
+    repositorios.pagamentos.cadastrar(**_pagamento(30))
+    with pytest.raises(ErroValidacao, match="superior ao disponível"):
+        repositorios.pagamentos.atualizar({pagto_id: {'PAGTO_VALOR': 80}})
+    # Até o saldo restante (R$ 20,00) a edição é aceita
+    repositorios.pagamentos.atualizar({pagto_id: {'PAGTO_VALOR': 70}})
+    assert _valor_pago(banco, contrato) == 100
+
+def test_edicao_que_reduz_o_valor_e_aceita(banco, contrato):
+    pagto_id = repositorios.pagamentos.cadastrar(**_pagamento(100))
+    repositorios.pagamentos.atualizar({pagto_id: {'PAGTO_VALOR': 40}})
+    assert _valor_pago(banco, contrato) == 40
+
+def _paginas(table_name, ordem, tamanho, termo=None):
+    paginas, cursor = [], None
+    while True:
+        df, cursor = repositorios.carregar_pagina(table_name, ordem, apos=cursor, tamanho=tamanho, termo=termo)
+        paginas.append(df.index.tolist())
+        if cursor is None:
+            return paginas
+
+def test_paginacao_keyset_desempata_pela_chave(banco):
+    # Valores repetidos: a chave primária decide a ordem e nenhuma linha se perde entre páginas
+    with banco.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO CREDOR (CREDOR_DOC, CREDOR_NOME) VALUES ('001', 'Ana')")
+        conn.exec_driver_sql(
+            'INSERT INTO CONTRATO (CONTRATO_N, CREDOR_DOC, CONTRATO_VALOR) VALUES '
+            "('C5', '001', 20), ('C1', '001', 30), ('C4', '001', 10), ('C2', '001', 20), ('C3', '001', 20)"
+        )
+    assert _paginas('CONTRATO', 'CONTRATO_VALOR', 2) == [['C4', 'C2'], ['C3', 'C5'], ['C1']]
+    assert _paginas('CONTRATO', None, 5) == [['C1', 'C2', 'C3', 'C4', 'C5']]
+    assert repositorios.contar_registros('CONTRATO') == 5
+
+def test_paginacao_keyset_com_busca(banco):
+    with banco.begin() as conn:
+        conn.exec_driver_sql(
+            'INSERT INTO CREDOR (CREDOR_DOC, CREDOR_NOME) VALUES '
+            "('1', 'João Silva'), ('2', 'Maria'), ('3', 'Joana'), ('4', 'JOAO Souza')"
+        )
+    assert _paginas('CREDOR', 'CREDOR_NOME', 1, termo='joao') == [['4'], ['1']]
+    assert repositorios.contar_registros('CREDOR', termo='jo') == 3
@@ -0,0 +1,94 @@
+# tests/test_resumos.py
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select, text
+
+from src import fila_escrita, repositorios
+from src.database import Pagamento
+from src.importacao import importar_csv
+from src.resumos import RESUMOS, reconstruir_resumos
+from tests.conftest import escrever_csv
+
+@pytest.fixture
+def contratos(banco):
+    """Contratos C1 (credor 001) e C2 (credor 002), de R$ 1.000,00, vigentes em 2024."""
+    for doc, nome, contrato in (('001', 'Ana', 'C1'), ('002', 'Bruno', 'C2')):
+        repositorios.credores.cadastrar(CREDOR_DOC=doc, CREDOR_NOME=nome)
+        repositorios.contratos.cadastrar(
+            CONTRATO_N=contrato, CREDOR_DOC=doc, CONTRATO_DATA_INI=date(2024, 1, 1),
+            CONTRATO_DATA_FIM=date(2024, 12, 31), CONTRATO_VALOR=1000,
+        )
+
+def _pagar(valor, contrato='C1', credor='001', periodo='2024-01'):
+    return repositorios.pagamentos.cadastrar(
+        PAGTO_DATA=date(2024, 1, 15), PAGTO_PERIODO=periodo, PAGTO_VALOR=valor,
+        CREDOR_DOC=credor, CONTRATO_N=contrato,
+    )
+
+def _conferir(engine):
+    """Cada tabela de resumo é igual à agregação de PAGTO pela sua chave."""
+    with engine.connect() as conn:
+        for tabela, chave in RESUMOS.items():
+            coluna = Pagamento.__table__.c[chave]
+            esperado = {
+                k: (qtd, round(float(valor), 2))
+                for k, qtd, valor in conn.execute(
+                    select(coluna, func.count(), func.sum(Pagamento.PAGTO_VALOR)).where(coluna.is_not(None)).group_by(coluna)
+                )
+            }
+            resumo = {
+                k: (qtd, round(float(valor), 2))
+                for k, qtd, valor in conn.execute(select(tabela.c[chave], tabela.c.QTD_PAGAMENTOS, tabela.c.VALOR_TOTAL))
+            }
+            assert resumo == esperado, tabela.name
+    return esperado
+
+def test_cadastro_soma_aos_resumos(banco, contratos):
+    _pagar(10)
+    _pagar(20.5, periodo='2024-02')
+    _pagar(30, contrato='C2', credor='002')
+    assert _conferir(banco) == {'2024-01': (2, 40.0), '2024-02': (1, 20.5)}
+
+def test_importacao_soma_aos_resumos(banco, contratos, tmp_path):
+    _pagar(10)
+    arquivo = escrever_csv(tmp_path / "pagto.csv", [
+        ("PAGTO_ID", "PAGTO_DATA", "PAGTO_PERIODO", "PAGTO_VALOR", "CREDOR_DOC", "CONTRATO_N"),
+        (100, "2024-03-01", "2024-03", "5,50", "001", "C1"),
+        (101, "2024-03-02", "2024-03", "7,25", "002", "C2"),
+        (102, "2024-03-03", "", "1,00", "002", "C2"),
+        # Rejeitada (fora da vigência): não entra nos resumos
+        (103, "2025-03-03", "2025-03", "9,00", "002", "C2"),
+    ])
+    resultado = importar_csv(arquivo, 'PAGTO')
+    assert resultado.linhas_inseridas == 3
+    assert _conferir(banco) == {'2024-01': (1, 10.0), '2024-03': (2, 12.75)}
+    # Reimportar o mesmo arquivo não soma de novo
+    importar_csv(arquivo, 'PAGTO')
+    _conferir(banco)
+
+def test_edicao_move_o_pagamento_entre_contratos_e_periodos(banco, contratos):
+    primeiro = _pagar(10)
+    segundo = _pagar(20)
+    repositorios.pagamentos.atualizar({
+        primeiro: {'CONTRATO_N': 'C2', 'CREDOR_DOC': '002', 'PAGTO_PERIODO': '2024-05'},
+        segundo: {'PAGTO_VALOR': 25},
+    })
+    assert _conferir(banco) == {'2024-01': (1, 25.0), '2024-05': (1, 10.0)}
+
+    # O contrato, o credor e o período que ficam sem pagamentos saem dos resumos
+    repositorios.pagamentos.atualizar({segundo: {'CONTRATO_N': 'C2', 'CREDOR_DOC': '002', 'PAGTO_PERIODO': '2024-05'}})
+    assert _conferir(banco) == {'2024-05': (2, 35.0)}
+    with banco.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM RESUMO_CONTRATO WHERE CONTRATO_N = 'C1'")).scalar() == 0
+
+def test_reconstruir_resumos(banco, contratos):
+    _pagar(10)
+    _pagar(20, contrato='C2', credor='002', periodo='2024-02')
+    with banco.begin() as conn:
+        for tabela in RESUMOS:
+            conn.execute(tabela.delete())
+        conn.execute(text("INSERT INTO RESUMO_PERIODO VALUES ('1999-01', 1, 1)"))
+
+    fila_escrita.executar(reconstruir_resumos)
+    assert _conferir(banco) == {'2024-01': (1, 10.0), '2024-02': (1, 20.0)}
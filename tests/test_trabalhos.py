@@ -0,0 +1,31 @@
+# tests/test_trabalhos.py
+import pytest
+
+from src import trabalhos
+
+
+def test_retomar_uma_vez_por_processo(monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(trabalhos, "_retomados_no_processo", False)
+    monkeypatch.setattr(trabalhos, "retomar_interrompidos", lambda: chamadas.append(1) or [7])
+
+    assert trabalhos.retomar_uma_vez() == [7]
+    assert trabalhos.retomar_uma_vez() == []
+    assert len(chamadas) == 1
+
+
+def test_retomar_uma_vez_tenta_de_novo_apos_erro(monkeypatch):
+    respostas = iter([RuntimeError("banco indisponível"), [3]])
+
+    def retomar():
+        resposta = next(respostas)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    monkeypatch.setattr(trabalhos, "_retomados_no_processo", False)
+    monkeypatch.setattr(trabalhos, "retomar_interrompidos", retomar)
+
+    with pytest.raises(RuntimeError):
+        trabalhos.retomar_uma_vez()
+    assert trabalhos.retomar_uma_vez() == [3]
@@ -0,0 +1,101 @@
+# tests/test_validacao_lote.py
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import insert
+
+from src import repositorios
+from src.business_rules import validar_contratos_lote, validar_pagamentos_lote
+from src.database import Aditivo
+
+@pytest.fixture
+def contrato(banco):
+    """Contrato C1 de R$ 100,00 vigente no 1º semestre de 2024, com aditivo de R$ 50,00 para setembro."""
+    repositorios.credores.cadastrar(CREDOR_DOC='001', CREDOR_NOME='Ana')
+    repositorios.contratos.cadastrar(
+        CONTRATO_N='C1', CREDOR_DOC='001', CONTRATO_DATA_INI=date(2024, 1, 1),
+        CONTRATO_DATA_FIM=date(2024, 6, 30), CONTRATO_VALOR=100,
+    )
+    with banco.begin() as conn:
+        conn.execute(insert(Aditivo).values(
+            ADITIVO_N=1, CONTRATO_N='C1', ADITIVO_DATA_INI=date(2024, 9, 1),
+            ADITIVO_DATA_FIM=date(2024, 9, 30), ADITIVO_VALOR=50,
+        ))
+    return 'C1'
+
+def _pagamentos(*linhas):
+    return pd.DataFrame(linhas, columns=['PAGTO_ID', 'CONTRATO_N', 'PAGTO_DATA', 'PAGTO_VALOR'])
+
+def _validar(banco, df):
+    with banco.connect() as conn:
+        return validar_pagamentos_lote(df, conn).tolist()
+
+def test_datas_dentro_das_vigencias_do_contrato_e_do_aditivo(banco, contrato):
+    motivos = _validar(banco, _pagamentos(
+        [1, 'C1', '2024-03-01', 10],
+        [2, 'C1', '2024-09-15', 10],
+        [3, 'C1', '2024-08-01', 10],
+        [4, 'C1', '2023-12-31', 10],
+    ))
+    assert motivos[:2] == ['', '']
+    assert all(m.startswith("Data fora da vigência do contrato C1") for m in motivos[2:])
+
+def test_saldo_acumulado_na_ordem_do_arquivo(banco, contrato):
+    repositorios.pagamentos.cadastrar(PAGTO_DATA=date(2024, 2, 1), PAGTO_VALOR=30, CREDOR_DOC='001', CONTRATO_N='C1')
+    # Disponível: 100 + 50 (aditivo) - 30 (já pago) = 120
+    motivos = _validar(banco, _pagamentos(
+        [10, 'C1', '2024-03-01', 70],
+        [11, 'C1', '2024-03-02', 50],
+        [12, 'C1', '2024-03-03', 0.01],
+    ))
+    assert motivos[:2] == ['', '']
+    assert motivos[2] == "Valor acumulado superior ao disponível no contrato C1"
+
+def test_linhas_invalidas_nao_consomem_saldo(banco, contrato):
+    motivos = _validar(banco, _pagamentos(
+        [1, 'C1', '2024-08-01', 150],
+        [2, 'C1', '2024-03-01', 150],
+    ))
+    assert motivos[0].startswith("Data fora da vigência")
+    assert motivos[1] == ''
+
+def test_contrato_inexistente_e_celulas_invalidas(banco, contrato):
+    motivos = _validar(banco, _pagamentos(
+        [1, 'C9', '2024-03-01', 10],
+        [2, 'C1', 'ontem', 10],
+        [3, 'C1', '2024-03-01', None],
+    ))
+    assert motivos == [
+        "Contrato C9 não encontrado",
+        "Data do pagamento inválida",
+        "Valor do pagamento inválido",
+    ]
+
+def test_pagamentos_ja_gravados_nao_sao_validados(banco, contrato):
+    repositorios.pagamentos.cadastrar(PAGTO_DATA=date(2024, 2, 1), PAGTO_VALOR=100, CREDOR_DOC='001', CONTRATO_N='C1')
+    with banco.connect() as conn:
+        pagto_id = conn.exec_driver_sql('SELECT MAX(PAGTO_ID) FROM PAGTO').scalar()
+    # A linha repetida será ignorada na importação: nem a data nem o valor contam
+    motivos = _validar(banco, _pagamentos(
+        [pagto_id, 'C1', '2024-08-01', 100],
+        [pagto_id + 1, 'C1', '2024-03-01', 50],
+    ))
+    assert motivos == ['', '']
+
+def test_validar_contratos_lote():
+    df = pd.DataFrame({
+        'CONTRATO_DATA_INI': ['2024-01-01', '2024-06-30', '2024-01-01'],
+        'CONTRATO_DATA_FIM': ['2024-12-31', '2024-01-01', None],
+    })
+    motivos = validar_contratos_lote(df).tolist()
+    assert motivos[0] == '' and motivos[2] == ''
+    assert motivos[1] == "A data de término da vigência não pode ser anterior à data de início."
+
+def test_datas_nos_formatos_da_leitura_e_ja_convertidas(banco, contrato):
+    texto = _pagamentos([1, 'C1', '01/03/2024', 10], [2, 'C1', '01/08/2024', 10])
+    convertido = texto.assign(PAGTO_DATA=pd.to_datetime(['2024-03-01', '2024-08-01']))
+    for df in (texto, convertido):
+        motivos = _validar(banco, df)
+        assert motivos[0] == ''
+        assert motivos[1].startswith("Data fora da vigência")
@@ -0,0 +1,37 @@
+# tests/test_versoes.py
+from datetime import date
+
+from src import fila_escrita, repositorios
+from src.importacao import importar_csv
+from src.versoes import chave_edicoes, registrar_alteracao, versoes
+from tests.conftest import escrever_csv
+
+TABELAS = ('CREDOR', 'CONTRATO', 'PAGTO', 'PRODUTOS_SERVICOS', 'RESUMO_PERIODO')
+
+def _diferenca(antes):
+    depois = versoes(*antes)
+    return {tabela: depois[tabela] - versao for tabela, versao in antes.items() if depois[tabela] != versao}
+
+def test_registrar_alteracao_so_nas_tabelas_informadas(banco):
+    antes = versoes(*TABELAS, 'NOVA')
+    assert antes['NOVA'] == 0
+    fila_escrita.executar(lambda conn: registrar_alteracao(conn, 'CREDOR', 'NOVA'))
+    fila_escrita.executar(lambda conn: registrar_alteracao(conn, 'NOVA'))
+    assert _diferenca(antes) == {'CREDOR': 1, 'NOVA': 2}
+
+def test_cadastros_e_importacao_alteram_apenas_as_suas_tabelas(banco, tmp_path):
+    antes = versoes(*TABELAS)
+    repositorios.credores.cadastrar(CREDOR_DOC='001', CREDOR_NOME='Ana')
+    assert _diferenca(antes) == {'CREDOR': 1}
+
+    repositorios.contratos.cadastrar(
+        CONTRATO_N='C1', CREDOR_DOC='001', CONTRATO_DATA_INI=date(2024, 1, 1),
+        CONTRATO_DATA_FIM=date(2024, 12, 31), CONTRATO_VALOR=100,
+    )
+    antes = versoes(*TABELAS, chave_edicoes('PAGTO'))
+    importar_csv(escrever_csv(tmp_path / "pagto.csv", [
+        ("PAGTO_DATA", "PAGTO_PERIODO", "PAGTO_VALOR", "CREDOR_DOC", "CONTRATO_N"),
+        ("2024-02-01", "2024-02", "10,00", "001", "C1"),
+    ]), 'PAGTO')
+    # Pagamentos novos não contam como edição (ver relatorio_colunar)
+    assert _diferenca(antes) == {'PAGTO': 1, 'RESUMO_PERIODO': 1}